@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_rename_is_tournament_gamestatistics_is_tournament_match_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='online',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+def mark_bots(apps, schema_editor):
+    """Les comptes de la réserve existants étaient reconnus à leur domaine d'e-mail"""
+    User = apps.get_model('accounts', 'User')
+    User.objects.filter(email__endswith='@bots.transcendance.local').update(is_bot=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_user_username_trgm'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='is_bot',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_bots, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_bot', True)), fields=['id'], name='user_bot_pool'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # accounts/models.py
 from django.contrib.auth.models import AbstractUser, User
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
@@ -18,9 +20,18 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
-    online = models.BooleanField(default=False)
     is_42_user = models.BooleanField(default=False)
     intra_profile_url = models.URLField(max_length=255, null=True, blank=True)
+    # Compte de la réserve de bots des tournois (chat/bots.py)
+    is_bot = models.BooleanField(default=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Annuaire du chat : recherche par sous-chaîne et similarité sur le nom (pg_trgm)
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm'),
+            # Réserve de bots : index partiel, ne contient que les quelques comptes bots
+            models.Index(fields=['id'], condition=models.Q(is_bot=True), name='user_bot_pool'),
+        ]
 
 class Achievement(models.Model):
     name = models.CharField(max_length=100)
@@ -3,9 +3,7 @@ import os
 import requests
 import secrets
 import uuid
-import random
 from urllib.parse import urlencode
-from django.utils.crypto import get_random_string
 
 from django.conf import settings
 from django.contrib import messages
@@ -15,10 +13,13 @@ from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth.views import LoginView, PasswordChangeView, PasswordChangeDoneView
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse
+from django.db.models import Exists, F, OuterRef
+from django.http import JsonResponse, HttpResponseNotModified, HttpResponseRedirect, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
@@ -27,6 +28,8 @@ from django.views.generic import CreateView
 from .forms import AchievementForm, LoginForm, SignupForm, UpdateUserForm
 from .models import Profile, Achievement, Notification, GameStatistics, PlayerStats
 from chat.models import Tournament, TournamentMatch, TournamentParticipant
+from chat import bracket, friends as friends_push, presence, scheduler, tournaments
+from chat.pagination import InvalidCursor, encode_cursor, keyset_filter, parse_page_size
 
 User = get_user_model()
 
@@ -73,8 +76,6 @@ def login_page(request):
             )
             if user is not None:
                 login(request, user)
-                user.online = True
-                user.save()
                 messages.success(request, 'You are successfully logged in.')
                 return redirect('home')
             else:
@@ -92,8 +93,6 @@ def api_login(request):
 
         user = authenticate(request, username=username, password=password)
         if user:
-            user.online = True
-            user.save()
             login(request, user)
             return JsonResponse({'success': True})
         return JsonResponse({'success': False, 'error': 'Invalid credentials'})
@@ -102,10 +101,8 @@ def api_login(request):
 
 @csrf_exempt
 def logout_user(request):
-    user = request.user
     if request.method == 'POST':
-        user.online = False
-        user.save()
+        # La présence est retirée à la fermeture du WebSocket (voir chat/presence.py)
         logout(request)
         return JsonResponse({'success': True, 'message': 'Déconnexion réussie'})
     return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
@@ -139,8 +136,6 @@ def signup_view(request):
 
     # Connecter l'utilisateur automatiquement après l'inscription
     login(request, user)
-    user.online = True
-    user.save()
 
     return JsonResponse({'detail': 'Inscription réussie !', 'redirect_url': reverse_lazy('login')}, status=201)
 
@@ -278,8 +273,6 @@ def callback_view(request):
 
         # Connecter l'utilisateur
         login(request, user)
-        user.online = True
-        user.save()
         user_directory = os.path.join(settings.MEDIA_ROOT, 'users', user.username)
         os.makedirs(user_directory, exist_ok=True)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -329,6 +322,9 @@ def profile_view(request):
     # Récupérer les 5 dernières parties
     last_games = GameStatistics.objects.filter(player=request.user)\
                        .order_by('-date_played')[:5]
+    
+    friends = list(profile.friends.select_related('user'))
+    friends_presence = presence.get_presence(friend.user_id for friend in friends)
                        
     profile_data = {
         "is_authenticated": True,
@@ -342,7 +338,7 @@ def profile_view(request):
         "last_played_game": profile.last_played_game,
         "time_played": profile.time_played,
         "is_42_user": request.user.is_42_user,
-        "online": request.user.online,
+        "online": presence.is_online(request.user.id),
         "profile_gradient_start": profile.profile_gradient_start,
         "profile_gradient_end": profile.profile_gradient_end,
         "last_games": [
@@ -368,10 +364,10 @@ def profile_view(request):
         "friends": [
             {
                 "username": friend.user.username,
-                "online": friend.user.online,
+                "online": friends_presence[friend.user_id],
                 "profile_photo": friend.user.profile_photo.url if friend.user.profile_photo else '/static/images/default_avatar.jpg'
             }
-            for friend in profile.friends.all()
+            for friend in friends
         ],
         "notifications": [
             {
@@ -419,7 +415,7 @@ def friend_profile_view(request, username):
             "last_played_game": friend_profile.last_played_game,
             "time_played": friend_profile.time_played,
             "is_42_user": friend_user.is_42_user,
-            "online": friend_user.online,
+            "online": presence.is_online(friend_user.id),
             "profile_gradient_start": friend_profile.profile_gradient_start,
             "profile_gradient_end": friend_profile.profile_gradient_end,
             "last_games": [
@@ -537,7 +533,7 @@ def delete_user(request):
         
         # Supprimer cet utilisateur de la liste d'amis de tous les autres utilisateurs
         # qui l'ont comme ami
-        profiles_with_user_as_friend = Profile.objects.filter(friends=profile)
+        profiles_with_user_as_friend = list(Profile.objects.filter(friends=profile).select_related('user'))
         for other_profile in profiles_with_user_as_friend:
             other_profile.friends.remove(profile)
             # Optionnel: Notifier l'autre utilisateur
@@ -552,16 +548,17 @@ def delete_user(request):
             if os.path.exists(user.profile_photo.path):
                 os.remove(user.profile_photo.path)
 
-        # Mettre l'utilisateur hors ligne avant de le supprimer
-        user.online = False
-        user.save()
-        
         # Déconnecter l'utilisateur
         logout(request)
         
         # Supprimer le compte
         user.delete()
         
+        # Retirer sa carte chez ses amis connectés
+        friends_push.notify_removed(
+            user, [other_profile.user_id for other_profile in profiles_with_user_as_friend], reason='deleted'
+        )
+        
         return JsonResponse({
             'success': True,
             'detail': 'Compte supprimé avec succès.',
@@ -593,7 +590,7 @@ def debug_profile_photo(request):
         'media_root': settings.MEDIA_ROOT,
         'media_url': settings.MEDIA_URL,
         'is_42_user': user.is_42_user,
-        'online': user.online,
+        'online': presence.is_online(user.id),
     })
 
 @csrf_exempt
@@ -698,9 +695,13 @@ def add_friend(request, username):
                     type="info"
                 )
                 
+                # 4. Pousser la nouvelle carte aux deux utilisateurs (liste d'amis WebSocket)
+                friends_push.notify_added(request.user, friend_user)
+                
                 return JsonResponse({
                     'status': 'success',
-                    'message': f'{username} a été ajouté à vos amis (et vous avez été ajouté à ses amis)'
+                    'message': f'{username} a été ajouté à vos amis (et vous avez été ajouté à ses amis)',
+                    'friend': friends_push.friend_payload(friend_user)
                 })
             else:
                 return JsonResponse({
@@ -747,6 +748,9 @@ def remove_friend(request, username):
                     type="info"
                 )
                 
+                # 4. Retirer la carte chez l'ami (la page de l'utilisateur actuel retire la sienne)
+                friends_push.notify_removed(request.user, [friend_user.id])
+                
                 return JsonResponse({
                     'status': 'success',
                     'message': f'{username} a été retiré de vos amis (et vous avez été retiré de ses amis)'
@@ -776,12 +780,14 @@ def remove_friend(request, username):
 @login_required
 def friends_status(request):
     profile = request.user.profile
+    friends = list(profile.friends.select_related('user').only('user__username'))
+    friends_presence = presence.get_presence(friend.user_id for friend in friends)
     friends_data = [
         {
             "username": friend.user.username,
-            "online": friend.user.online
+            "online": friends_presence[friend.user_id]
         }
-        for friend in profile.friends.all()
+        for friend in friends
     ]
     print(f"API friends_status appelée, {len(friends_data)} amis trouvés") # Pour déboguer
     return JsonResponse({"friends": friends_data})
@@ -796,13 +802,15 @@ def check_new_friends(request):
             
             # Récupérer la liste actuelle d'amis
             profile = request.user.profile
+            friends = list(profile.friends.select_related('user'))
+            friends_presence = presence.get_presence(friend.user_id for friend in friends)
             current_friends = [
                 {
                     "username": friend.user.username,
-                    "online": friend.user.online,
+                    "online": friends_presence[friend.user_id],
                     "profile_photo": get_profile_photo_url(friend.user)
                 }
-                for friend in profile.friends.all()
+                for friend in friends
             ]
             
             # Identifier les nouveaux amis
@@ -1141,7 +1149,7 @@ def get_combined_profile_stats(request):
         "last_played_game": profile.last_played_game,
         "time_played": profile.time_played,
         "is_42_user": request.user.is_42_user,
-        "online": request.user.online,
+        "online": presence.is_online(request.user.id),
         "profile_gradient_start": profile.profile_gradient_start,
         "profile_gradient_end": profile.profile_gradient_end,
         "achievements": [
@@ -1264,12 +1272,22 @@ def create_tournament(request):
             data = json.loads(request.body)
             name = data.get('name')
             max_participants = int(data.get('max_participants', 8))
+            system = data.get('system', Tournament.ELIMINATION)
             creator_alias = data.get('creator_alias', '').strip()
             
             # Validation
             if not name:
                 return JsonResponse({'status': 'error', 'message': 'Le nom du tournoi est obligatoire'}, status=400)
             
+            if not 2 <= max_participants <= settings.TOURNAMENT_MAX_PARTICIPANTS:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': f'Le nombre de participants doit être compris entre 2 et {settings.TOURNAMENT_MAX_PARTICIPANTS}'
+                }, status=400)
+            
+            if system not in dict(Tournament.SYSTEM_CHOICES):
+                return JsonResponse({'status': 'error', 'message': 'Format de tournoi invalide'}, status=400)
+            
             # Validation de l'alias (maintenant obligatoire)
             if not creator_alias:
                 return JsonResponse({'status': 'error', 'message': 'Un alias est obligatoire pour participer au tournoi'}, status=400)
@@ -1278,7 +1296,9 @@ def create_tournament(request):
             tournament = Tournament.objects.create(
                 name=name,
                 creator=request.user,
-                max_participants=max_participants
+                max_participants=max_participants,
+                system=system,
+                seats_taken=1
             )
             
             # Inscrire le créateur automatiquement
@@ -1302,160 +1322,105 @@ def create_tournament(request):
     
     return JsonResponse({'status': 'error', 'message': 'Méthode non autorisée'}, status=405)
 
-@login_required
-def list_tournaments(request):
-    """Liste tous les tournois"""
-    active_tournaments = Tournament.objects.filter(is_active=True, is_completed=False)
-    my_tournaments = Tournament.objects.filter(participants__user=request.user).distinct()
-    completed_tournaments = Tournament.objects.filter(is_completed=True)
-    
+TOURNAMENT_SECTIONS = ('active', 'mine', 'completed')
+TOURNAMENT_PAGE_SIZE = 20
+
+def tournament_lobby(user):
+    """Tournois annotés en une requête : inscrits, matchs commencés et participation de l'utilisateur"""
+    return Tournament.objects.select_related('creator', 'winner').annotate(
+        has_matches=Exists(TournamentMatch.objects.filter(tournament=OuterRef('pk'))),
+        am_i_participant=Exists(TournamentParticipant.objects.filter(tournament=OuterRef('pk'), user=user))
+    ).order_by('-start_date', '-id')
+
+def tournament_section(request, section, cursor=None, limit=TOURNAMENT_PAGE_SIZE):
+    """Page d'une section du lobby et curseur de la page suivante (tri du plus récent au plus ancien)"""
+    queryset = tournament_lobby(request.user)
+    if section == 'active':
+        queryset = queryset.filter(is_active=True, is_completed=False)
+    elif section == 'mine':
+        queryset = queryset.filter(am_i_participant=True)
+    else:
+        queryset = queryset.filter(is_completed=True)
+
+    # Filtres : nom et inscriptions ouvertes
+    query = request.GET.get('q', '').strip()[:100]
+    if query:
+        queryset = queryset.filter(name__icontains=query)
+    if request.GET.get('open') == 'true':
+        queryset = queryset.filter(is_active=True, is_completed=False, has_matches=False,
+                                   seats_taken__lt=F('max_participants'))
+    if cursor:
+        queryset = queryset.filter(keyset_filter(cursor, 'before', field='start_date'))
+
+    page = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].start_date, page[limit - 1].id) if len(page) > limit else None
+
     def format_tournament(tournament):
         return {
             'id': tournament.id,
             'name': tournament.name,
             'creator': tournament.creator.username,
             'start_date': tournament.start_date.strftime('%Y-%m-%d %H:%M'),
-            'participants_count': tournament.participants.count(),
+            'participants_count': tournament.seats_taken,
             'max_participants': tournament.max_participants,
             'is_completed': tournament.is_completed,
             'winner': tournament.winner.username if tournament.winner else None,
             'current_round': tournament.current_round,
-            'is_registration_open': tournament.is_registration_open(),
-            'is_creator': tournament.creator == request.user,
-            'am_i_participant': tournament.participants.filter(user=request.user).exists()
+            'is_registration_open': (tournament.is_active and not tournament.is_completed and not tournament.has_matches
+                                     and tournament.seats_taken < tournament.max_participants),
+            'is_creator': tournament.creator_id == request.user.id,
+            'am_i_participant': tournament.am_i_participant
         }
-    
+
+    return [format_tournament(t) for t in page[:limit]], next_cursor
+
+@login_required
+def list_tournaments(request):
+    """
+    Liste les tournois. Sans `section`, première page de chaque section (une requête par section) ;
+    avec `section` (active, mine, completed) et `cursor`, page suivante de cette section.
+    """
+    limit = parse_page_size(request.GET.get('limit'), default=TOURNAMENT_PAGE_SIZE)
+    section = request.GET.get('section')
+    try:
+        if section:
+            if section not in TOURNAMENT_SECTIONS:
+                return JsonResponse({'status': 'error', 'message': 'Section inconnue'}, status=400)
+            page, next_cursor = tournament_section(request, section, request.GET.get('cursor'), limit)
+            return JsonResponse({'tournaments': page, 'next_cursor': next_cursor})
+
+        sections = {name: tournament_section(request, name, limit=limit) for name in TOURNAMENT_SECTIONS}
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Curseur invalide'}, status=400)
+
     return JsonResponse({
-        'active_tournaments': [format_tournament(t) for t in active_tournaments],
-        'my_tournaments': [format_tournament(t) for t in my_tournaments],
-        'completed_tournaments': [format_tournament(t) for t in completed_tournaments]
+        'active_tournaments': sections['active'][0],
+        'my_tournaments': sections['mine'][0],
+        'completed_tournaments': sections['completed'][0],
+        'next_cursors': {name: sections[name][1] for name in TOURNAMENT_SECTIONS}
     })
 
 @login_required
 def tournament_detail(request, tournament_id):
-    """Détails d'un tournoi spécifique"""
-    try:
-        print(f"\n=== DÉBUT TOURNAMENT_DETAIL ===")
-        print(f"Tournament ID reçu: {tournament_id}")
-        print(f"Utilisateur connecté: {request.user.username}")
-        
-        tournament = Tournament.objects.get(id=tournament_id)
-        print(f"Tournoi trouvé: {tournament.name} (ID: {tournament.id})")
-        print(f"Créateur: {tournament.creator.username}")
-        print(f"Statut: actif={tournament.is_active}, terminé={tournament.is_completed}")
-        print(f"Nombre de participants: {tournament.participants.count()}")
-        print(f"Nombre de matchs: {tournament.matches.count()}")
-        
-        participants = [{
-            'username': p.user.username,
-            'alias': p.alias,
-            'display_name': p.alias or p.user.username,
-            'profile_photo': get_profile_photo_url(p.user),
-            'joined_at': p.joined_at.strftime('%Y-%m-%d %H:%M'),
-            'is_bot': p.is_bot
-        } for p in tournament.participants.all()]
-        
-        print(f"\nListe des participants ({len(participants)}):")
-        for p in participants:
-            print(f"- {p['username']} (alias: {p['alias']}, bot: {p['is_bot']})")
-        
-        matches = []
-        print(f"\nTraitement des matchs:")
-        for match in tournament.matches.all():
-            print(f"\nMatch ID: {match.id}")
-            print(f"Round: {match.round}")
-            print(f"Joueur 1: {match.player1.username}")
-            print(f"Joueur 2: {match.player2.username}")
-            print(f"Terminé: {match.is_completed}")
-            print(f"Scores: {match.player1_score}-{match.player2_score}")
-            
-            player1_participant = tournament.participants.filter(user=match.player1).first()
-            player2_participant = tournament.participants.filter(user=match.player2).first()
-            
-            print(f"Participant 1 trouvé: {player1_participant is not None}")
-            print(f"Participant 2 trouvé: {player2_participant is not None}")
-            
-            player1_is_bot = player1_participant.is_bot if player1_participant else False
-            player2_is_bot = player2_participant.is_bot if player2_participant else False
-            
-            print(f"Joueur 1 est bot: {player1_is_bot}")
-            print(f"Joueur 2 est bot: {player2_is_bot}")
-            
-            player1_alias = player1_participant.alias if player1_participant else None
-            player2_alias = player2_participant.alias if player2_participant else None
-            
-            print(f"Alias joueur 1: {player1_alias}")
-            print(f"Alias joueur 2: {player2_alias}")
-            
-            can_play = not match.is_completed and \
-                       (match.player1 == request.user or match.player2 == request.user) and \
-                       not (player1_is_bot and player2_is_bot)
-            
-            print(f"L'utilisateur peut jouer: {can_play}")
-            
-            match_data = {
-                'id': match.id,
-                'round': match.round,
-                'player1': {
-                    'username': match.player1.username,
-                    'alias': player1_alias,
-                    'display_name': player1_alias or match.player1.username,
-                    'profile_photo': get_profile_photo_url(match.player1),
-                    'is_bot': player1_is_bot
-                },
-                'player2': {
-                    'username': match.player2.username,
-                    'alias': player2_alias,
-                    'display_name': player2_alias or match.player2.username,
-                    'profile_photo': get_profile_photo_url(match.player2),
-                    'is_bot': player2_is_bot
-                },
-                'is_completed': match.is_completed,
-                'player1_score': match.player1_score,
-                'player2_score': match.player2_score,
-                'winner': match.winner.username if match.winner else None,
-                'played_at': match.played_at.strftime('%Y-%m-%d %H:%M') if match.played_at else None,
-                'can_play': can_play
-            }
-            matches.append(match_data)
-        
-        print(f"\nPréparation de la réponse:")
-        response_data = {
-            'tournament': {
-                'id': tournament.id,
-                'name': tournament.name,
-                'creator': {
-                    'username': tournament.creator.username,
-                    'profile_photo': get_profile_photo_url(tournament.creator)
-                },
-                'start_date': tournament.start_date.strftime('%Y-%m-%d %H:%M'),
-                'max_participants': tournament.max_participants,
-                'is_active': tournament.is_active,
-                'is_completed': tournament.is_completed,
-                'winner': tournament.winner.username if tournament.winner else None,
-                'current_round': tournament.current_round,
-                'is_registration_open': tournament.is_registration_open(),
-                'am_i_participant': tournament.participants.filter(user=request.user).exists(),
-                'am_i_creator': tournament.creator == request.user
-            },
-            'participants': participants,
-            'matches': matches
-        }
-        
-        print(f"\n=== FIN TOURNAMENT_DETAIL ===")
-        return JsonResponse(response_data)
-        
-    except Tournament.DoesNotExist:
-        print(f"\nERREUR: Tournoi non trouvé (ID: {tournament_id})")
-        return JsonResponse({'status': 'error', 'message': 'Tournoi non trouvé'}, status=404)
-    except Exception as e:
-        print(f"\nERREUR CRITIQUE dans tournament_detail:")
-        print(f"Type d'erreur: {type(e).__name__}")
-        print(f"Message d'erreur: {str(e)}")
-        import traceback
-        print("Traceback complet:")
-        print(traceback.format_exc())
-        return JsonResponse({'error': str(e)}, status=500)
+    """Détails d'un tournoi spécifique : instantané mis en cache (chat/tournaments.py), 304 si inchangé"""
+    current = tournaments.version(tournament_id)
+    etag = tournaments.etag(tournament_id, current, request.user.id)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        # La version seule ne prouve pas que le tournoi existe (clé recréée à la demande)
+        if not tournaments.exists(tournament_id, current):
+            return JsonResponse({'status': 'error', 'message': 'Tournoi non trouvé'}, status=404)
+        response = HttpResponseNotModified()
+    else:
+        try:
+            cached = tournaments.snapshot(tournament_id, current)
+        except Tournament.DoesNotExist:
+            return JsonResponse({'status': 'error', 'message': 'Tournoi non trouvé'}, status=404)
+        # La version permet au client de repérer une différence manquée sur tournament_<id>
+        response = JsonResponse({**tournaments.for_user(cached, request.user.id), 'version': current})
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 @login_required
 def join_tournament(request, tournament_id):
@@ -1465,12 +1430,6 @@ def join_tournament(request, tournament_id):
         
     try:
         tournament = Tournament.objects.get(id=tournament_id)
-        
-        if tournament.participants.filter(user=request.user).exists():
-            return JsonResponse({'status': 'error', 'message': 'Vous participez déjà à ce tournoi'}, status=400)
-            
-        if not tournament.is_registration_open():
-            return JsonResponse({'status': 'error', 'message': 'Les inscriptions pour ce tournoi sont fermées'}, status=400)
 
         # Récupérer l'alias depuis le corps de la requête
         data = json.loads(request.body)
@@ -1480,22 +1439,24 @@ def join_tournament(request, tournament_id):
         if not alias:
             return JsonResponse({'status': 'error', 'message': 'Un alias est obligatoire pour participer au tournoi'}, status=400)
         
-        # Vérifier si l'alias existe déjà dans ce tournoi
-        if alias and tournament.participants.filter(alias=alias).exists():
+        # Vérifier si l'alias existe déjà dans ce tournoi (un nouvel essai du même joueur est accepté)
+        if tournament.participants.filter(alias=alias).exclude(user=request.user).exists():
             return JsonResponse({'status': 'error', 'message': 'Cet alias est déjà utilisé dans ce tournoi'}, status=400)
 
-        TournamentParticipant.objects.create(
-            tournament=tournament,
-            user=request.user,
-            alias=alias  # Utiliser None si l'alias est vide
-        )
+        # Place prise atomiquement sur le compteur du tournoi ; rejoindre deux fois ne prend qu'une place
+        participant, created = Tournament.join(tournament.id, request.user, alias)
+        if participant is None:
+            return JsonResponse({'status': 'error', 'message': 'Les inscriptions pour ce tournoi sont fermées'}, status=400)
         
-        # Notification au créateur du tournoi
-        Notification.objects.create(
-            user=tournament.creator,
-            message=f"{request.user.username} a rejoint votre tournoi '{tournament.name}'",
-            type="info"
-        )
+        if created:
+            tournaments.bump(tournament.id)
+            
+            # Notification au créateur du tournoi
+            Notification.objects.create(
+                user_id=tournament.creator_id,
+                message=f"{request.user.username} a rejoint votre tournoi '{tournament.name}'",
+                type="info"
+            )
         
         return JsonResponse({
             'status': 'success', 
@@ -1516,11 +1477,11 @@ def leave_tournament(request, tournament_id):
         
         if not tournament.participants.filter(user=request.user).exists():
             return JsonResponse({'status': 'error', 'message': 'Vous ne participez pas à ce tournoi'}, status=400)
-            
-        if TournamentMatch.objects.filter(tournament=tournament).exists():
-            return JsonResponse({'status': 'error', 'message': 'Vous ne pouvez pas quitter un tournoi qui a déjà commencé'}, status=400)
         
-        tournament.participants.filter(user=request.user).delete()
+        # Place rendue au compteur, sauf si le tournoi a commencé entre-temps
+        if not tournament.leave(request.user):
+            return JsonResponse({'status': 'error', 'message': 'Vous ne pouvez pas quitter un tournoi qui a déjà commencé'}, status=400)
+        tournaments.bump(tournament.id)
         
         return JsonResponse({'status': 'success', 'message': f'Vous avez quitté le tournoi {tournament.name}'})
     
@@ -1543,229 +1504,26 @@ def start_tournament(request, tournament_id):
             return JsonResponse({'status': 'error', 'message': 'Seul le créateur du tournoi peut le démarrer'}, status=403)
         
         # Vérifier le nombre minimum de participants
-        participants_count = tournament.participants.count()
-        if participants_count < 2:
+        if tournament.seats_taken < 2:
             return JsonResponse({'status': 'error', 'message': 'Il faut au moins 2 participants pour démarrer un tournoi'}, status=400)
         
-        # Si le nombre de participants est inférieur au maximum, ajouter des bots
-        if participants_count < tournament.max_participants:
-            # Créer des utilisateurs bots
-            bots_needed = tournament.max_participants - participants_count
-            create_tournament_bots(tournament, bots_needed)
-        
-        # Générer les matchs du premier tour
-        generate_tournament_matches(tournament)
-        
-        # Jouer automatiquement les matchs entre bots
-        play_bot_matches(tournament)
+        if TournamentMatch.objects.filter(tournament=tournament).exists():
+            return JsonResponse({'status': 'error', 'message': 'Ce tournoi a déjà commencé'}, status=400)
         
-        # Mettre à jour le statut du tournoi
-        tournament.current_round = 1
-        tournament.save()
+        # Les bots complètent les places libres et le premier tour est généré par le worker (chat/scheduler.py)
+        scheduler.enqueue(tournament.id, scheduler.START)
         
         return JsonResponse({
             'status': 'success', 
-            'message': 'Tournoi démarré avec succès',
+            'message': 'Le tournoi démarre, le tableau va apparaître dans quelques instants',
             'tournament_id': tournament_id
-        })
+        }, status=202)
     
     except Tournament.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'Tournoi non trouvé'}, status=404)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
-def create_tournament_bots(tournament, count):
-    """Crée le nombre spécifié de bots pour un tournoi"""
-    for i in range(count):
-        bot_name = f"Bot_{i+1}_{tournament.id}"
-        
-        # Vérifier si un utilisateur avec ce nom existe déjà
-        try:
-            bot_user = User.objects.get(username=bot_name)
-        except User.DoesNotExist:
-            # Créer un nouvel utilisateur bot
-            bot_user = User.objects.create_user(
-                username=bot_name,
-                password=get_random_string(12),
-                email=f"bot{i+1}_{tournament.id}@example.com",
-                first_name="Bot",
-                last_name=f"Player {i+1}"
-            )
-            bot_user.is_bot = True
-            bot_user.save()
-        
-        # Ajouter le bot comme participant au tournoi
-        participant, created = TournamentParticipant.objects.get_or_create(
-            tournament=tournament,
-            user=bot_user,
-            defaults={'is_bot': True}
-        )
-        
-        if created:
-            print(f"Bot {bot_name} ajouté au tournoi {tournament.id}")
-
-def generate_tournament_matches(tournament):
-    """Génère les matchs du premier tour d'un tournoi"""
-    # Récupérer tous les participants
-    participants = list(tournament.participants.all())
-    
-    # Mélanger la liste des participants
-    random.shuffle(participants)
-    
-    # Créer les matchs du premier tour
-    for i in range(0, len(participants), 2):
-        if i + 1 < len(participants):
-            TournamentMatch.objects.create(
-                tournament=tournament,
-                player1=participants[i].user,
-                player2=participants[i+1].user,
-                round=1
-            )
-
-def play_bot_matches(tournament):
-    """Joue automatiquement les matchs entre bots et marque les matchs humain-bot comme jouables"""
-    # Récupérer tous les matchs non terminés du tournoi
-    matches = TournamentMatch.objects.filter(tournament=tournament, is_completed=False)
-    
-    for match in matches:
-        try:
-            # Vérifier si les joueurs sont des bots
-            player1_participant = TournamentParticipant.objects.get(tournament=tournament, user=match.player1)
-            player2_participant = TournamentParticipant.objects.get(tournament=tournament, user=match.player2)
-            
-            player1_is_bot = player1_participant.is_bot
-            player2_is_bot = player2_participant.is_bot
-            
-            # Si les deux joueurs sont des bots, jouer le match automatiquement
-            if player1_is_bot and player2_is_bot:
-                # Choix d'un gagnant aléatoire
-                winner_bot = random.choice([match.player1, match.player2])
-                loser_bot = match.player2 if winner_bot == match.player1 else match.player1
-                
-                # Le gagnant a toujours 3 points, le perdant un score aléatoire entre 0 et 2
-                if winner_bot == match.player1:
-                    player1_score = 3
-                    player2_score = random.randint(0, 2)
-                else:
-                    player1_score = random.randint(0, 2)
-                    player2_score = 3
-                
-                # Mettre à jour le match
-                match.player1_score = player1_score
-                match.player2_score = player2_score
-                match.is_completed = True
-                match.played_at = timezone.now()
-                match.winner = winner_bot
-                match.save()
-                
-                print(f"Match bot vs bot {match.id}: {match.player1.username} ({player1_score}) vs {match.player2.username} ({player2_score})")
-        except TournamentParticipant.DoesNotExist as e:
-            print(f"Erreur: Participant introuvable - {e}")
-            continue
-    
-    # Vérifier si le tour actuel est terminé et avancer le tournoi si nécessaire
-    check_round_completion(tournament)
-
-def check_round_completion(tournament):
-    """Vérifie si un tour est terminé et passe au suivant si c'est le cas"""
-    current_round = tournament.current_round
-    matches = TournamentMatch.objects.filter(tournament=tournament, round=current_round)
-    
-    # Si tous les matchs du tour actuel sont terminés
-    if matches.filter(is_completed=True).count() == matches.count():
-        winners = [match.winner for match in matches]
-        
-        if len(winners) >= 2:
-            # Créer le prochain tour
-            next_round = current_round + 1
-            tournament.current_round = next_round
-            tournament.save()
-            
-            # Mélanger les gagnants pour éviter les même face-à-face
-            random.shuffle(winners)
-            
-            # Créer les matchs du prochain tour
-            for i in range(0, len(winners), 2):
-                if i + 1 < len(winners):
-                    match = TournamentMatch.objects.create(
-                        tournament=tournament,
-                        player1=winners[i],
-                        player2=winners[i+1],
-                        round=next_round
-                    )
-                    
-                    # Vérifier si ce match est entre bots
-                    player1_is_bot = TournamentParticipant.objects.get(tournament=tournament, user=match.player1).is_bot
-                    player2_is_bot = TournamentParticipant.objects.get(tournament=tournament, user=match.player2).is_bot
-                    
-                    if player1_is_bot and player2_is_bot:
-                        # Choix d'un gagnant aléatoire
-                        winner_bot = random.choice([match.player1, match.player2])
-                        
-                        # Le gagnant a toujours 3 points, le perdant un score aléatoire entre 0 et 2
-                        if winner_bot == match.player1:
-                            player1_score = 3
-                            player2_score = random.randint(0, 2)
-                        else:
-                            player1_score = random.randint(0, 2)
-                            player2_score = 3
-                        
-                        match.player1_score = player1_score
-                        match.player2_score = player2_score
-                        match.is_completed = True
-                        match.played_at = timezone.now()
-                        match.winner = winner_bot
-                        match.save()
-                        
-                        # Vérifier à nouveau si ce tour est terminé
-                        check_round_completion(tournament)
-        else:
-            # S'il n'y a qu'un seul gagnant, le tournoi est terminé
-            tournament.is_completed = True
-            tournament.winner = winners[0] if winners else None
-            tournament.save()
-            
-            # Créer une notification pour le gagnant
-            if tournament.winner:
-                Notification.objects.create(
-                    user=tournament.winner,
-                    message=f"Félicitations ! Vous avez remporté le tournoi '{tournament.name}'",
-                    type="success"
-                )
-            # delete_tournament_bots(tournament)
-
-def delete_tournament_bots(tournament):
-    """Supprime tous les bots qui ont participé à un tournoi"""
-    # Identifier tous les bots utilisés dans ce tournoi
-    bot_participants = TournamentParticipant.objects.filter(tournament=tournament, is_bot=True)
-    
-    for bot_participant in bot_participants:
-        bot_user = bot_participant.user
-        
-        # Vérifier si le bot n'est pas utilisé dans d'autres tournois actifs
-        other_participations = TournamentParticipant.objects.filter(
-            user=bot_user,
-            tournament__is_completed=False
-        ).exclude(tournament=tournament).count()
-        
-        if other_participations == 0:
-            try:
-                # Supprimer le bot s'il n'est pas utilisé ailleurs
-                print(f"Suppression du bot {bot_user.username} du tournoi {tournament.id}")
-                
-                # Supprimer d'abord toutes les participations
-                TournamentParticipant.objects.filter(user=bot_user).delete()
-                
-                # Supprimer tous les matchs liés à ce bot
-                # Note: Cette étape est optionnelle car les matchs restent importants pour l'historique
-                # TournamentMatch.objects.filter(Q(player1=bot_user) | Q(player2=bot_user)).delete()
-                
-                # Supprimer le bot lui-même
-                bot_user.delete()
-                
-            except Exception as e:
-                print(f"Erreur lors de la suppression du bot {bot_user.username}: {str(e)}")
-
 @login_required
 def play_tournament_match(request, match_id):
     """API pour commencer un match de tournoi"""
@@ -1837,81 +1595,35 @@ def save_tournament_match_result(request):
         player1_score = data.get('player1_score')
         player2_score = data.get('player2_score')
         vs_bot = data.get('vs_bot', False)
-        print(f"Valeur de vs_bot: {vs_bot}")
         
         # IMPORTANT: Utiliser le gagnant fourni par le frontend
         # au lieu de le recalculer côté serveur
         winner_name = data.get('winner')
-        print(f"WINNER = {winner_name}")
         
-        match = TournamentMatch.objects.get(id=match_id)
+        match = TournamentMatch.objects.select_related('tournament', 'player1', 'player2').get(id=match_id)
         tournament = match.tournament
         
-        # Si match vs bot, trouver le bon utilisateur (humain ou bot)
+        # Si match vs bot, le gagnant est celui indiqué par le frontend (humain ou bot)
         if vs_bot:
-            print(f"Match vs bot - Gagnant indiqué: {winner_name}")
-            
-            # Utiliser le nom du gagnant pour déterminer l'utilisateur correspondant
-            if winner_name == data.get('bot_name'):
-                # Le bot a gagné
-                # Trouver l'utilisateur correspondant au bot
-                bot_user = User.objects.get(username=winner_name)
-                match.winner = bot_user
-                print(f"Bot gagnant: {bot_user.username}")
-            else:
-                # L'humain a gagné
-                human_user = User.objects.get(username=winner_name)
-                match.winner = human_user
-                print(f"Humain gagnant: {human_user.username}")
+            players = {match.player1.username: match.player1_id, match.player2.username: match.player2_id}
+            if winner_name not in players:
+                return JsonResponse({'status': 'error', 'message': 'Le gagnant doit être un joueur du match'}, status=400)
+            winner_id = players[winner_name]
         else:
             # Match normal, déterminer le gagnant par les scores
-            if player1_score > player2_score:
-                match.winner = match.player1
-            else:
-                match.winner = match.player2
-        
-        # Mettre à jour le match
-        print(f"Player 1 Score: {match.player1_score}")
-        print(f"Player 2 Score: {match.player2_score}")
-        match.player1_score = player1_score
-        match.player2_score = player2_score
-        match.is_completed = True
-        match.played_at = timezone.now()
+            winner_id = None
         
-        # if player1_score > player2_score:
-        #         match.winner = match.player1
-        # else:
-        #         match.winner = match.player2
-
-        print(f"Match ID: {match.id}")
-        print(f"Tournament ID: {match.tournament_id}")
-        print(f"Player 1 ID: {match.player1_id}")
-        print(f"Player 2 ID: {match.player2_id}")
-        print(f"Winner ID: {match.winner_id}")
-        print(f"Is Completed: {match.is_completed}")
-        print(f"Round: {match.round}")
-        print(f"Created At: {match.created_at}")
-        print(f"Played At: {match.played_at}")
-        match.save()
-
-        print(f"Match ID: {match.id}")
-        print(f"Tournament ID: {match.tournament_id}")
-        print(f"Player 1 ID: {match.player1_id}")
-        print(f"Player 2 ID: {match.player2_id}")
-        print(f"Player 1 Score: {match.player1_score}")
-        print(f"Player 2 Score: {match.player2_score}")
-        print(f"Winner ID: {match.winner_id}")
-        print(f"Is Completed: {match.is_completed}")
-        print(f"Round: {match.round}")
-        print(f"Created At: {match.created_at}")
-        print(f"Played At: {match.played_at}")
+        # Enregistrer le résultat ; le passage au tour suivant est confié au worker (chat/bracket.py)
+        result = bracket.record_result(match, player1_score, player2_score, winner_id)
         
         # Ajouter le match à l'historique des joueurs humains
         duration = data.get('duration', 60)  # Durée par défaut de 60 secondes si non fournie
+        # Difficulté moyenne par défaut, y compris contre un bot (le jeu solo est lancé en 'md')
+        difficulty = "md"
         
         # Pour match.player1 (s'il n'est pas un bot)
-        if not TournamentParticipant.objects.filter(tournament=tournament, user=match.player1, is_bot=True).exists():
-            is_winner = match.winner == match.player1
+        if not result.is_bot(match.player1_id):
+            is_winner = match.winner_id == match.player1_id
             is_perfect = is_winner and match.player2_score == 0
             
             GameStatistics.objects.create(
@@ -1919,7 +1631,7 @@ def save_tournament_match_result(request):
                 opponent=match.player2.username,
                 player_score=match.player1_score,
                 computer_score=match.player2_score,
-                difficulty="md",  # Difficulté moyenne par défaut
+                difficulty=difficulty,
                 duration=duration,
                 is_perfect_game=is_perfect,
                 is_multiplayer=not vs_bot,
@@ -1930,8 +1642,8 @@ def save_tournament_match_result(request):
             )
         
         # Pour match.player2 (s'il n'est pas un bot)
-        if not TournamentParticipant.objects.filter(tournament=tournament, user=match.player2, is_bot=True).exists():
-            is_winner = match.winner == match.player2
+        if not result.is_bot(match.player2_id):
+            is_winner = match.winner_id == match.player2_id
             is_perfect = is_winner and match.player1_score == 0
             
             GameStatistics.objects.create(
@@ -1939,7 +1651,7 @@ def save_tournament_match_result(request):
                 opponent=match.player1.username,
                 player_score=match.player2_score,
                 computer_score=match.player1_score,
-                difficulty="md",  # Difficulté moyenne par défaut
+                difficulty=difficulty,
                 duration=duration,
                 is_perfect_game=is_perfect,
                 is_multiplayer=not vs_bot,
@@ -1949,9 +1661,6 @@ def save_tournament_match_result(request):
                 tournament_round=match.round
             )
         
-        # Vérifier si le tour est terminé
-        check_round_completion(tournament)
-        
         return JsonResponse({
             'status': 'success',
             'message': 'Résultat du match enregistré',
@@ -1961,5 +1670,7 @@ def save_tournament_match_result(request):
         
     except TournamentMatch.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'Match non trouvé'}, status=404)
+    except bracket.BracketError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
\ No newline at end of file
@@ -0,0 +1,52 @@
+# chat/blocking.py
+from django.core.cache import cache
+
+# Une entrée par utilisateur : ceux qu'il bloque et ceux qui le bloquent.
+# Invalidée par le signal m2m_changed de UserProfile.blocked_users (voir chat/models.py).
+CACHE_KEY = 'chat:blocks:{}'
+CACHE_TIMEOUT = 60 * 60
+
+
+def _load(user_id):
+    from chat.models import UserProfile
+
+    through = UserProfile.blocked_users.through
+    blocking = through.objects.filter(userprofile__user_id=user_id).values_list('user_id', flat=True)
+    blocked_by = through.objects.filter(user_id=user_id).values_list('userprofile__user_id', flat=True)
+    return {'blocking': frozenset(blocking), 'blocked_by': frozenset(blocked_by)}
+
+
+def _entry(user_id):
+    key = CACHE_KEY.format(user_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _load(user_id)
+        cache.set(key, entry, CACHE_TIMEOUT)
+    return entry
+
+
+def blocking_ids(user_id):
+    """Utilisateurs bloqués par user_id"""
+    return _entry(user_id)['blocking']
+
+
+def blocked_by_ids(user_id):
+    """Utilisateurs qui ont bloqué user_id"""
+    return _entry(user_id)['blocked_by']
+
+
+def blocked_ids(user_id):
+    """Utilisateurs avec qui user_id ne peut pas échanger, dans un sens comme dans l'autre"""
+    entry = _entry(user_id)
+    return entry['blocking'] | entry['blocked_by']
+
+
+def is_blocked(user_id, other_id):
+    """Vrai si l'un des deux utilisateurs a bloqué l'autre"""
+    entry = _entry(user_id)
+    other_id = int(other_id)
+    return other_id in entry['blocking'] or other_id in entry['blocked_by']
+
+
+def invalidate(*user_ids):
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,83 @@
+# chat/bots.py
+from django.db import transaction
+
+# Réserve de comptes bots partagée entre les tournois (Bot_1, Bot_2, ...).
+# Les comptes sont créés une seule fois, par bulk_create, avec un mot de passe inutilisable :
+# ni hachage PBKDF2, ni signaux post_save (les profils sont insérés en bloc avec eux).
+# Un tournoi prend les N premiers bots de la réserve ; un même bot peut jouer dans plusieurs
+# tournois à la fois, ses matchs étant joués automatiquement ou contre un humain.
+# Les bots sont reconnus à User.is_bot (index partiel user_bot_pool), pas à leur nom (qu'un joueur a pu choisir).
+EMAIL_DOMAIN = 'bots.transcendance.local'
+USERNAME = 'Bot_{}'
+
+
+def pool(count):
+    """Les `count` premiers comptes bots de la réserve"""
+    from accounts.models import User
+
+    return list(User.objects.filter(is_bot=True).order_by('id')[:count])
+
+
+def grow(count):
+    """Crée les comptes bots manquants pour que la réserve en compte au moins `count`"""
+    from accounts.models import Profile, User
+    from chat.models import UserProfile
+
+    existing = User.objects.filter(is_bot=True).count()
+    if existing >= count:
+        return
+
+    # Les noms déjà pris (par un joueur qui s'appelle Bot_3, par exemple) sont sautés
+    bots = []
+    number = existing
+    while len(bots) < count - existing:
+        candidates = {USERNAME.format(n): n for n in range(number + 1, number + 1 + count - existing - len(bots))}
+        number += len(candidates)
+        taken = set(User.objects.filter(username__in=candidates).values_list('username', flat=True))
+        for username, n in candidates.items():
+            if username in taken:
+                continue
+            bot = User(
+                username=username,
+                email=f'bot{n}@{EMAIL_DOMAIN}',
+                first_name="Bot",
+                last_name=f"Player {n}",
+                is_bot=True
+            )
+            bot.set_unusable_password()
+            bots.append(bot)
+
+    with transaction.atomic():
+        # Un démarrage concurrent a pu créer les mêmes comptes entre-temps
+        User.objects.bulk_create(bots, ignore_conflicts=True)
+        created = list(User.objects.filter(email__in=[bot.email for bot in bots]).values_list('id', flat=True))
+        Profile.objects.bulk_create([Profile(user_id=user_id) for user_id in created], ignore_conflicts=True)
+        UserProfile.objects.bulk_create([UserProfile(user_id=user_id) for user_id in created], ignore_conflicts=True)
+
+
+def allocate(tournament):
+    """
+    Complète le tournoi avec des bots de la réserve, en une insertion.
+    Le nombre de places libres est lu sous verrou de la ligne du tournoi, qu'une inscription
+    concurrente (Tournament.join) attend : les bots ne peuvent pas dépasser max_participants.
+    """
+    from chat.models import Tournament, TournamentParticipant
+
+    with transaction.atomic():
+        locked = Tournament.objects.select_for_update().get(pk=tournament.pk)
+        count = locked.max_participants - locked.seats_taken
+        if count <= 0:
+            return []
+        bots = pool(count)
+        if len(bots) < count:
+            grow(count)
+            bots = pool(count)
+
+        TournamentParticipant.objects.bulk_create(
+            [TournamentParticipant(tournament=locked, user=bot, is_bot=True) for bot in bots],
+            ignore_conflicts=True
+        )
+        locked.seats_taken = locked.participants.count()
+        locked.save(update_fields=['seats_taken'])
+    tournament.seats_taken = locked.seats_taken
+    return bots
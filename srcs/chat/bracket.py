@@ -0,0 +1,440 @@
+# chat/bracket.py
+import random
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from chat import presence, simulation, tournaments
+
+# Moteur des tableaux de tournoi : élimination directe ou système suisse (Tournament.system).
+# L'état (bots du tournoi, matchs du tour courant) est chargé une seule fois, sous verrou de la ligne
+# du tournoi : les résultats, les matchs bot contre bot et le passage aux tours suivants sont calculés
+# en mémoire, puis enregistrés en une transaction (bulk_update des matchs modifiés, bulk_create des
+# nouveaux, une mise à jour du tournoi). Un match bot contre bot créé pendant l'avancement est joué
+# avant d'être inséré : il n'y a ni requête par match ni récursion.
+#
+# Le nombre de joueurs est quelconque. En élimination directe, les joueurs en surnombre par rapport
+# à une puissance de 2 sont exemptés du tour et passent directement au suivant. Une exemption n'est
+# pas un match : les joueurs encore en lice sont les inscrits moins les perdants, bilan lu en une
+# requête au premier passage de tour puis tenu à jour en mémoire.
+# En système suisse, chaque ronde apparie des joueurs de même score en évitant les revanches ; un
+# nombre impair exempte un joueur (qui marque le point). Après swiss_rounds rondes, le meilleur score
+# l'emporte, départagé par le Buchholz (somme des scores des adversaires).
+# Un tournoi de 1024 joueurs se génère et se joue en quelques requêtes
+# (voir la commande tournament_benchmark).
+#
+# Les requêtes HTTP ne font qu'enregistrer un résultat : le démarrage et le passage au tour suivant
+# sont exécutés par le worker (chat/scheduler.py), qui déclare aussi forfait les matchs avec un humain
+# restés sans résultat après leur heure limite (TOURNAMENT_MATCH_TIMEOUT).
+MATCH_FIELDS = ['player1_score', 'player2_score', 'winner', 'is_completed', 'played_at']
+TOURNAMENT_FIELDS = ['current_round', 'is_completed', 'winner', 'end_date', 'swiss_rounds']
+BOT_WINNING_SCORE = simulation.WINNING_SCORE
+BATCH_SIZE = 1000
+
+
+def exempt(player_ids):
+    """Retire les exemptés (en tête de liste) pour que le tour suivant compte une puissance de 2 joueurs"""
+    byes = (1 << (len(player_ids) - 1).bit_length()) - len(player_ids)
+    return player_ids[byes:]
+
+
+def swiss_rounds(player_count):
+    """Rondes nécessaires pour départager les joueurs : log2 arrondi au-dessus"""
+    return max(1, (player_count - 1).bit_length())
+
+
+class BracketError(Exception):
+    """Opération refusée sur le tableau (match déjà terminé, gagnant invalide...)"""
+
+
+class Bracket:
+    def __init__(self, tournament):
+        from chat.models import TournamentMatch
+
+        self.tournament = tournament
+        self.bots = set(tournament.participants.filter(is_bot=True).values_list('user_id', flat=True))
+        self.round_matches = list(
+            TournamentMatch.objects.filter(tournament=tournament, round=tournament.current_round).order_by('id')
+        )
+        self.updated = {}
+        self.created = []
+        self.now = timezone.now()
+        # Bilan des tours terminés, chargé au premier passage de tour (voir load_standings)
+        self.players = None
+        self.notifications = []
+
+    @property
+    def is_swiss(self):
+        return self.tournament.system == self.tournament.SWISS
+
+    def is_bot(self, user_id):
+        return user_id in self.bots
+
+    def _finish(self, match, player1_score, player2_score, winner_id):
+        match.player1_score = player1_score
+        match.player2_score = player2_score
+        match.winner_id = winner_id
+        match.is_completed = True
+        match.played_at = self.now
+        if match.pk is not None:
+            self.updated[match.pk] = match
+
+    def record(self, match, player1_score, player2_score, winner_id=None):
+        """Enregistre le résultat d'un match du tour courant ; sans winner_id, le meilleur score l'emporte"""
+        current = next((item for item in self.round_matches if item.pk == match.pk), None)
+        if current is None or current.is_completed:
+            raise BracketError('Ce match est déjà terminé')
+        if winner_id is None:
+            winner_id = match.player1_id if player1_score > player2_score else match.player2_id
+        elif winner_id not in (match.player1_id, match.player2_id):
+            raise BracketError('Le gagnant doit être un joueur du match')
+
+        self.round_matches[self.round_matches.index(current)] = match
+        self._finish(match, player1_score, player2_score, winner_id)
+
+    def play_bots(self, matches):
+        """
+        Joue ensemble tous les matchs bot contre bot de la liste : simulation des IA de pong.js
+        (chat/simulation.py), chaque bot à sa difficulté
+        """
+        pending = [
+            match for match in matches
+            if not match.is_completed and self.is_bot(match.player1_id) and self.is_bot(match.player2_id)
+        ]
+        if not pending:
+            return
+
+        def level(user_id):
+            return simulation.DIFFICULTIES[simulation.difficulty(user_id)]
+
+        scores1, scores2 = simulation.simulate(
+            [level(match.player1_id) for match in pending],
+            [level(match.player2_id) for match in pending]
+        )
+        for match, player1_score, player2_score in zip(pending, scores1.tolist(), scores2.tolist()):
+            winner_id = match.player1_id if player1_score > player2_score else match.player2_id
+            self._finish(match, player1_score, player2_score, winner_id)
+
+    def pair(self, player_ids, round_number):
+        """Apparie les joueurs deux à deux, dans l'ordre de la liste ; un match avec un humain a une heure limite"""
+        from chat.models import TournamentMatch
+
+        deadline = self.now + timedelta(seconds=settings.TOURNAMENT_MATCH_TIMEOUT)
+        return [
+            TournamentMatch(
+                tournament=self.tournament,
+                player1_id=player_ids[i],
+                player2_id=player_ids[i + 1],
+                round=round_number,
+                deadline=None if self.is_bot(player_ids[i]) and self.is_bot(player_ids[i + 1]) else deadline
+            )
+            for i in range(0, len(player_ids) - 1, 2)
+        ]
+
+    def forfeit_expired(self):
+        """
+        Déclare forfait les matchs du tour courant dont l'heure limite est passée.
+        Contre un bot, l'humain perd toujours : il n'a pas joué son match, connecté ou non.
+        Entre humains, le joueur connecté l'emporte, et le gagnant est tiré au sort si les deux
+        (ou aucun) le sont. Retourne le nombre de forfaits.
+        """
+        expired = [
+            match for match in self.round_matches
+            if not match.is_completed and match.deadline is not None and match.deadline <= self.now
+        ]
+        # La présence ne départage que les matchs entre humains
+        humans = {
+            user_id for match in expired
+            if not self.is_bot(match.player1_id) and not self.is_bot(match.player2_id)
+            for user_id in (match.player1_id, match.player2_id)
+        }
+        online = presence.get_presence(humans) if humans else {}
+
+        for match in expired:
+            players = (match.player1_id, match.player2_id)
+            bot_ids = [user_id for user_id in players if self.is_bot(user_id)]
+            present = bot_ids or [user_id for user_id in players if online.get(user_id)]
+            winner_id = present[0] if len(present) == 1 else random.choice(players)
+            loser_id = match.player2_id if winner_id == match.player1_id else match.player1_id
+            if winner_id == match.player1_id:
+                self._finish(match, BOT_WINNING_SCORE, 0, winner_id)
+            else:
+                self._finish(match, 0, BOT_WINNING_SCORE, winner_id)
+
+            name = self.tournament.name
+            self.notify(loser_id, f"Match du tour {match.round} du tournoi '{name}' perdu par forfait (délai dépassé)", 'warning')
+            self.notify(winner_id, f"Victoire par forfait au tour {match.round} du tournoi '{name}'", 'success')
+        return len(expired)
+
+    def notify(self, user_id, message, type='info'):
+        """Notification enregistrée avec le tableau (jamais pour un bot)"""
+        from accounts.models import Notification
+
+        if user_id and not self.is_bot(user_id):
+            self.notifications.append(Notification(user_id=user_id, message=message, type=type))
+
+    def start_standings(self, player_ids):
+        self.players = list(player_ids)
+        self.alive = set(self.players)
+        self.points = dict.fromkeys(self.players, 0)
+        self.opponents = {user_id: set() for user_id in self.players}
+        self.exempted = set()
+
+    def load_standings(self):
+        """Inscrits et résultats des tours précédents, lus une seule fois"""
+        from chat.models import TournamentMatch
+
+        if self.players is not None:
+            return
+        tournament = self.tournament
+        self.start_standings(tournament.participants.order_by('id').values_list('user_id', flat=True))
+        rounds = defaultdict(list)
+        history = TournamentMatch.objects.filter(
+            tournament=tournament, round__lt=tournament.current_round, is_completed=True
+        ).values_list('round', 'player1_id', 'player2_id', 'winner_id')
+        for round_number, player1_id, player2_id, winner_id in history:
+            rounds[round_number].append((player1_id, player2_id, winner_id))
+        for round_number in range(1, tournament.current_round):
+            self.count_round(rounds[round_number])
+
+    def count_round(self, results):
+        """Reporte un tour terminé : perdants éliminés, points et adversaires, exemptés du système suisse"""
+        present = set()
+        for player1_id, player2_id, winner_id in results:
+            present.update((player1_id, player2_id))
+            self.alive.discard(player2_id if winner_id == player1_id else player1_id)
+            self.points[winner_id] = self.points.get(winner_id, 0) + 1
+            self.opponents.setdefault(player1_id, set()).add(player2_id)
+            self.opponents.setdefault(player2_id, set()).add(player1_id)
+        if self.is_swiss:
+            for user_id in self.players:
+                if user_id not in present:
+                    self.points[user_id] += 1
+                    self.exempted.add(user_id)
+
+    def knockout_order(self):
+        """Joueurs en lice tirés au sort, exemptés retirés ; une liste vide si le tableau est joué"""
+        alive = [user_id for user_id in self.players if user_id in self.alive]
+        if len(alive) < 2:
+            return []
+        # Mélanger les joueurs pour éviter les mêmes face-à-face
+        random.shuffle(alive)
+        return exempt(alive)
+
+    def swiss_order(self):
+        """
+        Classement par score (ordre aléatoire à égalité), puis chaque joueur affronte le suivant
+        qu'il n'a pas encore rencontré. Avec un nombre impair, le moins bien classé des joueurs
+        jamais exemptés est exempté.
+        """
+        tiebreak = {user_id: random.random() for user_id in self.players}
+        ranking = sorted(self.players, key=lambda user_id: (-self.points[user_id], tiebreak[user_id]))
+        if len(ranking) % 2:
+            bye = next((user_id for user_id in reversed(ranking) if user_id not in self.exempted), ranking[-1])
+            ranking.remove(bye)
+
+        order = []
+        paired = set()
+        for index, user_id in enumerate(ranking):
+            if user_id in paired:
+                continue
+            opponent = fallback = None
+            for candidate in islice(ranking, index + 1, None):
+                if candidate in paired:
+                    continue
+                if fallback is None:
+                    fallback = candidate
+                if candidate not in self.opponents[user_id]:
+                    opponent = candidate
+                    break
+            paired.update((user_id, opponent or fallback))
+            if opponent is None:
+                # Il ne reste que des revanches : échange avec une paire déjà formée si cela les évite
+                opponent = fallback
+                for i in range(len(order) - 2, -1, -2):
+                    first, second = order[i], order[i + 1]
+                    if first not in self.opponents[user_id] and second not in self.opponents[opponent]:
+                        order[i + 1], user_id = user_id, second
+                        break
+                    if first not in self.opponents[opponent] and second not in self.opponents[user_id]:
+                        order[i + 1], opponent = opponent, second
+                        break
+            order.extend((user_id, opponent))
+        return order
+
+    def leader(self):
+        """Vainqueur du système suisse : meilleur score, puis meilleur Buchholz"""
+        return max(self.players, key=lambda user_id: (
+            self.points[user_id],
+            sum(self.points.get(opponent, 0) for opponent in self.opponents[user_id])
+        ))
+
+    def seed(self, player_ids):
+        """Premier tour : les joueurs sont tirés au sort, les exemptés passent directement au tour suivant"""
+        tournament = self.tournament
+        self.start_standings(player_ids)
+        tournament.current_round = 1
+        if self.is_swiss:
+            tournament.swiss_rounds = tournament.swiss_rounds or swiss_rounds(len(self.players))
+            order = self.swiss_order()
+        else:
+            order = list(self.players)
+            random.shuffle(order)
+            order = exempt(order)
+        self.round_matches = self.pair(order, 1)
+        self.created.extend(self.round_matches)
+
+    def resolve(self):
+        """
+        Joue les matchs entre bots puis avance tant que le tour courant est terminé.
+        Retourne True si le tableau a changé (tour suivant créé ou tournoi terminé).
+        """
+        tournament = self.tournament
+        advanced = False
+        while self.round_matches and not tournament.is_completed:
+            self.play_bots(self.round_matches)
+            if not all(match.is_completed for match in self.round_matches):
+                break
+
+            self.load_standings()
+            self.count_round([(match.player1_id, match.player2_id, match.winner_id) for match in self.round_matches])
+            advanced = True
+            if self.is_swiss:
+                order = self.swiss_order() if tournament.current_round < tournament.swiss_rounds else []
+            else:
+                order = self.knockout_order()
+            if not order:
+                tournament.is_completed = True
+                tournament.winner_id = self.leader() if self.is_swiss else next(iter(self.alive), None)
+                tournament.end_date = self.now
+                self.notify(tournament.winner_id, f"Félicitations ! Vous avez remporté le tournoi '{tournament.name}'", 'success')
+                break
+
+            tournament.current_round += 1
+            self.round_matches = self.pair(order, tournament.current_round)
+            self.created.extend(self.round_matches)
+        return advanced
+
+    def changes(self):
+        """Différence appliquée par cette opération, diffusée aux abonnés du tournoi (chat/tournaments.py)"""
+        tournament = self.tournament
+        return {
+            'current_round': tournament.current_round,
+            'is_completed': tournament.is_completed,
+            'winner': tournament.winner_id,
+            'completed': [{
+                'id': match.pk,
+                'player1_score': match.player1_score,
+                'player2_score': match.player2_score,
+                'winner': match.winner_id
+            } for match in self.updated.values()],
+            'matches': [{
+                'id': match.pk,
+                'round': match.round,
+                'player1': match.player1_id,
+                'player2': match.player2_id,
+                'is_completed': match.is_completed,
+                'player1_score': match.player1_score,
+                'player2_score': match.player2_score,
+                'winner': match.winner_id,
+                'deadline': match.deadline.isoformat() if match.deadline else None
+            } for match in self.created]
+        }
+
+    def save(self):
+        from accounts.models import Notification
+        from chat.models import TournamentMatch
+
+        if self.updated:
+            TournamentMatch.objects.bulk_update(list(self.updated.values()), MATCH_FIELDS, batch_size=BATCH_SIZE)
+        if self.created:
+            TournamentMatch.objects.bulk_create(self.created, batch_size=BATCH_SIZE)
+        self.tournament.save(update_fields=TOURNAMENT_FIELDS)
+        tournaments.publish(self.tournament.id, self.changes())
+
+        name = self.tournament.name
+        for match in self.created:
+            if not match.is_completed:
+                deadline = timezone.localtime(match.deadline).strftime('%d/%m à %H:%M')
+                message = f"Votre match du tour {match.round} du tournoi '{name}' est prêt, à jouer avant le {deadline}"
+                self.notify(match.player1_id, message)
+                self.notify(match.player2_id, message)
+        if self.notifications:
+            Notification.objects.bulk_create(self.notifications, batch_size=BATCH_SIZE)
+
+
+def _locked(tournament_id):
+    from chat.models import Tournament
+
+    return Tournament.objects.select_for_update().get(pk=tournament_id)
+
+
+def _sync(target, source):
+    """Reporte l'état enregistré sur l'instance de l'appelant"""
+    if target is not None and target is not source:
+        for field in TOURNAMENT_FIELDS:
+            attname = target._meta.get_field(field).attname
+            setattr(target, attname, getattr(source, attname))
+
+
+def start(tournament):
+    """
+    Crée le premier tour, joue les matchs entre bots et avance autant que possible.
+    Les inscrits sont lus sous le verrou, qu'une désinscription (Tournament.leave) prend aussi.
+    """
+    with transaction.atomic():
+        bracket = Bracket(_locked(tournament.pk))
+        if bracket.round_matches:
+            raise BracketError('Ce tournoi a déjà commencé')
+        player_ids = list(bracket.tournament.participants.order_by('id').values_list('user_id', flat=True))
+        if len(player_ids) < 2:
+            raise BracketError('Il faut au moins 2 participants pour démarrer un tournoi')
+        bracket.seed(player_ids)
+        bracket.resolve()
+        bracket.save()
+    _sync(tournament, bracket.tournament)
+    return bracket
+
+
+def advance(tournament):
+    """Passe au tour suivant si le tour courant est terminé (matchs entre bots compris)"""
+    with transaction.atomic():
+        bracket = Bracket(_locked(tournament.pk))
+        advanced = bracket.resolve()
+        if advanced:
+            bracket.save()
+    _sync(tournament, bracket.tournament)
+    return advanced
+
+
+def record_result(match, player1_score, player2_score, winner_id=None):
+    """
+    Enregistre le résultat de `match` ; si le tour est terminé, son avancement est confié au worker.
+    Le match est relu sous le verrou du tournoi : un résultat déjà enregistré lève BracketError.
+    """
+    from chat import scheduler
+
+    with transaction.atomic():
+        bracket = Bracket(_locked(match.tournament_id))
+        bracket.record(match, player1_score, player2_score, winner_id)
+        bracket.save()
+        if all(item.is_completed for item in bracket.round_matches):
+            scheduler.enqueue(match.tournament_id, scheduler.ADVANCE)
+    if type(match).tournament.is_cached(match):
+        _sync(match.tournament, bracket.tournament)
+    return bracket
+
+
+def forfeit_expired(tournament_id):
+    """Déclare forfait les matchs expirés du tournoi puis avance le tableau. Retourne le nombre de forfaits."""
+    with transaction.atomic():
+        bracket = Bracket(_locked(tournament_id))
+        forfeits = bracket.forfeit_expired()
+        if forfeits:
+            bracket.resolve()
+            bracket.save()
+    return forfeits
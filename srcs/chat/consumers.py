@@ -1,7 +1,15 @@
 import json
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from chat import blocking, delivery, friends, invites, presence, ratelimit, receipts, rooms, tournaments, users, wire
+from chat.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
 
 # Définir User après l'importation (Django est déjà configuré à ce stade)
 User = get_user_model()
@@ -22,30 +30,63 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
             
             print(f"WebSocket connecté pour l'utilisateur {self.user.username} (ID: {self.user.id})")
-            await self.accept()
+            # Seaux à jetons de cette connexion (voir chat/ratelimit.py)
+            self.limiter = ratelimit.ConnectionLimiter()
+            # Salons auxquels cette connexion est abonnée (groupes room_<id>)
+            self.rooms = set()
+            # Tableaux de tournois suivis (groupes tournament_<id>)
+            self.tournaments = set()
+            # Trames MessagePack si le client le demande, JSON sinon
+            self.binary = wire.SUBPROTOCOL in self.scope.get('subprotocols', [])
+            await self.accept(subprotocol=wire.SUBPROTOCOL if self.binary else None)
+            
+            # Présence : cette connexion compte comme un onglet ouvert
+            if await self.touch_presence():
+                await self.broadcast_presence(True)
+            
+            # Reprise : le client indique le dernier numéro de séquence reçu (?last_seq=N&user_id=ID)
+            last_seq = self.get_resume_point()
+            current_seq, missed, gap = await self.get_missed_events(last_seq)
             
             # Envoyer une confirmation de connexion
-            await self.send(text_data=json.dumps({
+            await self.send_event({
                 'type': 'connection_established',
                 'user_id': self.user.id,
-                'username': self.user.username
-            }))
+                'username': self.user.username,
+                'seq': current_seq
+            })
+            
+            # Tous les événements manqués en une seule trame
+            if last_seq is not None:
+                await self.send_event({
+                    'type': 'missed_events',
+                    'events': missed,
+                    'last_seq': current_seq,
+                    'gap': gap
+                })
         else:
             print("Tentative de connexion WebSocket sans authentification")
             await self.close(code=4001)
 
+    async def send_event(self, event):
+        """Envoie un événement dans l'encodage négocié, en réutilisant la trame déjà encodée pour le groupe"""
+        if getattr(self, 'binary', False):
+            await self.send(bytes_data=wire.encode(event, True))
+        else:
+            await self.send(text_data=wire.encode(event, False))
+
     async def game_invite_response(self, event):
         """Méthode pour traiter les réponses aux invitations de jeu"""
-        await self.send(text_data=json.dumps(event))
+        await self.send_event(event)
 
     async def game_start(self, event):
         """Méthode pour signaler le début d'une partie"""
         # S'assurer que toutes les informations importantes sont présentes
-        await self.send(text_data=json.dumps({
+        await self.send_event({
             **event,
             'current_user': self.user.username,  # Ajout de l'utilisateur courant
             'current_user_id': self.user.id  # Ajout de l'ID de l'utilisateur courant
-        }))
+        })
     
     async def send_game_start_message(self, recipient_id, game_id, opponent_name, sender_name, is_host=False):
         # Lorsque is_host est false, cela signifie que ce message est envoyé au destinataire
@@ -83,17 +124,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 from django.utils import timezone
                 timestamp = timezone.now()
             
-            # Convertir recipient_id en instance User si nécessaire
-            if isinstance(recipient, (int, str)):
-                recipient = await self.get_user_by_id(int(recipient))
-            
-            if not recipient:
+            # Vérifier le destinataire dans le cache des résumés : seul l'INSERT touche la base
+            recipient_id = recipient.id if isinstance(recipient, User) else int(recipient)
+            if not await self.get_user_summary(recipient_id):
                 raise ValueError("Recipient not found")
                 
             # Créer et sauvegarder le message
             message = await self.create_message(
                 sender=sender,
-                recipient=recipient,
+                recipient_id=recipient_id,
                 content=content,
                 timestamp=timestamp
             )
@@ -104,26 +143,154 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def get_user_by_id(self, user_id):
+    def get_user_summary(self, user_id):
         """
-        Récupère un utilisateur par son ID
+        Résumé d'un utilisateur (id, username, avatar...) lu dans chat/users.py, None s'il n'existe pas
         """
-        User = get_user_model()
+        return users.get(user_id)
+
+    def get_resume_point(self):
+        """
+        Dernière séquence reçue par le client, ignorée si elle a été enregistrée
+        pour un autre compte (changement d'utilisateur dans le même navigateur)
+        """
+        query = parse_qs(self.scope.get('query_string', b'').decode())
         try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            if int(query['user_id'][0]) == self.user.id:
+                return max(0, int(query['last_seq'][0]))
+        except (KeyError, ValueError):
+            pass
+        return None
+
+    @database_sync_to_async
+    def get_missed_events(self, last_seq):
+        if last_seq is None:
+            return delivery.current_seq(self.user.id), [], False
+        return delivery.missed_since(self.user.id, last_seq)
+
+    @database_sync_to_async
+    def sequence_event(self, recipient_id, event):
+        return delivery.push(recipient_id, event)
+
+    @database_sync_to_async
+    def user_allows(self, name):
+        return ratelimit.user_allows(self.user.id, name)
+
+    @database_sync_to_async
+    def record_drops(self, drops):
+        for name, count in drops.items():
+            ratelimit.record_drops(name, count)
+
+    async def allow_frame(self, message_type):
+        """
+        Seau de la connexion d'abord (en mémoire, sans aller-retour Redis), puis limite de l'utilisateur
+        partagée entre ses sockets. Une trame refusée est ignorée ; le client reçoit au plus
+        un `rate_limited` par seconde et par type, et la connexion est fermée si l'abus persiste.
+        """
+        name = ratelimit.limit_name(message_type)
+        if not self.limiter.take(name):
+            retry_after = None
+        elif await self.user_allows(name):
+            return True
+        else:
+            retry_after = ratelimit.window_reset()
+
+        nack, count = self.limiter.drop(name, retry_after)
+        if nack:
+            await self.send_event(nack)
+            await self.record_drops({name: count})
+        if self.limiter.dropped == settings.CHAT_RATE_LIMIT_CLOSE_AFTER:
+            logger.info("Connexion de %s fermée : %d trames refusées", self.user.username, self.limiter.dropped)
+            await self.close(code=4008)
+        return False
+
+    @database_sync_to_async
+    def get_room_role(self, room_id):
+        return rooms.role(room_id, self.user.id)
+
+    @database_sync_to_async
+    def get_tournament_version(self, tournament_id):
+        """Version du tableau (chat/tournaments.py), None si le tournoi n'existe pas"""
+        from chat.models import Tournament
+
+        if not Tournament.objects.filter(id=tournament_id).exists():
             return None
+        return tournaments.version(tournament_id)
+
+    @database_sync_to_async
+    def post_room_message(self, room_id, content):
+        return rooms.post_message(room_id, self.user, content)
 
     @database_sync_to_async
-    def create_message(self, sender, recipient, content, timestamp):
+    def touch_presence(self):
+        return presence.touch(self.user.id, self.channel_name)
+
+    @database_sync_to_async
+    def leave_presence(self):
+        return presence.leave(self.user.id, self.channel_name)
+
+    @database_sync_to_async
+    def sweep_presence(self):
+        """Résumés des utilisateurs passés hors ligne par expiration (voir presence.sweep)"""
+        return list(users.get_many(presence.sweep()).values())
+
+    @database_sync_to_async
+    def get_watcher_ids(self, user_id):
+        return friends.watcher_ids(user_id)
+
+    @database_sync_to_async
+    def get_friends_snapshot(self):
+        return friends.snapshot(self.user)
+
+    async def broadcast_presence(self, online, user=None):
+        """
+        Pousse le changement de présence aux utilisateurs qui ont cet utilisateur en ami
+        (`user` : résumé d'un autre utilisateur, pour les départs détectés par expiration)
+        """
+        user_id, username = (user['id'], user['username']) if user else (self.user.id, self.user.username)
+        event = wire.prepare({
+            'type': 'friend_presence',
+            'username': username,
+            'online': online
+        })
+        for watcher_id in await self.get_watcher_ids(user_id):
+            await self.channel_layer.group_send(f"user_{watcher_id}", event)
+
+    @database_sync_to_async
+    def create_invite(self, recipient_id):
+        return invites.create(self.user.id, recipient_id)
+
+    @database_sync_to_async
+    def resolve_invite(self, sender_id, accepted):
+        return invites.resolve(sender_id, self.user.id, accepted)
+
+    @database_sync_to_async
+    def is_blocked(self, other_id):
         """
-        Crée un message dans la base de données
+        Vérifie si l'un des deux utilisateurs a bloqué l'autre (lecture du cache de blocages)
         """
-        from chat.models import Message
+        return blocking.is_blocked(self.user.id, other_id)
+
+    @database_sync_to_async
+    def mark_read(self, other_id, up_to_id):
+        from chat.models import Conversation
+
+        return Conversation.mark_read(self.user, other_id, up_to_id)
+
+    @database_sync_to_async
+    def read_events(self, other_id, count, unread, message_id):
+        return receipts.events(self.user.id, other_id, count, unread, message_id)
+
+    @database_sync_to_async
+    def create_message(self, sender, recipient_id, content, timestamp):
+        """
+        Crée un message dans la base de données et met à jour le résumé de conversation
+        """
+        from chat.models import Conversation
         
-        message = Message.objects.create(
+        message = Conversation.create_message(
             sender=sender,
-            recipient=recipient,
+            recipient_id=recipient_id,
             content=content,
             timestamp=timestamp
         )
@@ -136,21 +303,95 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.user_group_name,
                 self.channel_name
             )
+            if await self.leave_presence():
+                await self.broadcast_presence(False)
+            for room_id in self.rooms:
+                await self.channel_layer.group_discard(rooms.group_name(room_id), self.channel_name)
+            for tournament_id in self.tournaments:
+                await self.channel_layer.group_discard(tournaments.group_name(tournament_id), self.channel_name)
+            if self.limiter.dropped:
+                await self.record_drops(self.limiter.flush())
+                logger.debug("Trames refusées pour %s sur cette connexion : %d", self.user.username, self.limiter.dropped)
+        
         print(f"WebSocket déconnecté, code: {close_code}")
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
+        # Trame surdimensionnée : fermeture avant tout décodage (1009 : message trop grand)
+        frame = text_data if text_data is not None else bytes_data
+        if frame is not None and len(frame) > settings.CHAT_MAX_FRAME_BYTES:
+            await self.close(code=1009)
+            return
+
+        # Les trames illisibles sont limitées comme les autres (type 'default')
         try:
-            data = json.loads(text_data)
-            print(f"Message reçu: {data}")
-            
+            data = wire.decode(text_data, bytes_data)
             message_type = data.get('type')
+        except Exception:
+            data = message_type = None
+
+        if not await self.allow_frame(message_type):
+            return
+        if data is None:
+            await self.send_event({
+                'type': 'error',
+                'message': 'Trame invalide'
+            })
+            return
+
+        try:
+            print(f"Message reçu: {data}")
             
             if message_type == 'chat_message':
                 recipient_id = data.get('recipient_id')
                 message_content = data.get('message')
                 timestamp = data.get('timestamp')
                 
-                if recipient_id:
+                if recipient_id and await self.is_blocked(recipient_id):
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Impossible d\'envoyer un message à cet utilisateur'
+                    })
+
+                elif recipient_id and settings.CHAT_WRITE_BEHIND:
+                    # Mode écriture différée : diffuser, acquitter, puis enregistrer par lots.
+                    # Le destinataire est vérifié avant la diffusion (cache des résumés) et le message
+                    # est horodaté par le serveur, comme il le sera dans la base
+                    recipient = await self.get_user_summary(int(recipient_id))
+                    if recipient is None:
+                        await self.send_event({
+                            'type': 'error',
+                            'message': 'Destinataire introuvable'
+                        })
+                    else:
+                        recipient_id = recipient['id']
+                        timestamp = timezone.now()
+                        await self.channel_layer.group_send(
+                            f"user_{recipient_id}",
+                            wire.prepare(await self.sequence_event(recipient_id, {
+                                'type': 'chat_message',
+                                'message': message_content,
+                                'sender': self.user.username,
+                                'sender_id': self.user.id,
+                                'recipient_id': recipient_id,
+                                'timestamp': timestamp.isoformat()
+                            }))
+                        )
+                        write_behind.add(
+                            sender_id=self.user.id,
+                            recipient_id=recipient_id,
+                            content=message_content,
+                            timestamp=timestamp,
+                            reply_channel=self.channel_name
+                        )
+                        await self.send_event({
+                            'type': 'message_sent',
+                            'status': 'success',
+                            'message': message_content,
+                            'recipient_id': recipient_id,
+                            'timestamp': timestamp.isoformat()
+                        })
+
+                elif recipient_id:
                     # Sauvegarder le message dans la base de données
                     message = await self.save_message(
                         sender=self.user,  # Utilisez directement l'instance utilisateur
@@ -160,56 +401,169 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     )
                     
                     if message:
-                        # Envoyer au destinataire
+                        # Envoyer au destinataire (numéroté et conservé s'il n'est pas connecté)
                         await self.channel_layer.group_send(
                             f"user_{recipient_id}",
-                            {
+                            wire.prepare(await self.sequence_event(recipient_id, {
                                 'type': 'chat_message',
+                                'message_id': message.id,
                                 'message': message_content,
                                 'sender': self.user.username,
                                 'sender_id': self.user.id,
                                 'recipient_id': recipient_id,
                                 'timestamp': timestamp
-                            }
+                            }))
                         )
                         
                         # Confirmer à l'expéditeur
-                        await self.send(text_data=json.dumps({
+                        await self.send_event({
                             'type': 'message_sent',
                             'status': 'success',
                             'message': message_content,
                             'recipient_id': recipient_id,
                             'timestamp': timestamp
-                        }))
+                        })
                     else:
-                        await self.send(text_data=json.dumps({
+                        await self.send_event({
                             'type': 'error',
                             'message': 'Erreur lors de la sauvegarde du message'
-                        }))
+                        })
             
+            elif message_type == 'heartbeat':
+                # Prolonge la présence de cette connexion (voir chat/presence.py)
+                if await self.touch_presence():
+                    await self.broadcast_presence(True)
+                # Départs des utilisateurs dont les connexions ont expiré sans déconnexion propre
+                if presence.sweep_due():
+                    for user in await self.sweep_presence():
+                        await self.broadcast_presence(False, user)
+
+            elif message_type == 'subscribe_friends':
+                # Liste d'amis complète une seule fois, puis uniquement les différences
+                self.friends_subscribed = True
+                await self.send_event({
+                    'type': 'friends_snapshot',
+                    'friends': await self.get_friends_snapshot()
+                })
+
+            elif message_type == 'unsubscribe_friends':
+                self.friends_subscribed = False
+
+            elif message_type == 'mark_read':
+                # Accusé de lecture : conversation avec user_id lue jusqu'à message_id (entièrement sans message_id)
+                other_id = data.get('user_id')
+                message_id = data.get('message_id')
+                if other_id:
+                    other_id = int(other_id)
+                    message_id = int(message_id) if message_id else None
+                    count, unread = await self.mark_read(other_id, message_id)
+
+                    # Badge à jour dans les autres onglets, accusé pour l'expéditeur (voir chat/receipts.py)
+                    for group, event in await self.read_events(other_id, count, unread, message_id):
+                        await self.channel_layer.group_send(group, event)
+
+            elif message_type == 'room_subscribe':
+                # Adhésion vérifiée une fois ; ensuite les messages du salon arrivent par son groupe
+                room_id = int(data.get('room_id'))
+                if await self.get_room_role(room_id) is None:
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Vous n\'êtes pas membre de ce salon'
+                    })
+                else:
+                    await self.channel_layer.group_add(rooms.group_name(room_id), self.channel_name)
+                    self.rooms.add(room_id)
+                    await self.send_event({
+                        'type': 'room_subscribed',
+                        'room_id': room_id
+                    })
+
+            elif message_type == 'room_unsubscribe':
+                room_id = int(data.get('room_id'))
+                self.rooms.discard(room_id)
+                await self.channel_layer.group_discard(rooms.group_name(room_id), self.channel_name)
+
+            elif message_type == 'room_message':
+                room_id = int(data.get('room_id'))
+                message_content = data.get('message')
+                if room_id not in self.rooms:
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Abonnez-vous au salon avant d\'y écrire'
+                    })
+                elif message_content:
+                    event = await self.post_room_message(room_id, message_content)
+                    if event is None:
+                        # Exclu depuis l'abonnement : la connexion quitte le groupe du salon
+                        self.rooms.discard(room_id)
+                        await self.channel_layer.group_discard(rooms.group_name(room_id), self.channel_name)
+                        await self.send_event({
+                            'type': 'error',
+                            'message': 'Vous n\'êtes plus membre de ce salon'
+                        })
+                    else:
+                        # Une écriture, un group_send : l'expéditeur reçoit aussi le message, qui sert d'accusé
+                        await self.channel_layer.group_send(rooms.group_name(room_id), wire.prepare(event))
+
+            elif message_type == 'tournament_subscribe':
+                # Participants et spectateurs : les différences du tableau arrivent par le groupe du tournoi
+                tournament_id = int(data.get('tournament_id'))
+                current = await self.get_tournament_version(tournament_id)
+                if current is None:
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Tournoi non trouvé'
+                    })
+                else:
+                    await self.channel_layer.group_add(tournaments.group_name(tournament_id), self.channel_name)
+                    self.tournaments.add(tournament_id)
+                    await self.send_event({
+                        'type': 'tournament_subscribed',
+                        'tournament_id': tournament_id,
+                        'version': current
+                    })
+
+            elif message_type == 'tournament_unsubscribe':
+                tournament_id = int(data.get('tournament_id'))
+                self.tournaments.discard(tournament_id)
+                await self.channel_layer.group_discard(tournaments.group_name(tournament_id), self.channel_name)
+
             elif message_type == 'connection_test':
-                await self.send(text_data=json.dumps({
+                await self.send_event({
                     'type': 'connection_response',
                     'status': 'connected',
                     'message': 'Connection test successful'
-                }))
+                })
 
             elif message_type == 'game_invite_response':
                 recipient_id = data.get('recipient_id')
                 accepted = data.get('accepted', False)
  
-                if recipient_id:
+                if recipient_id and await self.is_blocked(recipient_id):
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Impossible de répondre à cette invitation'
+                    })
+
+                elif recipient_id and await self.resolve_invite(int(recipient_id), accepted) is None:
+                    # Double clic, second onglet ou invitation expirée : une seule réponse est prise en compte
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Invitation expirée ou déjà traitée'
+                    })
+
+                elif recipient_id:
                     # Transmettre la réponse à l'expéditeur original de l'invitation
                     await self.channel_layer.group_send(
                         f"user_{recipient_id}",
-                        {
+                        wire.prepare({
                             'type': 'game_invite_response',
                             'sender': self.user.username,
                             'sender_id': self.user.id,
                             'recipient_id': recipient_id,
                             'accepted': accepted,
                             'is_host': data.get('is_host', False)
-                        }
+                        })
                     )
                     
                     # Si l'invitation est acceptée, rediriger les deux joueurs vers le jeu
@@ -219,8 +573,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                         game_id = str(uuid.uuid4())
                         
                         # Obtenir le nom de l'hôte (celui qui a envoyé l'invitation initiale)
-                        host_user = await self.get_user_by_id(recipient_id)
-                        host_name = host_user.username if host_user else "l'hôte"
+                        host_user = await self.get_user_summary(recipient_id)
+                        host_name = host_user['username'] if host_user else "l'hôte"
                         
                         # Informer les deux joueurs du début de la partie
                         # Envoyer à l'hôte qui a fait l'invitation
@@ -251,43 +605,103 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
             elif message_type == 'game_invite':
                 recipient_id = data.get('recipient_id')
-                if recipient_id:
+                if recipient_id and await self.is_blocked(recipient_id):
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Vous ne pouvez pas envoyer d\'invitation à cet utilisateur'
+                    })
+                elif recipient_id and not await self.create_invite(int(recipient_id)):
+                    await self.send_event({
+                        'type': 'error',
+                        'message': 'Une invitation est déjà en attente'
+                    })
+                elif recipient_id:
                     # Transmettre l'invitation au destinataire
                     await self.channel_layer.group_send(
                         f"user_{recipient_id}",
-                        {
+                        wire.prepare({
                             'type': 'game_invite',
                             'sender': self.user.username,
                             'sender_id': self.user.id,
                             'recipient_id': recipient_id,
                             'is_host': data.get('is_host', True)
-                        }
+                        })
                     )
                     
                     # Confirmer à l'expéditeur
-                    await self.send(text_data=json.dumps({
+                    await self.send_event({
                         'type': 'invite_sent',
                         'status': 'success',
                         'recipient_id': recipient_id
-                    }))
+                    })
                 else:
-                    await self.send(text_data=json.dumps({
+                    await self.send_event({
                         'type': 'error',
                         'message': 'ID du destinataire requis pour les invitations'
-                    }))
+                    })
             
         except Exception as e:
             print(f"Erreur dans receive: {str(e)}")
-            await self.send(text_data=json.dumps({
+            await self.send_event({
                 'type': 'error',
-                'message': str(e)
-            }))
+                'message': 'Erreur lors du traitement du message'
+            })
 
     # Méthode pour envoyer un message de chat
     async def chat_message(self, event):
         # Envoyer le message au WebSocket
-        await self.send(text_data=json.dumps(event))
+        await self.send_event(event)
     
     # Méthode pour les invitations de jeu
     async def game_invite(self, event):
-        await self.send(text_data=json.dumps(event))
\ No newline at end of file
+        await self.send_event(event)
+
+    # Accusés de lecture : messages envoyés lus par l'interlocuteur, non-lus lus dans un autre onglet
+    async def read_receipt(self, event):
+        await self.send_event(event)
+
+    async def unread_update(self, event):
+        await self.send_event(event)
+
+    # Salons : messages et arrivées/départs diffusés par le groupe room_<id>
+    async def room_message(self, event):
+        await self.send_event(event)
+
+    async def room_member(self, event):
+        # L'intéressé est prévenu sur son groupe personnel (room_membership)
+        if event['user_id'] != self.user.id:
+            await self.send_event(event)
+
+    async def room_membership(self, event):
+        """Ajout ou retrait de cet utilisateur : un membre retiré cesse aussitôt de recevoir le salon"""
+        if event['status'] == 'removed' and event['room_id'] in self.rooms:
+            self.rooms.discard(event['room_id'])
+            await self.channel_layer.group_discard(rooms.group_name(event['room_id']), self.channel_name)
+        await self.send_event(event)
+
+    # Tournois : différences du tableau diffusées par le groupe tournament_<id>
+    async def tournament_update(self, event):
+        await self.send_event(event)
+
+    # Échec de l'enregistrement différé d'un message envoyé par cette connexion
+    async def message_persist_failed(self, event):
+        await self.send_event({
+            'type': 'error',
+            'message': 'Erreur lors de la sauvegarde du message',
+            'recipient_id': event['recipient_id'],
+            'content': event['message'],
+            'timestamp': event['timestamp']
+        })
+
+    # Différences de la liste d'amis, transmises seulement si la connexion y est abonnée
+    async def friend_presence(self, event):
+        if getattr(self, 'friends_subscribed', False):
+            await self.send_event(event)
+
+    async def friend_added(self, event):
+        if getattr(self, 'friends_subscribed', False):
+            await self.send_event(event)
+
+    async def friend_removed(self, event):
+        if getattr(self, 'friends_subscribed', False):
+            await self.send_event(event)
@@ -0,0 +1,58 @@
+# chat/delivery.py
+import json
+
+from chat import redis_client
+
+# Numéros de séquence de livraison par utilisateur et file bornée des derniers événements.
+# Chaque message de chat destiné à un utilisateur reçoit le numéro suivant (INCR atomique)
+# et est ajouté à une liste Redis par utilisateur (client de chat/redis_client.py), tronquée aux
+# QUEUE_SIZE derniers événements (RPUSH + LTRIM + EXPIRE en une transaction) : un client qui se
+# reconnecte avec ?last_seq=N relit uniquement les événements N+1.. au lieu de recharger ses historiques.
+SEQ_KEY = 'chat:seq:{}'
+QUEUE_KEY = 'chat:queue:{}'
+QUEUE_SIZE = 200
+QUEUE_TTL = 24 * 60 * 60
+
+
+def _redis():
+    return redis_client.get()
+
+
+def push(user_id, event):
+    """Numérote l'événement pour user_id, le conserve dans la file et le retourne avec son champ `seq`"""
+    seq = _redis().incr(SEQ_KEY.format(user_id))
+    event = {**event, 'seq': seq}
+
+    queue = QUEUE_KEY.format(user_id)
+    pipe = _redis().pipeline()
+    pipe.rpush(queue, json.dumps(event, default=str))
+    pipe.ltrim(queue, -QUEUE_SIZE, -1)
+    pipe.expire(queue, QUEUE_TTL)
+    pipe.execute()
+    return event
+
+
+def current_seq(user_id):
+    return int(_redis().get(SEQ_KEY.format(user_id)) or 0)
+
+
+def missed_since(user_id, last_seq):
+    """
+    Événements de user_id postérieurs à last_seq : (séquence courante, événements, trou).
+    `trou` est vrai si la file ne couvre plus tout l'intervalle (tête de file au-delà de last_seq + 1
+    après troncature, file expirée ou compteur réinitialisé) : le client doit alors recharger ses historiques.
+    """
+    current = current_seq(user_id)
+    if current == last_seq:
+        return current, [], False
+    if last_seq > current:
+        return current, [], True
+
+    queue = QUEUE_KEY.format(user_id)
+    # Deux envois simultanés peuvent arriver dans la liste dans le désordre de leurs numéros
+    events = sorted(
+        (event for event in map(json.loads, _redis().lrange(queue, 0, -1)) if event['seq'] > last_seq),
+        key=lambda event: event['seq']
+    )
+    gap = not events or events[0]['seq'] != last_seq + 1 or events[-1]['seq'] - last_seq != len(events)
+    return current, events, gap
@@ -0,0 +1,53 @@
+# chat/friends.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from chat import presence, wire
+
+# Liste d'amis poussée sur le WebSocket ws/chat/ : le client s'abonne (`subscribe_friends`),
+# reçoit un `friends_snapshot` puis uniquement des différences :
+# `friend_presence` (connexion/déconnexion), `friend_added` et `friend_removed`.
+
+
+def watcher_ids(user_id):
+    """Utilisateurs qui ont user_id dans leur liste d'amis (destinataires de sa présence)"""
+    from accounts.models import Profile
+
+    return list(Profile.objects.filter(friends__user_id=user_id).values_list('user_id', flat=True))
+
+
+def friend_payload(user, online=None):
+    from accounts.views import get_profile_photo_url
+
+    if online is None:
+        online = presence.is_online(user.id)
+    return {
+        'username': user.username,
+        'online': online,
+        'profile_photo': get_profile_photo_url(user)
+    }
+
+
+def snapshot(user):
+    """Liste d'amis complète avec leur présence : une requête et une lecture du cache"""
+    friends = list(user.profile.friends.select_related('user'))
+    friends_presence = presence.get_presence(friend.user_id for friend in friends)
+    return [friend_payload(friend.user, friends_presence[friend.user_id]) for friend in friends]
+
+
+def _send(user_ids, event):
+    channel_layer = get_channel_layer()
+    event = wire.prepare(event)
+    for user_id in user_ids:
+        async_to_sync(channel_layer.group_send)(f"user_{user_id}", event)
+
+
+def notify_added(user, friend_user):
+    """Ajout bidirectionnel : chacun reçoit la carte de l'autre"""
+    _send([user.id], {'type': 'friend_added', 'friend': friend_payload(friend_user)})
+    _send([friend_user.id], {'type': 'friend_added', 'friend': friend_payload(user)})
+
+
+def notify_removed(user, friend_ids, reason='removed'):
+    """`reason` vaut 'removed' (retrait d'ami) ou 'deleted' (compte supprimé)"""
+    _send(friend_ids, {'type': 'friend_removed', 'username': user.username, 'reason': reason})
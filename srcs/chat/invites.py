@@ -0,0 +1,39 @@
+# chat/invites.py
+from django.core.cache import cache
+from django.utils import timezone
+
+# Invitations de jeu en attente : une entrée de cache par paire (expéditeur, destinataire)
+# qui expire d'elle-même après INVITE_TTL, sans balayage de table.
+# Seule l'issue (acceptée / refusée) est enregistrée dans GameInvite.
+CACHE_KEY = 'chat:invite:{}:{}'
+INVITE_TTL = 3 * 60  # secondes
+
+
+def create(sender_id, recipient_id):
+    """
+    Enregistre une invitation en attente (SET NX).
+    Retourne False si une invitation non expirée existe déjà pour cette paire.
+    """
+    return cache.add(CACHE_KEY.format(sender_id, recipient_id), timezone.now().isoformat(), INVITE_TTL)
+
+
+def cancel(sender_id, recipient_id):
+    return cache.delete(CACHE_KEY.format(sender_id, recipient_id))
+
+
+def resolve(sender_id, recipient_id, accepted):
+    """
+    Passe l'invitation de « en attente » à acceptée ou refusée.
+    La suppression de l'entrée sert de compare-and-set : sur un double clic ou deux onglets,
+    un seul appel la voit encore présente. Retourne l'issue enregistrée,
+    ou None si l'invitation a expiré ou a déjà été traitée.
+    """
+    from chat.models import GameInvite
+
+    if not cache.delete(CACHE_KEY.format(sender_id, recipient_id)):
+        return None
+    return GameInvite.objects.create(
+        sender_id=sender_id,
+        recipient_id=recipient_id,
+        status='accepted' if accepted else 'rejected'
+    )
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from chat import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Gère les partitions mensuelles de chat_message : "
+        "list, ensure (création à l'avance), archive (export compressé puis suppression), restore."
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        subparsers.add_parser('list', help='Partitions attachées et archives disponibles')
+
+        ensure = subparsers.add_parser('ensure', help='Crée les partitions du mois courant et des mois suivants')
+        ensure.add_argument('--months-ahead', type=int, default=2)
+
+        archive = subparsers.add_parser('archive', help='Archive les partitions antérieures à un mois')
+        archive.add_argument('--before', required=True, help='Mois AAAA-MM exclu : seules les partitions plus anciennes sont archivées')
+        archive.add_argument('--dir', default=settings.CHAT_ARCHIVE_DIR)
+
+        restore = subparsers.add_parser('restore', help="Réimporte l'archive d'un mois")
+        restore.add_argument('month', help='Mois AAAA-MM')
+        restore.add_argument('--dir', default=settings.CHAT_ARCHIVE_DIR)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Le partitionnement des messages nécessite PostgreSQL')
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def _month(self, value):
+        try:
+            return partitions.month_of(value)
+        except ValueError:
+            raise CommandError(f'Mois invalide (attendu AAAA-MM): {value}')
+
+    def handle_list(self, options):
+        with connection.cursor() as cursor:
+            months = partitions.list_partitions(cursor)
+            for month in months:
+                cursor.execute(f'SELECT count(*) FROM {partitions.partition_name(month)}')
+                self.stdout.write(f'{month:%Y-%m}  {cursor.fetchone()[0]} messages')
+            cursor.execute(f'SELECT count(*) FROM {partitions.DEFAULT_PARTITION}')
+            self.stdout.write(f'défaut    {cursor.fetchone()[0]} messages')
+
+        directory = settings.CHAT_ARCHIVE_DIR
+        if os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith('.csv.gz'):
+                    self.stdout.write(f'archive   {os.path.join(directory, filename)}')
+
+    def handle_ensure(self, options):
+        created = partitions.ensure_partitions(options['months_ahead'])
+        for month in created:
+            self.stdout.write(self.style.SUCCESS(f'Partition {partitions.partition_name(month)} créée'))
+        if not created:
+            self.stdout.write('Partitions déjà à jour')
+
+    def handle_archive(self, options):
+        before = self._month(options['before'])
+        current = partitions.month_of(datetime.now(timezone.utc))
+        if before > current:
+            raise CommandError('Impossible d\'archiver le mois courant ou des mois futurs')
+
+        with connection.cursor() as cursor:
+            months = [month for month in partitions.list_partitions(cursor) if month < before]
+        if not months:
+            self.stdout.write('Aucune partition à archiver')
+            return
+
+        for month in months:
+            try:
+                path, rows = partitions.archive_partition(month, options['dir'])
+            except (FileExistsError, LookupError) as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'{month:%Y-%m} : {rows} messages archivés dans {path}'))
+
+    def handle_restore(self, options):
+        month = self._month(options['month'])
+        try:
+            restored, dropped = partitions.restore_partition(month, options['dir'])
+        except (FileExistsError, FileNotFoundError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'{month:%Y-%m} : {restored} messages restaurés'))
+        if dropped:
+            self.stdout.write(self.style.WARNING(f'{dropped} messages écartés (comptes supprimés depuis l\'archivage)'))
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from chat import bots, bracket
+from chat.models import Tournament, TournamentMatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la génération du premier tour et la résolution complète (bots contre bots) "
+        "de tournois de plusieurs tailles. Les tournois de mesure sont supprimés, sauf avec --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[32, 100, 1024, 4096])
+        parser.add_argument(
+            '--systems', nargs='+', default=[Tournament.ELIMINATION, Tournament.SWISS],
+            choices=[Tournament.ELIMINATION, Tournament.SWISS]
+        )
+        parser.add_argument('--keep', action='store_true', help='Conserve les tournois créés')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        if min(sizes) < 2:
+            raise CommandError('Un tournoi compte au moins 2 participants')
+
+        # La réserve de bots est complétée d'avance : sa création n'entre pas dans les mesures
+        bots.grow(max(sizes))
+        creator = bots.pool(1)[0]
+
+        self.stdout.write(f"{'format':<12} {'joueurs':>7} {'tours':>5} {'matchs':>6} {'génération':>22} {'résolution':>22}")
+        for system in options['systems']:
+            for size in sizes:
+                self.run(creator, system, size, options['keep'])
+
+    def measure(self, function):
+        """Durée en millisecondes et nombre de requêtes de function()"""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            function()
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, len(queries)
+
+    def run(self, creator, system, size, keep):
+        tournament = Tournament.objects.create(
+            name=f'Benchmark {system} {size}',
+            creator=creator,
+            max_participants=size,
+            system=system
+        )
+        try:
+            bots.allocate(tournament)
+
+            def generate():
+                with transaction.atomic():
+                    seeded = bracket.Bracket(Tournament.objects.select_for_update().get(pk=tournament.pk))
+                    seeded.seed(seeded.tournament.participants.order_by('id').values_list('user_id', flat=True))
+                    seeded.save()
+
+            generation = self.measure(generate)
+            resolution = self.measure(lambda: bracket.advance(tournament))
+
+            if not tournament.is_completed:
+                raise CommandError(f'Le tournoi {tournament.id} ({system}, {size} joueurs) n\'est pas terminé')
+            matches = TournamentMatch.objects.filter(tournament=tournament).count()
+            self.stdout.write(
+                f'{system:<12} {size:>7} {tournament.current_round:>5} {matches:>6} '
+                f'{generation[0]:>11.1f} ms {generation[1]:>4} req. '
+                f'{resolution[0]:>11.1f} ms {resolution[1]:>4} req.'
+            )
+        finally:
+            if not keep:
+                tournament.delete()
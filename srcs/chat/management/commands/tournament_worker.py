@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chat import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker des tournois : démarrages et passages de tour mis en file par les vues, "
+        "forfaits des matchs dont l'heure limite est dépassée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=settings.TOURNAMENT_WORKER_INTERVAL,
+                            help='Attente en secondes quand la file est vide')
+        parser.add_argument('--once', action='store_true', help='Un seul passage, puis arrêt')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = scheduler.run_once()
+            self.stdout.write(f'{count} travail(aux) exécuté(s)')
+            return
+        self.stdout.write(f"Worker des tournois démarré (intervalle {options['interval']} s)")
+        scheduler.run_forever(options['interval'])
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0013_tournamentparticipant_alias'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'recipient', 'timestamp', 'id'], name='chat_messag_sender__81f3e8_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    """Construit un résumé par paire d'utilisateurs à partir des messages existants"""
+    Message = apps.get_model('chat', 'Message')
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    latest = {}
+    for message in Message.objects.order_by('timestamp', 'id').only('id', 'sender_id', 'recipient_id', 'timestamp').iterator():
+        pair = tuple(sorted((message.sender_id, message.recipient_id)))
+        latest[pair] = message
+
+    # L'historique existant est considéré comme lu
+    Conversation.objects.bulk_create([
+        Conversation(user_a_id=user_a_id, user_b_id=user_b_id, last_message_id=message.id, last_message_at=message.timestamp)
+        for (user_a_id, user_b_id), message in latest.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0014_message_chat_messag_sender__81f3e8_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_a', models.IntegerField(default=0)),
+                ('unread_b', models.IntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message')),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_a', '-last_message_at'], name='chat_conver_user_a__f60a68_idx'), models.Index(fields=['user_b', '-last_message_at'], name='chat_conver_user_b__b07d0c_idx')],
+                'unique_together': {('user_a', 'user_b')},
+            },
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:32
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Colonnes copiées telles quelles ; search_vector est recalculée par Postgres
+COLUMNS = 'id, content, "timestamp", is_read, recipient_id, sender_id, is_game_invite'
+MONTHS_AHEAD = 2
+
+
+def _next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _indexes_and_foreign_keys(cursor):
+    """Définitions des index et clés étrangères de chat_message, recréées sur la nouvelle table"""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = 'chat_message' AND indexname <> 'chat_message_pkey'"
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = 'chat_message'::regclass AND contype = 'f'"
+    )
+    return indexes, cursor.fetchall()
+
+
+def _recreate(cursor, indexes, foreign_keys):
+    for indexdef in indexes:
+        # Les index d'une table partitionnée sont définis « ON ONLY » la table parente
+        cursor.execute(indexdef.replace(' ON ONLY ', ' ON '))
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE chat_message ADD CONSTRAINT {name} {definition}')
+
+
+def partition_messages(apps, schema_editor):
+    """
+    Remplace chat_message par une table partitionnée par mois sur timestamp.
+    La clé primaire devient (id, timestamp), comme l'exige Postgres ; id reste unique (séquence).
+    Les partitions suivantes sont créées par `manage.py message_partitions ensure`,
+    la partition par défaut reçoit les messages hors de toute partition mensuelle.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _indexes_and_foreign_keys(cursor)
+        cursor.execute('SELECT min("timestamp"), max("timestamp"), max(id) FROM chat_message')
+        first, last, max_id = cursor.fetchone()
+        now = datetime.now(timezone.utc)
+
+        cursor.execute(
+            'CREATE TABLE chat_message_partitioned '
+            '(LIKE chat_message INCLUDING DEFAULTS INCLUDING GENERATED, PRIMARY KEY (id, "timestamp")) '
+            'PARTITION BY RANGE ("timestamp")'
+        )
+
+        month = _month_start(min(first or now, now))
+        end = _month_start(max(last or now, now))
+        for _ in range(MONTHS_AHEAD):
+            end = _next_month(end)
+        while month <= end:
+            upper = _next_month(month)
+            cursor.execute(
+                f'CREATE TABLE chat_message_p{month:%Y%m} PARTITION OF chat_message_partitioned '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            month = upper
+        cursor.execute('CREATE TABLE chat_message_default PARTITION OF chat_message_partitioned DEFAULT')
+
+        cursor.execute(f'INSERT INTO chat_message_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM chat_message')
+        cursor.execute('DROP TABLE chat_message')
+
+        cursor.execute('CREATE SEQUENCE chat_message_id_seq OWNED BY chat_message_partitioned.id')
+        if max_id:
+            cursor.execute('SELECT setval(%s, %s)', ['chat_message_id_seq', max_id])
+        cursor.execute("ALTER TABLE chat_message_partitioned ALTER COLUMN id SET DEFAULT nextval('chat_message_id_seq')")
+
+        cursor.execute('ALTER TABLE chat_message_partitioned RENAME TO chat_message')
+        cursor.execute('ALTER TABLE chat_message RENAME CONSTRAINT chat_message_partitioned_pkey TO chat_message_pkey')
+        _recreate(cursor, indexes, foreign_keys)
+
+
+def unpartition_messages(apps, schema_editor):
+    """Retour à une table unique (les partitions archivées ne sont pas réintégrées)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _indexes_and_foreign_keys(cursor)
+        cursor.execute('CREATE TABLE chat_message_plain (LIKE chat_message INCLUDING GENERATED)')
+        cursor.execute(f'INSERT INTO chat_message_plain ({COLUMNS}) SELECT {COLUMNS} FROM chat_message')
+        cursor.execute('DROP TABLE chat_message')
+
+        cursor.execute('ALTER TABLE chat_message_plain RENAME TO chat_message')
+        cursor.execute('ALTER TABLE chat_message ADD PRIMARY KEY (id)')
+        cursor.execute('ALTER TABLE chat_message ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('chat_message', 'id'), coalesce(max(id), 0) + 1, false) "
+            "FROM chat_message"
+        )
+        _recreate(cursor, indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0016_message_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.RunPython(partition_messages, unpartition_messages),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:35
+
+from django.db import migrations
+
+
+def delete_pending_invites(apps, schema_editor):
+    """Les invitations en attente sont désormais dans le cache ; seules les issues restent en base"""
+    GameInvite = apps.get_model('chat', 'GameInvite')
+    GameInvite.objects.filter(status='pending').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0017_partition_message'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_pending_invites, migrations.RunPython.noop),
+    ]
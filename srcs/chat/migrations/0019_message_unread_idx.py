@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0018_delete_pending_game_invites'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'sender', 'id'], name='message_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0020_rooms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['is_completed', '-start_date', '-id'], name='tournament_lobby_idx'),
+        ),
+    ]
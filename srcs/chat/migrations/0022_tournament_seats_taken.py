@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_seats(apps, schema_editor):
+    """Initialise le compteur de places avec le nombre d'inscrits existants"""
+    Tournament = apps.get_model('chat', 'Tournament')
+    TournamentParticipant = apps.get_model('chat', 'TournamentParticipant')
+    seats = TournamentParticipant.objects.filter(tournament=OuterRef('pk')).values('tournament').annotate(
+        count=Count('id')
+    ).values('count')
+    Tournament.objects.update(seats_taken=Coalesce(Subquery(seats), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0021_tournament_lobby_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='seats_taken',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_seats, migrations.RunPython.noop),
+    ]
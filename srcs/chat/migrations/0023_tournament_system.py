@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0022_tournament_seats_taken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='swiss_rounds',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='system',
+            field=models.CharField(choices=[('elimination', 'Élimination directe'), ('swiss', 'Système suisse')], default='elimination', max_length=20),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0023_tournament_system'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('start', 'Démarrage'), ('advance', 'Avancement du tableau')], max_length=10)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['deadline'], name='tournament_match_deadline_idx'),
+        ),
+        migrations.AddField(
+            model_name='tournamentjob',
+            name='tournament',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='chat.tournament'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentjob',
+            index=models.Index(fields=['run_at'], name='tournament_job_run_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentjob',
+            constraint=models.UniqueConstraint(fields=('tournament', 'kind'), name='tournament_job_unique'),
+        ),
+    ]
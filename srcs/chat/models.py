@@ -1,11 +1,14 @@
 # models.py
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.db.models.functions import Greatest
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
 from accounts.models import User
 
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
 class UserProfile(models.Model):
@@ -23,15 +26,219 @@ class Message(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
     is_game_invite = models.BooleanField(default=False)  # Ajout d'une valeur par défaut
+    # Colonne générée par Postgres à chaque INSERT/UPDATE (y compris bulk_create) :
+    # aucun signal ni tâche de réindexation à maintenir.
+    # Configuration 'simple' : pas de racinisation, les messages mélangent les langues.
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True
+    )
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Sert l'historique paginé d'une conversation (keyset sur timestamp, id)
+            models.Index(fields=['sender', 'recipient', 'timestamp', 'id']),
+            # Recherche plein texte (voir search_messages)
+            GinIndex(fields=['search_vector']),
+            # Accusés de lecture : seuls les messages non lus sont indexés
+            models.Index(fields=['recipient', 'sender', 'id'], condition=Q(is_read=False), name='message_unread_idx')
+        ]
+
+    def __str__(self):
+        return self.content
+
+
+class Conversation(models.Model):
+    """
+    Résumé d'une conversation privée (dernier message, non-lus de chaque côté).
+    Maintenu à chaque nouveau message pour que la barre latérale ne lise que N lignes.
+    user_a porte toujours l'id le plus petit de la paire.
+    """
+    user_a = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='conversations_as_a', on_delete=models.CASCADE)
+    user_b = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='conversations_as_b', on_delete=models.CASCADE)
+    # Pas de contrainte en base : chat_message est partitionnée et sa clé primaire est (id, timestamp)
+    last_message = models.ForeignKey(
+        Message, related_name='+', null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_a = models.IntegerField(default=0)  # Messages non lus par user_a
+    unread_b = models.IntegerField(default=0)  # Messages non lus par user_b
+
+    class Meta:
+        unique_together = ('user_a', 'user_b')
+        indexes = [
+            models.Index(fields=['user_a', '-last_message_at']),
+            models.Index(fields=['user_b', '-last_message_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_a_id} <-> {self.user_b_id}"
+
+    @staticmethod
+    def pair(user_id, other_id):
+        return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+    @classmethod
+    def for_user(cls, user):
+        """Conversations d'un utilisateur, de la plus récente à la plus ancienne"""
+        return cls.objects.filter(Q(user_a=user) | Q(user_b=user)).order_by('-last_message_at')
+
+    @classmethod
+    def record_message(cls, message):
+        """
+        Met à jour le résumé après l'enregistrement d'un message.
+        Doit être appelé dans la même transaction que la création du message.
+        """
+        cls.record_messages([message])
+
+    @classmethod
+    def record_messages(cls, messages):
+        """
+        Version groupée de record_message : un seul UPDATE par paire d'utilisateurs,
+        quel que soit le nombre de messages du lot.
+        """
+        batches = {}
+        for message in messages:
+            pair = cls.pair(message.sender_id, message.recipient_id)
+            latest, unread = batches.get(pair, (None, {'unread_a': 0, 'unread_b': 0}))
+            unread['unread_a' if message.recipient_id == pair[0] else 'unread_b'] += 1
+            # (le consumer peut transmettre l'horodatage du client sous forme de chaîne ISO)
+            timestamp = Message._meta.get_field('timestamp').to_python(message.timestamp)
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp)
+            if latest is None or timestamp >= latest[1]:
+                latest = (message.pk, timestamp)
+            batches[pair] = (latest, unread)
+
+        for (user_a_id, user_b_id), ((message_id, timestamp), unread) in batches.items():
+            conversation = cls.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id)
+
+            # Un seul UPDATE ; le dernier message ne recule pas si les horodatages arrivent dans le désordre
+            is_newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=timestamp)
+            changes = dict(
+                last_message=Case(
+                    When(is_newer, then=Value(message_id)),
+                    default=F('last_message'),
+                    output_field=models.BigIntegerField()
+                ),
+                last_message_at=Case(
+                    When(is_newer, then=Value(timestamp)),
+                    default=F('last_message_at'),
+                    output_field=models.DateTimeField()
+                ),
+                **{field: F(field) + count for field, count in unread.items() if count}
+            )
+            # Premier message de la paire : créer le résumé puis appliquer la même mise à jour
+            if not conversation.update(**changes):
+                cls.objects.get_or_create(user_a_id=user_a_id, user_b_id=user_b_id)
+                conversation.update(**changes)
+
+    @classmethod
+    def create_message(cls, **fields):
+        """Crée un message et met à jour le résumé de sa conversation de façon atomique"""
+        with transaction.atomic():
+            message = Message.objects.create(**fields)
+            cls.record_message(message)
+        return message
+
+    @classmethod
+    def mark_read(cls, user, other_id, up_to_id=None):
+        """
+        Marque comme lus les messages reçus de other_id, jusqu'à up_to_id inclus (tous par défaut),
+        en un seul UPDATE, et décrémente d'autant le compteur de non-lus de `user`.
+        Retourne (messages passés à lus, non-lus restants).
+        """
+        user_a_id, user_b_id = cls.pair(user.id, other_id)
+        unread_field = 'unread_a' if user.id == user_a_id else 'unread_b'
+        conversation = cls.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id)
+        messages = Message.objects.filter(sender_id=other_id, recipient=user, is_read=False)
+        if up_to_id is not None:
+            messages = messages.filter(id__lte=up_to_id)
+
+        with transaction.atomic():
+            count = messages.update(is_read=True)
+            if count:
+                # Borné à 0 : les messages antérieurs aux compteurs n'y ont jamais été comptés
+                conversation.update(**{unread_field: Greatest(F(unread_field) - count, 0)})
+            unread = conversation.values_list(unread_field, flat=True).first() or 0
+        return count, unread
+
+    def other_user_id(self, user_id):
+        return self.user_b_id if user_id == self.user_a_id else self.user_a_id
+
+    def unread_for(self, user_id):
+        return self.unread_a if user_id == self.user_a_id else self.unread_b
+
+
+class Room(models.Model):
+    """
+    Salon de discussion à plusieurs (lobby de tournoi, groupe d'amis).
+    Chaque message est écrit une fois dans RoomMessage et diffusé au groupe room_<id>
+    auquel les connexions des membres s'abonnent (voir chat/rooms.py).
+    """
+    name = models.CharField(max_length=100)
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name='created_rooms', null=True, on_delete=models.SET_NULL
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RoomMembership(models.Model):
+    OWNER = 'owner'
+    MODERATOR = 'moderator'
+    MEMBER = 'member'
+    ROLE_CHOICES = [
+        (OWNER, 'Propriétaire'),
+        (MODERATOR, 'Modérateur'),
+        (MEMBER, 'Membre'),
+    ]
+
+    room = models.ForeignKey(Room, related_name='memberships', on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='room_memberships', on_delete=models.CASCADE)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=MEMBER)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('room', 'user')
+        indexes = [
+            models.Index(fields=['user', 'room'])
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.room_id} ({self.role})"
+
+    @property
+    def can_manage(self):
+        """Ajout et retrait de membres"""
+        return self.role in (self.OWNER, self.MODERATOR)
+
+
+class RoomMessage(models.Model):
+    room = models.ForeignKey(Room, related_name='messages', on_delete=models.CASCADE)
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name='room_messages', null=True, on_delete=models.SET_NULL
+    )
+    content = models.TextField()
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [
+            # Historique paginé d'un salon (keyset sur timestamp, id)
+            models.Index(fields=['room', 'timestamp', 'id'])
+        ]
 
     def __str__(self):
         return self.content
 
 
 class GameInvite(models.Model):
+    """Issue d'une invitation de jeu ; les invitations en attente vivent dans le cache (chat/invites.py)"""
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='sent_invites', on_delete=models.CASCADE)
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='received_invites', on_delete=models.CASCADE)
     timestamp = models.DateTimeField(default=timezone.now)
@@ -48,31 +255,38 @@ class GameInvite(models.Model):
         
     def __str__(self):
         return f"{self.sender} -> {self.recipient} ({self.status})"
-    
-    @property
-    def is_expired(self):
-        return timezone.now() > self.timestamp + timedelta(minutes=3)
-    
-    @classmethod
-    def clean_expired_invites(cls):
-        expired_time = timezone.now() - timedelta(minutes=3)
-        cls.objects.filter(
-            status='pending',
-            timestamp__lt=expired_time
-        ).delete()
 
 
 class Tournament(models.Model):
     """Modèle représentant un tournoi de Pong"""
+    ELIMINATION = 'elimination'
+    SWISS = 'swiss'
+    SYSTEM_CHOICES = [
+        (ELIMINATION, 'Élimination directe'),
+        (SWISS, 'Système suisse'),
+    ]
+
     name = models.CharField(max_length=100)
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_tournaments")
     start_date = models.DateTimeField(default=timezone.now)
     end_date = models.DateTimeField(null=True, blank=True)
-    max_participants = models.IntegerField(default=8)  # Doit être une puissance de 2 (4, 8, 16, etc.)
+    # Taille quelconque : les joueurs en surnombre par rapport à une puissance de 2 sont exemptés (chat/bracket.py)
+    max_participants = models.IntegerField(default=8)
     is_active = models.BooleanField(default=True)
     is_completed = models.BooleanField(default=False)
     winner = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="won_tournaments", null=True, blank=True)
     current_round = models.IntegerField(default=1)
+    # Places occupées, tenues à jour par join / leave / bots.allocate : aucune inscription ne recompte
+    seats_taken = models.IntegerField(default=0)
+    system = models.CharField(max_length=20, choices=SYSTEM_CHOICES, default=ELIMINATION)
+    # Nombre de rondes du système suisse, fixé au démarrage (log2 du nombre de joueurs, arrondi au-dessus)
+    swiss_rounds = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Sections du lobby : les plus récents d'abord, pagination par (start_date, id)
+            models.Index(fields=['is_completed', '-start_date', '-id'], name='tournament_lobby_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.creator.username})"
@@ -81,63 +295,62 @@ class Tournament(models.Model):
         """Vérifie si les inscriptions sont toujours ouvertes"""
         return (self.is_active and 
                 not self.is_completed and 
-                self.participants.count() < self.max_participants and
+                self.seats_taken < self.max_participants and
                 not TournamentMatch.objects.filter(tournament=self).exists())
+
+    @classmethod
+    def join(cls, tournament_id, user, alias=None):
+        """
+        Inscription idempotente : retourne (participant, created), ou (None, False) si les inscriptions
+        sont fermées. La place est prise par un UPDATE conditionnel (seats_taken < max_participants),
+        qui ne verrouille la ligne du tournoi que le temps d'une transaction courte : des inscriptions
+        simultanées se suivent sans jamais dépasser le nombre de places.
+        """
+        participant = TournamentParticipant.objects.filter(tournament_id=tournament_id, user=user).first()
+        if participant is not None:
+            return participant, False
+        try:
+            with transaction.atomic():
+                claimed = cls.objects.filter(
+                    ~Exists(TournamentMatch.objects.filter(tournament=OuterRef('pk'))),
+                    id=tournament_id,
+                    is_active=True,
+                    is_completed=False,
+                    seats_taken__lt=F('max_participants')
+                ).update(seats_taken=F('seats_taken') + 1)
+                if not claimed:
+                    return None, False
+                return TournamentParticipant.objects.create(tournament_id=tournament_id, user=user, alias=alias), True
+        except IntegrityError:
+            # Même utilisateur inscrit en parallèle : le rollback a rendu la place prise ici
+            return TournamentParticipant.objects.get(tournament_id=tournament_id, user=user), False
+
+    def leave(self, user):
+        """
+        Désinscription avant le premier tour, sous verrou de la ligne du tournoi (exclusive avec le démarrage).
+        Retourne True si une place a été rendue.
+        """
+        with transaction.atomic():
+            Tournament.objects.select_for_update().get(id=self.id)
+            if TournamentMatch.objects.filter(tournament=self).exists():
+                return False
+            deleted, _ = TournamentParticipant.objects.filter(tournament=self, user=user).delete()
+            if deleted:
+                Tournament.objects.filter(id=self.id).update(seats_taken=Greatest(F('seats_taken') - 1, 0))
+        return bool(deleted)
     
     def generate_first_round(self):
-        """Crée les matchs du premier tour"""
-        participants = list(self.participants.all())
-        import random
-        random.shuffle(participants)
-        
-        matches_created = 0
-        while len(participants) >= 2:
-            player1 = participants.pop(0).user
-            player2 = participants.pop(0).user
-            
-            TournamentMatch.objects.create(
-                tournament=self,
-                player1=player1,
-                player2=player2,
-                round=1
-            )
-            matches_created += 1
-        
-        return matches_created > 0
+        """Crée les matchs du premier tour (lève bracket.BracketError si le tournoi a commencé)"""
+        from chat import bracket
+
+        bracket.start(self)
+        return True
 
     def advance_round(self):
         """Avance le tournoi au prochain tour"""
-        current_matches = TournamentMatch.objects.filter(
-            tournament=self, 
-            round=self.current_round,
-            is_completed=True
-        )
-        
-        winners = [match.winner for match in current_matches]
-        
-        if len(winners) == 1:
-            # Tournoi terminé
-            self.is_completed = True
-            self.winner = winners[0]
-            self.end_date = timezone.now()
-            self.save()
-            return True
-            
-        # Créer les matchs du prochain tour
-        self.current_round += 1
-        while len(winners) >= 2:
-            player1 = winners.pop(0)
-            player2 = winners.pop(0)
-            
-            TournamentMatch.objects.create(
-                tournament=self,
-                player1=player1,
-                player2=player2,
-                round=self.current_round
-            )
-        
-        self.save()
-        return True
+        from chat import bracket
+
+        return bracket.advance(self)
 
 class TournamentParticipant(models.Model):
     """Participant à un tournoi"""
@@ -168,35 +381,82 @@ class TournamentMatch(models.Model):
     round = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     played_at = models.DateTimeField(null=True, blank=True)
+    # Heure limite d'un match avec un humain : passé ce délai, le worker déclare le forfait (chat/scheduler.py)
+    deadline = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deadline'], condition=models.Q(is_completed=False), name='tournament_match_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.player1.username} vs {self.player2.username} (Round {self.round})"
     
     def complete_match(self, player1_score, player2_score):
-        """Termine le match avec les scores donnés"""
-        self.player1_score = player1_score
-        self.player2_score = player2_score
-        self.is_completed = True
-        self.played_at = timezone.now()
-        
-        if player1_score > player2_score:
-            self.winner = self.player1
-        else:
-            self.winner = self.player2
-            
-        self.save()
-        
-        # Vérifier si tous les matchs du tour sont terminés
-        round_matches = TournamentMatch.objects.filter(
-            tournament=self.tournament,
-            round=self.tournament.current_round
-        )
-        
-        if round_matches.filter(is_completed=False).count() == 0:
-            # Tous les matchs du tour sont terminés, passer au tour suivant
-            self.tournament.advance_round()
+        """Termine le match avec les scores donnés et avance le tableau si le tour est terminé"""
+        from chat import bracket
+
+        bracket.record_result(self, player1_score, player2_score)
+
+
+class TournamentJob(models.Model):
+    """
+    Travail différé sur un tournoi, exécuté par le worker (manage.py tournament_worker).
+    Un seul travail de chaque sorte en attente par tournoi : un second enregistrement est ignoré.
+    """
+    START = 'start'
+    ADVANCE = 'advance'
+    KIND_CHOICES = [
+        (START, 'Démarrage'),
+        (ADVANCE, 'Avancement du tableau'),
+    ]
+
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="jobs")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'kind'], name='tournament_job_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['run_at'], name='tournament_job_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.tournament_id})"
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_summary(sender, instance, update_fields=None, **kwargs):
+    """Invalide le résumé mis en cache (chat/users.py) ; une simple connexion (last_login) ne le change pas"""
+    from chat import users
+
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    users.invalidate(instance.pk)
+
+@receiver(m2m_changed, sender=UserProfile.blocked_users.through)
+def invalidate_block_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalide le cache de blocages des deux côtés de chaque relation modifiée"""
+    from chat import blocking
+
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance est l'utilisateur bloqué, pk_set contient des UserProfile
+        profiles = instance.chat_blocked_by.all() if pk_set is None else UserProfile.objects.filter(pk__in=pk_set)
+        user_ids = [instance.pk, *profiles.values_list('user_id', flat=True)]
+    else:
+        others = instance.blocked_users.values_list('id', flat=True) if pk_set is None else pk_set
+        user_ids = [instance.user_id, *others]
+
+    blocking.invalidate(*user_ids)
@@ -0,0 +1,92 @@
+# chat/pagination.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(value, pk):
+    raw = f"{value}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode(cursor, parse):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        return parse(value), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(f"Curseur invalide: {cursor}")
+
+
+def encode_cursor(timestamp, pk):
+    """Encode une position (timestamp, id) en curseur opaque pour le client"""
+    return _encode(timestamp.isoformat(), pk)
+
+
+def decode_cursor(cursor):
+    """Décode un curseur produit par encode_cursor et retourne (timestamp, id)"""
+    return _decode(cursor, datetime.fromisoformat)
+
+
+def encode_rank_cursor(rank, pk):
+    """Encode une position (score de pertinence, id) ; repr() garantit un aller-retour exact du float"""
+    return _encode(repr(rank), pk)
+
+
+def decode_rank_cursor(cursor):
+    return _decode(cursor, float)
+
+
+def encode_name_cursor(name, pk):
+    """Encode une position (nom, id) pour un tri alphabétique"""
+    return _encode(name, pk)
+
+
+def decode_name_cursor(cursor):
+    return _decode(cursor, str)
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Lit le paramètre `limit` d'une requête en le bornant à MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_filter(cursor, direction, field='timestamp'):
+    """
+    Construit le filtre Q strictement avant/après un curseur (field, id).
+    Équivalent de `(field, id) < (ts, pk)` que Postgres sait servir par index.
+    """
+    timestamp, pk = decode_cursor(cursor)
+    # La borne large (<= / >=) permet au planner de démarrer le parcours d'index au curseur
+    if direction == 'before':
+        return Q(**{f'{field}__lte': timestamp}) & (
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+        )
+    return Q(**{f'{field}__gte': timestamp}) & (
+        Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+    )
+
+
+def rank_filter(cursor, field='rank'):
+    """Filtre Q strictement après un curseur de encode_rank_cursor, pour un tri (-field, -id)"""
+    rank, pk = decode_rank_cursor(cursor)
+    return Q(**{f'{field}__lt': rank}) | Q(**{field: rank, 'id__lt': pk})
+
+
+def name_filter(cursor, field='username'):
+    """Filtre Q strictement après un curseur de encode_name_cursor, pour un tri (field, id)"""
+    name, pk = decode_name_cursor(cursor)
+    return Q(**{f'{field}__gt': name}) | Q(**{field: name, 'id__gt': pk})
@@ -0,0 +1,180 @@
+# chat/partitions.py
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+# chat_message est partitionnée par mois sur timestamp (migration 0017) :
+# une partition chat_message_pAAAAMM par mois, plus chat_message_default pour les
+# messages hors de toute partition mensuelle (horodatage client erroné, mois non créé).
+TABLE = 'chat_message'
+DEFAULT_PARTITION = 'chat_message_default'
+COLUMNS = 'id, content, "timestamp", is_read, recipient_id, sender_id, is_game_invite'
+PARTITION_RE = re.compile(r'^chat_message_p(\d{4})(\d{2})$')
+
+
+def month_of(value):
+    """Premier jour du mois d'une date, d'un datetime ou d'une chaîne AAAA-MM"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m')
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def archive_path(directory, month):
+    return os.path.join(directory, f'{partition_name(month)}.csv.gz')
+
+
+def _bounds(month):
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    upper_month = next_month(month)
+    upper = datetime(upper_month.year, upper_month.month, 1, tzinfo=timezone.utc)
+    return f"'{lower.isoformat()}'", f"'{upper.isoformat()}'"
+
+
+def list_partitions(cursor):
+    """Mois des partitions attachées à chat_message, du plus ancien au plus récent"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        [TABLE]
+    )
+    months = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _attach(cursor, month):
+    """
+    Attache une table préparée comme partition du mois, en y déplaçant d'abord les lignes
+    du mois tombées dans la partition par défaut (sinon l'attachement est refusé).
+    La contrainte CHECK temporaire évite à Postgres de re-scanner la table à l'attachement.
+    """
+    name = partition_name(month)
+    lower, upper = _bounds(month)
+    in_month = f'"timestamp" >= {lower} AND "timestamp" < {upper}'
+
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING {COLUMNS}) '
+        f'INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved'
+    )
+    cursor.execute(f'ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK ({in_month})')
+    cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})')
+    cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT {name}_bounds')
+
+
+def _create_detached(cursor, month):
+    cursor.execute(f'CREATE TABLE {partition_name(month)} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)')
+
+
+def ensure_partitions(months_ahead=2, today=None):
+    """Crée les partitions du mois courant et des months_ahead mois suivants ; retourne les mois créés"""
+    month = month_of(today or datetime.now(timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = set(list_partitions(cursor))
+        for _ in range(months_ahead + 1):
+            if month not in existing:
+                _create_detached(cursor, month)
+                _attach(cursor, month)
+                created.append(month)
+            month = next_month(month)
+    return created
+
+
+def archive_partition(month, directory):
+    """
+    Exporte la partition d'un mois vers un CSV compressé puis la supprime.
+    Le fichier est écrit avant la suppression, dans la même transaction : en cas d'échec
+    la partition reste attachée.
+    Retourne (chemin du fichier, nombre de messages).
+    """
+    name = partition_name(month)
+    path = archive_path(directory, month)
+    if os.path.exists(path):
+        raise FileExistsError(f"L'archive {path} existe déjà")
+    os.makedirs(directory, exist_ok=True)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if month not in list_partitions(cursor):
+            raise LookupError(f"Aucune partition {name}")
+
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+        # Les résumés de conversation ne doivent pas pointer vers des messages archivés
+        cursor.execute(f'UPDATE chat_conversation SET last_message_id = NULL WHERE last_message_id IN (SELECT id FROM {name})')
+
+        rows = 0
+        tmp_path = f'{path}.tmp'
+        try:
+            with gzip.open(tmp_path, 'wb') as archive:
+                with cursor.copy(f'COPY (SELECT {COLUMNS} FROM {name} ORDER BY id) TO STDOUT (FORMAT csv, HEADER)') as copy:
+                    for data in copy:
+                        archive.write(data)
+            cursor.execute(f'SELECT count(*) FROM {name}')
+            rows = cursor.fetchone()[0]
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        cursor.execute(f'DROP TABLE {name}')
+    return path, rows
+
+
+def restore_partition(month, directory):
+    """
+    Réimporte une archive produite par archive_partition et la rattache comme partition.
+    Les messages dont l'expéditeur ou le destinataire a supprimé son compte depuis
+    l'archivage sont écartés ; le fichier est ensuite renommé en .restored.
+    Retourne (messages restaurés, messages écartés).
+    """
+    name = partition_name(month)
+    path = archive_path(directory, month)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Archive introuvable: {path}")
+    users_table = get_user_model()._meta.db_table
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if month in list_partitions(cursor):
+            raise FileExistsError(f"La partition {name} existe déjà")
+
+        _create_detached(cursor, month)
+        with gzip.open(path, 'rb') as archive:
+            with cursor.copy(f'COPY {name} ({COLUMNS}) FROM STDIN (FORMAT csv, HEADER)') as copy:
+                while data := archive.read(1024 * 1024):
+                    copy.write(data)
+
+        cursor.execute(
+            f'DELETE FROM {name} m WHERE NOT EXISTS (SELECT 1 FROM {users_table} u WHERE u.id = m.sender_id) '
+            f'OR NOT EXISTS (SELECT 1 FROM {users_table} u WHERE u.id = m.recipient_id)'
+        )
+        dropped = cursor.rowcount
+        _attach(cursor, month)
+
+        # Rétablir le dernier message des conversations dont il avait été archivé
+        cursor.execute(
+            f'UPDATE chat_conversation c SET last_message_id = m.id FROM {name} m '
+            'WHERE c.last_message_id IS NULL AND m."timestamp" = c.last_message_at '
+            'AND ((m.sender_id = c.user_a_id AND m.recipient_id = c.user_b_id) '
+            'OR (m.sender_id = c.user_b_id AND m.recipient_id = c.user_a_id))'
+        )
+        cursor.execute(f'SELECT count(*) FROM {name}')
+        restored = cursor.fetchone()[0]
+
+    # Conserver l'archive sans bloquer un futur archivage du même mois
+    os.replace(path, f'{path}.restored')
+    return restored, dropped
@@ -0,0 +1,120 @@
+# chat/presence.py
+import time
+
+from chat import redis_client
+
+# Présence alimentée par les connexions WebSocket (ChatConsumer) et leurs heartbeats.
+# Chaque utilisateur a un ZSET Redis {channel_name: expiration} : un onglet = une connexion,
+# l'utilisateur est en ligne tant qu'au moins une connexion n'a pas expiré.
+# Les écritures passent par le client Redis du chat (chat/redis_client.py) en commandes atomiques
+# (ZADD, ZREM, ZREMRANGEBYSCORE dans une transaction MULTI) : deux onglets qui se connectent,
+# se déconnectent ou envoient leur heartbeat en même temps ne peuvent pas écraser l'entrée de l'autre.
+# Une connexion perdue sans déconnexion propre (worker tué) expire d'elle-même après PRESENCE_TTL ;
+# l'index USERS_KEY (utilisateur → dernière expiration) permet à sweep() de retrouver les
+# utilisateurs passés hors ligne de cette façon pour annoncer leur départ.
+CACHE_KEY = 'chat:presence:{}'
+USERS_KEY = 'chat:presence:users'
+HEARTBEAT_INTERVAL = 30  # secondes, doit rester cohérent avec chat-component.js
+PRESENCE_TTL = 3 * HEARTBEAT_INTERVAL
+
+_next_sweep = 0.0
+
+
+def _redis():
+    return redis_client.get()
+
+
+def _key(user_id):
+    return CACHE_KEY.format(user_id)
+
+
+def _users_key():
+    return USERS_KEY
+
+
+def touch(user_id, channel_name):
+    """
+    Enregistre ou prolonge une connexion (connect et heartbeat).
+    Retourne True si l'utilisateur vient de passer en ligne.
+    """
+    key = _key(user_id)
+    now = time.time()
+    expires = now + PRESENCE_TTL
+    pipe = _redis().pipeline()
+    pipe.zremrangebyscore(key, '-inf', now)
+    pipe.zadd(key, {channel_name: expires})
+    pipe.zcard(key)
+    pipe.expire(key, PRESENCE_TTL)
+    pipe.zadd(_users_key(), {user_id: expires}, gt=True)
+    _, added, count, _, _ = pipe.execute()
+    return bool(added) and count == 1
+
+
+def leave(user_id, channel_name):
+    """
+    Retire une connexion (disconnect).
+    Retourne True si l'utilisateur n'a plus aucune connexion ouverte.
+    Si la connexion avait déjà expiré, son départ a été (ou sera) annoncé par sweep().
+    """
+    key = _key(user_id)
+    pipe = _redis().pipeline()
+    pipe.zrem(key, channel_name)
+    pipe.zremrangebyscore(key, '-inf', time.time())
+    pipe.zcard(key)
+    removed, _, count = pipe.execute()
+    if not removed or count:
+        return False
+    # Retiré de l'index seulement s'il a bien quitté : un retrait déjà fait par sweep() n'est pas annoncé deux fois
+    return bool(_redis().zrem(_users_key(), user_id))
+
+
+def sweep():
+    """
+    Utilisateurs dont toutes les connexions ont expiré sans déconnexion propre.
+    Chaque utilisateur échu est réclamé par ZREM : un seul appelant (processus ou worker) l'annonce.
+    Un utilisateur encore connecté est remis dans l'index avec sa prochaine expiration.
+    """
+    client = _redis()
+    users_key = _users_key()
+    now = time.time()
+    offline = []
+    for member in client.zrangebyscore(users_key, '-inf', now):
+        if not client.zrem(users_key, member):
+            continue
+        user_id = int(member)
+        key = _key(user_id)
+        pipe = client.pipeline()
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zrange(key, -1, -1, withscores=True)
+        _, latest = pipe.execute()
+        if latest:
+            client.zadd(users_key, {user_id: latest[0][1]}, gt=True)
+        else:
+            offline.append(user_id)
+    return offline
+
+
+def sweep_due():
+    """Vrai au plus une fois par HEARTBEAT_INTERVAL et par processus (appelé à chaque heartbeat)"""
+    global _next_sweep
+    now = time.monotonic()
+    if now < _next_sweep:
+        return False
+    _next_sweep = now + HEARTBEAT_INTERVAL
+    return True
+
+
+def get_presence(user_ids):
+    """Présence de plusieurs utilisateurs en un aller-retour Redis : {user_id: bool}"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    now = time.time()
+    pipe = _redis().pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.zcount(_key(user_id), f'({now}', '+inf')
+    return {user_id: count > 0 for user_id, count in zip(user_ids, pipe.execute())}
+
+
+def is_online(user_id):
+    return get_presence([user_id])[user_id]
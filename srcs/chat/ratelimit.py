@@ -0,0 +1,118 @@
+# chat/ratelimit.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Limitation du débit des trames reçues sur ws/chat/, par type de trame (settings.CHAT_RATE_LIMITS).
+# Deux niveaux :
+# - un seau à jetons en mémoire par connexion (`rate` jetons par seconde, `burst` au maximum),
+#   vérifié avant tout accès à Redis ou à la base : un onglet qui s'emballe est coupé sans coût ;
+# - un compteur par utilisateur et par minute dans le cache, partagé entre ses onglets et les workers,
+#   pour qu'ouvrir plusieurs sockets ne multiplie pas le débit autorisé.
+# Les trames refusées ne reçoivent pas chacune une erreur : un seul `rate_limited` par type
+# et par NACK_INTERVAL, avec le nombre de trames ignorées depuis le précédent.
+USER_KEY = 'chat:rate:{}:{}:{}'
+DROPS_KEY = 'chat:rate:drops:{}'
+DEFAULT = 'default'
+WINDOW = 60  # secondes
+NACK_INTERVAL = 1.0  # secondes
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self):
+        """Secondes avant le prochain jeton"""
+        return round(max(0.0, (1 - self.tokens) / self.rate), 2)
+
+
+def limit_name(message_type):
+    """Type de trame connu, sinon DEFAULT (le client ne choisit pas les clés de cache créées)"""
+    return message_type if message_type in settings.CHAT_RATE_LIMITS else DEFAULT
+
+
+def user_allows(user_id, name):
+    """Compte une trame dans la fenêtre courante de l'utilisateur (INCR atomique, tous sockets confondus)"""
+    per_minute = settings.CHAT_RATE_LIMITS[name]['per_minute']
+    key = USER_KEY.format(user_id, name, int(time.time() // WINDOW))
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        count = 1 if cache.add(key, 1, WINDOW * 2) else cache.incr(key)
+    return count <= per_minute
+
+
+def window_reset():
+    """Secondes avant la fenêtre par utilisateur suivante"""
+    return round(WINDOW - time.time() % WINDOW, 2)
+
+
+def record_drops(name, count):
+    """Compteur global des trames refusées par type, incrémenté une fois par NACK et non par trame"""
+    key = DROPS_KEY.format(name)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key, count)
+
+
+def drop_counters():
+    names = list(settings.CHAT_RATE_LIMITS)
+    found = cache.get_many([DROPS_KEY.format(name) for name in names])
+    return {name: found.get(DROPS_KEY.format(name), 0) for name in names}
+
+
+class ConnectionLimiter:
+    """État de limitation d'une connexion : seaux par type et trames refusées en attente de NACK"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.pending = {}
+        self.last_nack = {}
+        self.dropped = 0
+
+    def take(self, name):
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            limit = settings.CHAT_RATE_LIMITS[name]
+            bucket = self.buckets[name] = TokenBucket(limit['rate'], limit['burst'])
+        return bucket.take()
+
+    def drop(self, name, retry_after=None):
+        """
+        Enregistre une trame refusée. Retourne le NACK à envoyer et le nombre de trames qu'il couvre,
+        ou (None, 0) si un NACK pour ce type est parti il y a moins de NACK_INTERVAL.
+        `retry_after` remplace le délai du seau de la connexion (refus par la limite de l'utilisateur).
+        """
+        self.dropped += 1
+        self.pending[name] = self.pending.get(name, 0) + 1
+        now = time.monotonic()
+        if now - self.last_nack.get(name, 0.0) < NACK_INTERVAL:
+            return None, 0
+        self.last_nack[name] = now
+        count = self.pending.pop(name)
+        if retry_after is None:
+            retry_after = self.buckets[name].retry_after()
+        return {
+            'type': 'rate_limited',
+            'message_type': name,
+            'dropped': count,
+            'retry_after': retry_after
+        }, count
+
+    def flush(self):
+        """Trames refusées non encore couvertes par un NACK (à comptabiliser à la déconnexion)"""
+        pending, self.pending = self.pending, {}
+        return pending
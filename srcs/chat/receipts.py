@@ -0,0 +1,40 @@
+# chat/receipts.py
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from chat import blocking, wire
+
+logger = logging.getLogger(__name__)
+
+# Événements d'une lecture de conversation (Conversation.mark_read), identiques qu'elle vienne
+# du WebSocket (`mark_read`) ou de l'ouverture de la conversation (get_user_messages) :
+# `unread_update` pour le badge des autres onglets du lecteur, et `read_receipt` pour
+# l'expéditeur quand des messages viennent d'être lus (sauf blocage entre les deux).
+
+
+def events(user_id, other_id, count, unread, message_id=None):
+    """[(groupe, événement)] à diffuser après que user_id a lu count messages de other_id"""
+    result = [(f"user_{user_id}", wire.prepare({
+        'type': 'unread_update',
+        'user_id': other_id,
+        'unread': unread
+    }))]
+    if count and not blocking.is_blocked(user_id, other_id):
+        result.append((f"user_{other_id}", wire.prepare({
+            'type': 'read_receipt',
+            'user_id': user_id,
+            'message_id': message_id
+        })))
+    return result
+
+
+def publish(user_id, other_id, count, unread, message_id=None):
+    """Diffusion depuis le code synchrone (vues) ; un échec n'annule pas la lecture enregistrée"""
+    channel_layer = get_channel_layer()
+    try:
+        for group, event in events(user_id, other_id, count, unread, message_id):
+            async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        logger.exception("Erreur lors de la diffusion de la lecture de %s", user_id)
@@ -0,0 +1,15 @@
+# chat/redis_client.py
+import redis
+from django.conf import settings
+
+# Client Redis des modules du chat qui utilisent des structures Redis au-delà de l'API du cache
+# de Django (ZSET de présence, listes de reprise). Construit depuis settings.CHAT_REDIS_URL,
+# par défaut la base du cache partagé ; redis-py gère son propre pool de connexions, sûr entre threads.
+_client = None
+
+
+def get():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.CHAT_REDIS_URL)
+    return _client
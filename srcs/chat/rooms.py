@@ -0,0 +1,65 @@
+# chat/rooms.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from chat import wire
+
+# Salons à plusieurs : un groupe du channel layer par salon (room_<id>).
+# Une connexion s'y abonne après vérification de l'adhésion (`room_subscribe` sur ws/chat/).
+# Un message est enregistré une seule fois puis diffusé par un unique group_send, encodé une fois
+# par format et par processus (wire.prepare) : c'est le channel layer qui le distribue aux connexions abonnées,
+# au lieu d'un group_send par destinataire.
+
+
+def group_name(room_id):
+    return f"room_{room_id}"
+
+
+def role(room_id, user_id):
+    """Rôle de user_id dans le salon, None s'il n'en est pas membre"""
+    from chat.models import RoomMembership
+
+    return RoomMembership.objects.filter(room_id=room_id, user_id=user_id).values_list('role', flat=True).first()
+
+
+def post_message(room_id, sender, content):
+    """
+    Enregistre le message et retourne l'événement à diffuser au groupe du salon,
+    ou None si sender n'en est plus membre (exclu depuis son abonnement).
+    L'adhésion est verrouillée jusqu'à l'INSERT : une exclusion concurrente attend le message ou le refuse.
+    """
+    from chat.models import RoomMembership, RoomMessage
+
+    with transaction.atomic():
+        membership = RoomMembership.objects.select_for_update().filter(room_id=room_id, user_id=sender.id)
+        if membership.values_list('id', flat=True).first() is None:
+            return None
+        message = RoomMessage.objects.create(room_id=room_id, sender=sender, content=content)
+    return {
+        'type': 'room_message',
+        'room_id': room_id,
+        'message_id': message.id,
+        'message': content,
+        'sender': sender.username,
+        'sender_id': sender.id,
+        'timestamp': message.timestamp.isoformat()
+    }
+
+
+def notify_member(room_id, room_name, user_id, username, status):
+    """
+    Arrivée ('added') ou départ ('removed') d'un membre.
+    Les membres abonnés reçoivent `room_member` par le groupe du salon ; l'intéressé reçoit
+    `room_membership` sur son groupe personnel, pour que ses connexions s'abonnent ou se désabonnent.
+    """
+    channel_layer = get_channel_layer()
+    event = {
+        'room_id': room_id,
+        'name': room_name,
+        'user_id': user_id,
+        'username': username,
+        'status': status
+    }
+    async_to_sync(channel_layer.group_send)(group_name(room_id), wire.prepare({'type': 'room_member', **event}))
+    async_to_sync(channel_layer.group_send)(f"user_{user_id}", wire.prepare({'type': 'room_membership', **event}))
@@ -0,0 +1,128 @@
+# chat/scheduler.py
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from chat import bots, bracket
+
+logger = logging.getLogger(__name__)
+
+# Travaux différés des tournois, exécutés hors des requêtes HTTP par manage.py tournament_worker.
+# Les vues se contentent d'enregistrer un travail (table TournamentJob) dans leur transaction :
+# démarrage (bots puis premier tour) ou avancement du tableau quand un tour est terminé.
+# Un worker réclame le prochain travail échu avec SELECT ... FOR UPDATE SKIP LOCKED et l'exécute dans
+# la même transaction : plusieurs workers se partagent la file, un worker arrêté en cours de route
+# laisse le travail en place, et un avancement demandé pendant l'exécution attend le verrou du tournoi
+# puis crée un nouveau travail au lieu d'être absorbé par celui en cours.
+# À chaque passage, le worker déclare aussi forfait les matchs dont l'heure limite est dépassée.
+START = 'start'
+ADVANCE = 'advance'
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 5  # secondes, doublé à chaque nouvel échec
+
+
+def enqueue(tournament_id, kind, delay=0):
+    """Enregistre un travail, visible du worker à la validation de la transaction ; un doublon est ignoré"""
+    from chat.models import TournamentJob
+
+    TournamentJob.objects.bulk_create(
+        [TournamentJob(tournament_id=tournament_id, kind=kind, run_at=timezone.now() + timedelta(seconds=delay))],
+        ignore_conflicts=True
+    )
+
+
+def _perform(job):
+    from chat.models import Tournament
+
+    tournament = Tournament.objects.get(pk=job.tournament_id)
+    if job.kind == START:
+        bots.allocate(tournament)
+        bracket.start(tournament)
+    else:
+        bracket.advance(tournament)
+
+
+def run_next():
+    """
+    Exécute le prochain travail échu. Une erreur passagère le repousse avec un délai croissant.
+    Retourne False si la file est vide.
+    """
+    from accounts.models import Notification
+    from chat.models import TournamentJob
+
+    with transaction.atomic():
+        job = (
+            TournamentJob.objects.select_for_update(skip_locked=True)
+            .select_related('tournament')
+            .filter(run_at__lte=timezone.now())
+            .order_by('run_at')
+            .first()
+        )
+        if job is None:
+            return False
+        try:
+            with transaction.atomic():
+                _perform(job)
+        except bracket.BracketError as e:
+            # Refus définitif (tournoi déjà commencé, pas assez de joueurs...) : pas de nouvel essai
+            logger.warning(f"Travail {job.kind} du tournoi {job.tournament_id} abandonné: {e}")
+            if job.kind == START:
+                Notification.objects.create(
+                    user_id=job.tournament.creator_id,
+                    message=f"Le tournoi '{job.tournament.name}' n'a pas pu démarrer : {e}",
+                    type='error'
+                )
+        except Exception as e:
+            job.attempts += 1
+            if job.attempts < MAX_ATTEMPTS:
+                logger.warning(
+                    f"Erreur du travail {job.kind} du tournoi {job.tournament_id} (essai {job.attempts}): {e}", exc_info=True
+                )
+                job.run_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+                job.save(update_fields=['attempts', 'run_at'])
+                return True
+            logger.error(
+                f"Travail {job.kind} du tournoi {job.tournament_id} abandonné après {job.attempts} essais: {e}", exc_info=True
+            )
+        job.delete()
+    return True
+
+
+def expire_matches():
+    """Déclare forfait les matchs dont l'heure limite est passée, tournoi par tournoi. Retourne le nombre de forfaits."""
+    from chat.models import TournamentMatch
+
+    tournament_ids = set(
+        TournamentMatch.objects.filter(is_completed=False, deadline__lte=timezone.now())
+        .values_list('tournament_id', flat=True)
+    )
+    forfeits = 0
+    for tournament_id in tournament_ids:
+        try:
+            forfeits += bracket.forfeit_expired(tournament_id)
+        except Exception as e:
+            logger.exception(f"Erreur lors des forfaits du tournoi {tournament_id}: {e}")
+    return forfeits
+
+
+def run_once():
+    """Un passage du worker : jusqu'à BATCH_SIZE travaux échus, puis les forfaits. Retourne le nombre de travaux exécutés."""
+    count = 0
+    while count < BATCH_SIZE and run_next():
+        count += 1
+    expire_matches()
+    return count
+
+
+def run_forever(interval=None):
+    """Boucle du worker ; l'attente n'a lieu que lorsque la file est vide"""
+    interval = settings.TOURNAMENT_WORKER_INTERVAL if interval is None else interval
+    while True:
+        close_old_connections()
+        if run_once() < BATCH_SIZE:
+            time.sleep(interval)
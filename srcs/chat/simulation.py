@@ -0,0 +1,162 @@
+# chat/simulation.py
+import numpy as np
+
+# Simulation sans affichage des matchs bot contre bot, avec les règles de static/js/pong.js.
+# Chaque raquette est pilotée par l'IA du jeu à la difficulté du bot : computerMoveEsMd (facile,
+# moyen : réaction une image sur deux environ, erreur de visée, fausse anticipation en facile) ou
+# computerMoveHard (prédiction du point d'arrivée avec rebonds). La raquette de gauche joue l'IA en miroir.
+# Tous les matchs d'un tour avancent ensemble, image par image, sur des tableaux NumPy : le coût
+# d'une image ne dépend presque pas du nombre de matchs, et les matchs terminés sont retirés des
+# tableaux au fil de l'eau.
+WIDTH = 640  # canvas de la page /pong
+HEIGHT = 420
+PLAYER_HEIGHT = 80
+PLAYER_WIDTH = 4
+PADDLE_MARGIN = 10
+BALL_INITIAL_SPEED = 2
+MAX_BALL_SPEED = 6
+AI_SPEED = 5
+WINNING_SCORE = 3
+FPS = 60
+# Durée maximale d'un match simulé (5 minutes de jeu), au-delà il est départagé au score puis au hasard
+MAX_FRAMES = 5 * 60 * FPS
+
+EASY, MEDIUM, HARD = 1, 2, 3
+DIFFICULTIES = {'es': EASY, 'md': MEDIUM, 'hd': HARD}
+LEFT_EDGE = PADDLE_MARGIN + PLAYER_WIDTH
+RIGHT_EDGE = WIDTH - PLAYER_WIDTH - PADDLE_MARGIN
+
+
+def _clip(values, low, high):
+    # np.minimum/np.maximum plutôt que np.clip, nettement plus coûteux sur de petits tableaux
+    return np.minimum(np.maximum(values, low), high)
+
+
+def difficulty(user_id):
+    """Difficulté attribuée à un bot ('es', 'md' ou 'hd'), stable d'un match à l'autre"""
+    return ('es', 'md', 'hd')[user_id % 3]
+
+
+class _Paddle:
+    """Raquette pilotée par l'IA de pong.js, pour tous les matchs en cours d'un côté du terrain"""
+
+    def __init__(self, levels):
+        self.y = np.full(levels.size, HEIGHT / 2 - PLAYER_HEIGHT / 2)
+        self.easy = levels == EASY
+        self.hard = levels == HARD
+        self.react = np.where(self.easy, 0.4, 0.7)
+        self.error = np.where(self.easy, 50, 20)
+        self.any_hard = self.hard.any()
+
+    def keep(self, mask):
+        for name in ('y', 'easy', 'hard', 'react', 'error'):
+            setattr(self, name, getattr(self, name)[mask])
+        self.any_hard = self.hard.any()
+
+    def move(self, ball_x, ball_y, speed_x, speed_y, rng):
+        """
+        Un déplacement vers la droite du terrain (computerMoveEsMd / computerMoveHard) ;
+        la raquette de gauche reçoit les abscisses et la vitesse horizontale en miroir.
+        """
+        # computerMoveEsMd : ne réagit qu'à une partie des images, vise la balle avec une erreur,
+        # et en facile part parfois dans la mauvaise direction
+        draws = rng.random((3, self.y.size))
+        diff = ball_y - PLAYER_HEIGHT / 2 + (draws[1] * self.error * 2 - self.error) - self.y
+        diff = np.where(self.easy & (draws[2] > 0.7), -diff, diff)
+        moved = np.where(draws[0] <= self.react, self.y + _clip(diff, -AI_SPEED, AI_SPEED), self.y)
+
+        # computerMoveHard : point d'arrivée de la balle, replié sur la hauteur du terrain à chaque rebond
+        if self.any_hard:
+            predicted = np.mod(ball_y + speed_y * (WIDTH - ball_x) / speed_x, 2 * HEIGHT)
+            predicted = np.where(predicted > HEIGHT, 2 * HEIGHT - predicted, predicted)
+            diff = predicted - self.y - PLAYER_HEIGHT / 2
+            moved = np.where(self.hard, self.y + _clip(diff, -AI_SPEED, AI_SPEED), moved)
+
+        self.y = _clip(moved, 0, HEIGHT - PLAYER_HEIGHT)
+
+
+def simulate(levels1, levels2, rng=None, max_frames=MAX_FRAMES):
+    """
+    Joue len(levels1) matchs en parallèle (joueur 1 à gauche, joueur 2 à droite) et retourne
+    les scores (scores1, scores2), le gagnant ayant WINNING_SCORE points.
+    La vitesse de la balle suit la difficulté du meilleur des deux bots (DIFFICULTY de pong.js).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    levels1 = np.asarray(levels1)
+    levels2 = np.asarray(levels2)
+    count = levels1.size
+    scores1 = np.zeros(count, dtype=int)
+    scores2 = np.zeros(count, dtype=int)
+
+    # Deux IA difficiles ne manquent jamais la balle : l'échange serait sans fin,
+    # ces matchs sont départagés directement comme ceux qui atteignent max_frames
+    index = np.flatnonzero((levels1 != HARD) | (levels2 != HARD))
+    left = _Paddle(levels1[index])
+    right = _Paddle(levels2[index])
+    pace = np.maximum(levels1, levels2)[index].astype(float)
+    ball_x = np.full(index.size, WIDTH / 2)
+    ball_y = np.full(index.size, HEIGHT / 2)
+    # Premier service comme resetBall : sens tiré au sort sur chaque axe
+    serve = np.where(rng.random((2, index.size)) > 0.5, 1, -1) * BALL_INITIAL_SPEED * pace
+    speed_x, speed_y = serve[0], serve[1]
+
+    frame = 0
+    while index.size and frame < max_frames:
+        frame += 1
+        left.move(WIDTH - ball_x, ball_y, -speed_x, speed_y, rng)
+        right.move(ball_x, ball_y, speed_x, speed_y, rng)
+
+        # ballMove
+        prev_x, prev_y = ball_x, ball_y
+        ball_x = ball_x + speed_x
+        ball_y = ball_y + speed_y
+        speed_y = np.where((ball_y <= 0) | (ball_y >= HEIGHT), -speed_y, speed_y)
+
+        # collide : la balle franchit le bord d'une raquette pendant cette image
+        at_right = (ball_x >= RIGHT_EDGE) & (prev_x < RIGHT_EDGE)
+        at_left = (ball_x <= LEFT_EDGE) & (prev_x > LEFT_EDGE)
+        crossing = at_right | at_left
+        if not crossing.any():
+            continue
+
+        edge = np.where(at_right, RIGHT_EDGE, LEFT_EDGE)
+        paddle = np.where(at_right, right.y, left.y)
+        y_at = prev_y + speed_y * (edge - prev_x) / np.where(crossing, ball_x - prev_x, 1)
+        hit = crossing & (y_at >= paddle) & (y_at <= paddle + PLAYER_HEIGHT)
+        missed = crossing & ~hit
+
+        if hit.any():
+            speed_x = np.where(hit, _clip(speed_x * -1.2, -MAX_BALL_SPEED, MAX_BALL_SPEED), speed_x)
+            angle = (y_at - paddle) / PLAYER_HEIGHT * np.pi / 2
+            speed_y = np.where(hit, np.sin(angle) * (5 * pace / 2), speed_y)
+            ball_x = np.where(hit, edge, ball_x)
+            ball_y = np.where(hit, y_at, ball_y)
+
+        if missed.any():
+            # Point pour l'adversaire de la raquette manquée, puis resetBall
+            scores1[index[missed & at_right]] += 1
+            scores2[index[missed & at_left]] += 1
+            serve = np.where(rng.random((2, index.size)) > 0.5, 1, -1) * BALL_INITIAL_SPEED * pace
+            ball_x = np.where(missed, WIDTH / 2, ball_x)
+            ball_y = np.where(missed, HEIGHT / 2, ball_y)
+            speed_x = np.where(missed, serve[0], speed_x)
+            speed_y = np.where(missed, serve[1], speed_y)
+            left.y = np.where(missed, HEIGHT / 2 - PLAYER_HEIGHT / 2, left.y)
+            right.y = np.where(missed, HEIGHT / 2 - PLAYER_HEIGHT / 2, right.y)
+
+            playing = (scores1[index] < WINNING_SCORE) & (scores2[index] < WINNING_SCORE)
+            if not playing.all():
+                index, pace = index[playing], pace[playing]
+                ball_x, ball_y, speed_x, speed_y = ball_x[playing], ball_y[playing], speed_x[playing], speed_y[playing]
+                left.keep(playing)
+                right.keep(playing)
+
+    # Matchs sans fin : le joueur en tête marque le point décisif, tirage au sort à égalité
+    undecided = np.flatnonzero((scores1 < WINNING_SCORE) & (scores2 < WINNING_SCORE))
+    if undecided.size:
+        ahead1 = (scores1[undecided] > scores2[undecided]) | (
+            (scores1[undecided] == scores2[undecided]) & (rng.random(undecided.size) < 0.5)
+        )
+        scores1[undecided[ahead1]] = WINNING_SCORE
+        scores2[undecided[~ahead1]] = WINNING_SCORE
+    return scores1, scores2
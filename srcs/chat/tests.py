@@ -1,2 +1,581 @@
 # chat/tests.py
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from chat import (
+    bots, bracket, delivery, presence, ratelimit, redis_client, rooms, scheduler, simulation, tournaments, users, wire
+)
+from chat.models import (
+    Conversation, Message, Room, RoomMembership, RoomMessage, Tournament, TournamentJob, TournamentMatch,
+    TournamentParticipant
+)
+from chat.write_behind import MessageWriteBehind
+
+
+def redis_available():
+    try:
+        return redis_client.get().ping()
+    except Exception:
+        return False
+
+
+# Présence et file de livraison utilisent directement des structures Redis (settings.CHAT_REDIS_URL)
+requires_redis = skipUnless(redis_available(), 'Nécessite le serveur Redis du chat')
+
+
+class MessageHistoryTests(TestCase):
+    """Historique d'une conversation par curseurs : chaque message une seule fois, du plus récent au plus ancien"""
+
+    def test_cursor_walks_the_whole_conversation(self):
+        me = User.objects.create(username='me', email='me@example.com')
+        other = User.objects.create(username='other', email='other@example.com')
+        moment = timezone.now()
+        # Horodatages identiques deux à deux : l'identifiant départage le curseur
+        for i in range(7):
+            sender, recipient = (me, other) if i % 2 else (other, me)
+            Message.objects.create(sender=sender, recipient=recipient, content=f'm{i}', timestamp=moment + timedelta(seconds=i // 2))
+        self.client.force_login(me)
+        url = reverse('chat:get_user_messages', args=[other.id])
+
+        pages, cursor = [], None
+        while True:
+            data = self.client.get(url, {'limit': 3, **({'before': cursor} if cursor else {})}).json()
+            pages.append([message['content'] for message in data['messages']])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([content for page in reversed(pages) for content in page], [f'm{i}' for i in range(7)])
+
+
+@requires_redis
+class PresenceTests(SimpleTestCase):
+    """Présence multi-onglets : ZSET Redis par utilisateur, modifié par commandes atomiques"""
+
+    USER_ID = 424242
+
+    def tearDown(self):
+        presence._redis().delete(presence._key(self.USER_ID), presence._users_key())
+
+    def test_concurrent_tabs_are_all_kept(self):
+        channels = [f'tab{i}' for i in range(20)]
+        barrier = threading.Barrier(len(channels))
+
+        def connect(channel):
+            barrier.wait()
+            presence.touch(self.USER_ID, channel)
+
+        threads = [threading.Thread(target=connect, args=(channel,)) for channel in channels]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(presence._redis().zcard(presence._key(self.USER_ID)), len(channels))
+        for channel in channels[:-1]:
+            self.assertFalse(presence.leave(self.USER_ID, channel))
+        self.assertTrue(presence.is_online(self.USER_ID))
+        self.assertTrue(presence.leave(self.USER_ID, channels[-1]))
+        self.assertFalse(presence.is_online(self.USER_ID))
+
+    def test_expired_connection_is_announced_once(self):
+        self.assertTrue(presence.touch(self.USER_ID, 'tab'))
+        self.assertEqual(presence.sweep(), [])
+
+        later = time.time() + presence.PRESENCE_TTL + 1
+        with mock.patch('chat.presence.time.time', return_value=later):
+            self.assertFalse(presence.is_online(self.USER_ID))
+            self.assertEqual(presence.sweep(), [self.USER_ID])
+            self.assertEqual(presence.sweep(), [])
+            # Déconnexion tardive du même onglet : départ déjà annoncé
+            self.assertFalse(presence.leave(self.USER_ID, 'tab'))
+
+
+@requires_redis
+class DeliveryQueueTests(SimpleTestCase):
+    """File de reprise bornée : une liste Redis par utilisateur, tronquée à QUEUE_SIZE"""
+
+    USER_ID = 424243
+
+    def tearDown(self):
+        delivery._redis().delete(delivery.SEQ_KEY.format(self.USER_ID), delivery.QUEUE_KEY.format(self.USER_ID))
+
+    @mock.patch.object(delivery, 'QUEUE_SIZE', 3)
+    def test_queue_is_capped_and_gap_follows_its_head(self):
+        for i in range(5):
+            delivery.push(self.USER_ID, {'type': 'chat_message', 'message': f'm{i}'})
+
+        self.assertEqual(delivery._redis().llen(delivery.QUEUE_KEY.format(self.USER_ID)), 3)
+
+        current, events, gap = delivery.missed_since(self.USER_ID, 2)
+        self.assertEqual((current, [event['seq'] for event in events], gap), (5, [3, 4, 5], False))
+        self.assertTrue(delivery.missed_since(self.USER_ID, 1)[2])
+        self.assertEqual(delivery.missed_since(self.USER_ID, 5), (5, [], False))
+        self.assertTrue(delivery.missed_since(self.USER_ID, 9)[2])
+
+
+class WireTests(SimpleTestCase):
+    """Trames d'un événement de groupe : encodées à la demande, une fois par format et par processus"""
+
+    def test_group_event_is_encoded_once_per_format(self):
+        event = wire.prepare({'type': 'room_message', 'room_id': 1, 'message': 'salut'})
+        # Seul l'identifiant s'ajoute à l'événement transporté par le channel layer
+        self.assertEqual(set(event), {'type', 'room_id', 'message', wire.EVENT_ID})
+
+        with mock.patch.object(wire, 'encode_json', wraps=wire.encode_json) as encode_json:
+            frames = [wire.encode(dict(event), False) for _ in range(3)]
+        self.assertEqual(encode_json.call_count, 1)
+        self.assertEqual(wire.decode(frames[0]), {'type': 'room_message', 'room_id': 1, 'message': 'salut'})
+        self.assertEqual(wire.decode(bytes_data=wire.encode(event, True)), wire.decode(frames[0]))
+
+
+class RateLimitTests(SimpleTestCase):
+    """Seau à jetons d'une connexion : `burst` trames d'affilée, puis `rate` par seconde"""
+
+    def test_bucket_refills_at_rate(self):
+        with mock.patch('chat.ratelimit.time.monotonic', return_value=100.0) as clock:
+            bucket = ratelimit.TokenBucket(rate=2, burst=3)
+            self.assertEqual([bucket.take() for _ in range(4)], [True, True, True, False])
+            self.assertEqual(bucket.retry_after(), 0.5)
+            clock.return_value = 100.5
+            self.assertEqual([bucket.take(), bucket.take()], [True, False])
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ReadReceiptTests(TestCase):
+    """Ouvrir une conversation vaut lecture : mêmes événements que le `mark_read` du WebSocket"""
+
+    def setUp(self):
+        self.sender = User.objects.create(username='sender', email='sender@example.com')
+        self.reader = User.objects.create(username='reader', email='reader@example.com')
+        for content in ('un', 'deux'):
+            Conversation.create_message(sender=self.sender, recipient_id=self.reader.id, content=content)
+
+    def listen(self, user):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f"user_{user.id}", channel)
+        return lambda: async_to_sync(layer.receive)(channel)
+
+    def test_opening_conversation_sends_receipt_and_badge(self):
+        sender_events = self.listen(self.sender)
+        reader_events = self.listen(self.reader)
+        self.client.force_login(self.reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('chat:get_user_messages', args=[self.sender.id]))
+        self.assertEqual(len(response.json()['messages']), 2)
+        self.assertFalse(Message.objects.filter(is_read=False).exists())
+
+        receipt = sender_events()
+        self.assertEqual((receipt['type'], receipt['user_id']), ('read_receipt', self.reader.id))
+        badge = reader_events()
+        self.assertEqual((badge['type'], badge['user_id'], badge['unread']), ('unread_update', self.sender.id, 0))
+
+
+class SendMessageTests(TransactionTestCase):
+    """Envoi par la vue : un destinataire supprimé mais encore en cache donne une 404, pas une 500"""
+
+    def test_deleted_recipient_still_cached_is_not_found(self):
+        sender = User.objects.create(username='sender', email='sender@example.com')
+        recipient = User.objects.create(username='recipient', email='recipient@example.com')
+        stale = users.summary(recipient)
+        recipient.delete()
+        # Entrée restée dans le LRU d'un autre processus, que le signal post_delete n'a pas atteint
+        users._local_set(stale['id'], stale, time.monotonic())
+        self.client.force_login(sender)
+
+        response = self.client.post(reverse('chat:send_message'), {'content': 'salut', 'recipient_id': stale['id']})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Message.objects.exists())
+        self.assertIsNone(users.get(stale['id']))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class RoomMembershipTests(TestCase):
+    """Salons : l'adhésion est revérifiée à l'écriture, la succession du propriétaire se fait sous verrou"""
+
+    def setUp(self):
+        self.owner = User.objects.create(username='owner', email='owner@example.com')
+        self.member = User.objects.create(username='member', email='member@example.com')
+        self.room = Room.objects.create(name='salon', creator=self.owner)
+        RoomMembership.objects.create(room=self.room, user=self.owner, role=RoomMembership.OWNER)
+        RoomMembership.objects.create(room=self.room, user=self.member)
+
+    def remove(self, actor, user):
+        self.client.force_login(actor)
+        return self.client.post(reverse('chat:remove_room_member', args=[self.room.id, user.id]))
+
+    def test_removed_member_can_no_longer_post(self):
+        self.assertIsNotNone(rooms.post_message(self.room.id, self.member, 'avant'))
+        self.assertEqual(self.remove(self.owner, self.member).status_code, 200)
+        self.assertIsNone(rooms.post_message(self.room.id, self.member, 'après'))
+        self.assertEqual(list(RoomMessage.objects.values_list('content', flat=True)), ['avant'])
+
+    def test_owner_leaving_hands_over_then_last_member_deletes_room(self):
+        self.assertEqual(self.remove(self.owner, self.owner).status_code, 200)
+        self.assertEqual(RoomMembership.objects.get(room=self.room).role, RoomMembership.OWNER)
+        self.assertEqual(self.remove(self.member, self.member).status_code, 200)
+        self.assertFalse(Room.objects.filter(id=self.room.id).exists())
+
+
+class WriteBehindTests(TestCase):
+    """Tampon d'écriture différée : vidé au seuil, au minuteur ou à l'arrêt, jamais à la déconnexion"""
+
+    def setUp(self):
+        self.sender = User.objects.create(username='sender', email='sender@example.com')
+        self.recipient = User.objects.create(username='recipient', email='recipient@example.com')
+
+    def test_close_persists_pending_messages(self):
+        buffer = MessageWriteBehind(batch_size=100, flush_interval=60)
+
+        async def receive():
+            for content in ('un', 'deux'):
+                buffer.add(self.sender.id, self.recipient.id, content, timezone.now(), 'channel')
+
+        # La boucle s'arrête avant le minuteur, comme à l'arrêt du serveur
+        asyncio.run(receive())
+        self.assertFalse(Message.objects.exists())
+
+        buffer.close()
+        self.assertEqual(list(Message.objects.order_by('id').values_list('content', flat=True)), ['un', 'deux'])
+        self.assertEqual(buffer.pending, [])
+
+    def test_close_persists_interrupted_flush(self):
+        buffer = MessageWriteBehind(batch_size=2, flush_interval=60)
+
+        def never_written(function):
+            async def wait(*args):
+                await asyncio.Event().wait()
+            return wait
+
+        async def receive():
+            for content in ('un', 'deux'):
+                buffer.add(self.sender.id, self.recipient.id, content, timezone.now(), 'channel')
+            # Le flush a retiré le lot du tampon, puis la boucle s'arrête pendant l'écriture
+            await asyncio.sleep(0)
+            self.assertEqual((buffer.pending, len(buffer._in_flight)), ([], 2))
+
+        with mock.patch('chat.write_behind.database_sync_to_async', never_written):
+            asyncio.run(receive())
+        buffer.close()
+        self.assertEqual(Message.objects.count(), 2)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class TournamentJoinConcurrencyTests(TransactionTestCase):
+    """Inscriptions simultanées : chaque thread a sa connexion, comme des requêtes servies en parallèle"""
+
+    SEATS = 32
+
+    def setUp(self):
+        creator = User.objects.create(username='creator', email='creator@example.com')
+        self.tournament = Tournament.objects.create(name='Coupe', creator=creator, max_participants=self.SEATS)
+
+    def make_players(self, count):
+        User.objects.bulk_create([User(username=f'player{i}', email=f'player{i}@example.com') for i in range(count)])
+        return list(User.objects.filter(username__startswith='player').order_by('id'))
+
+    def join_concurrently(self, players):
+        """Lance toutes les inscriptions en même temps et retourne `created` pour chacune"""
+        barrier = threading.Barrier(len(players))
+        results = [None] * len(players)
+
+        def join(index, user):
+            try:
+                barrier.wait()
+                participant, created = Tournament.join(self.tournament.id, user, f'alias{user.id}')
+                results[index] = created if participant is not None else None
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=join, args=(index, user)) for index, user in enumerate(players)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_burst_never_oversubscribes(self):
+        results = self.join_concurrently(self.make_players(self.SEATS * 2))
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(results.count(True), self.SEATS)
+        self.assertEqual(results.count(None), self.SEATS)
+        self.assertEqual(self.tournament.seats_taken, self.SEATS)
+        self.assertEqual(TournamentParticipant.objects.filter(tournament=self.tournament).count(), self.SEATS)
+
+    def test_join_is_idempotent(self):
+        player = self.make_players(1)[0]
+        results = self.join_concurrently([player] * 8)
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(results.count(False), 7)
+        self.assertEqual(self.tournament.seats_taken, 1)
+        self.assertEqual(TournamentParticipant.objects.filter(tournament=self.tournament).count(), 1)
+
+    def test_leave_frees_the_seat(self):
+        players = self.make_players(self.SEATS + 1)
+        self.join_concurrently(players[:self.SEATS])
+
+        self.assertEqual(Tournament.join(self.tournament.id, players[-1], 'late'), (None, False))
+        self.assertTrue(self.tournament.leave(players[0]))
+        participant, created = Tournament.join(self.tournament.id, players[-1], 'late')
+        self.assertTrue(created)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.seats_taken, self.SEATS)
+
+
+class BotPoolTests(TestCase):
+    """Réserve de bots : reconnue à User.is_bot, jamais au nom"""
+
+    def test_player_named_like_a_bot_is_not_in_the_pool(self):
+        player = User.objects.create(username='Bot_1', email='bot1@example.com')
+        bots.grow(3)
+        pool = bots.pool(3)
+        self.assertEqual(len(pool), 3)
+        self.assertNotIn(player, pool)
+        self.assertTrue(all(bot.is_bot for bot in pool))
+        bots.grow(3)
+        self.assertEqual(User.objects.filter(is_bot=True).count(), 3)
+
+
+class BracketSizeTests(TestCase):
+    """Tableaux de taille quelconque, joués entièrement par des bots au démarrage"""
+
+    def play(self, size, system=Tournament.ELIMINATION):
+        creator = User.objects.create(username=f'creator{size}{system}', email=f'creator{size}{system}@example.com')
+        tournament = Tournament.objects.create(name='Coupe', creator=creator, max_participants=size, system=system)
+        bots.allocate(tournament)
+        tournament.generate_first_round()
+        tournament.refresh_from_db()
+        self.assertTrue(tournament.is_completed)
+        return tournament, list(TournamentMatch.objects.filter(tournament=tournament))
+
+    def test_byes_keep_every_player(self):
+        for size in (3, 5, 6, 12, 33):
+            tournament, matches = self.play(size)
+            # Un match par joueur éliminé : personne n'est perdu en route
+            self.assertEqual(len(matches), size - 1)
+            self.assertEqual(tournament.current_round, (size - 1).bit_length())
+
+    def test_swiss_avoids_rematches(self):
+        tournament, matches = self.play(8, Tournament.SWISS)
+        self.assertEqual(tournament.swiss_rounds, 3)
+        self.assertEqual(len(matches), 3 * 4)
+        self.assertEqual(len({frozenset((m.player1_id, m.player2_id)) for m in matches}), len(matches))
+
+
+class TournamentSnapshotTests(TestCase):
+    """tournament_detail : l'ETag est la version du tableau, 304 tant qu'elle ne change pas"""
+
+    def test_unchanged_snapshot_is_not_modified(self):
+        creator = User.objects.create(username='creator', email='creator@example.com')
+        tournament = Tournament.objects.create(name='Coupe', creator=creator, max_participants=4)
+        self.client.force_login(creator)
+        url = reverse('tournament_detail', args=[tournament.id])
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('join_tournament', args=[tournament.id]), {'alias': 'moi'}, content_type='application/json')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertTrue(changed.json()['tournament']['am_i_participant'])
+
+    def test_matching_etag_of_missing_tournament_is_not_found(self):
+        user = User.objects.create(username='visitor', email='visitor@example.com')
+        self.client.force_login(user)
+        missing = Tournament.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        missing += 1000
+        etag = tournaments.etag(missing, tournaments.version(missing), user.id)
+
+        response = self.client.get(reverse('tournament_detail', args=[missing]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+
+class BracketEngineTests(TestCase):
+    """Moteur du tableau : tours résolus en mémoire, écrits en bloc, sans récursion"""
+
+    def make_tournament(self, humans=0, bots_count=0):
+        creator = User.objects.create(username=f'creator{humans}_{bots_count}', email=f'c{humans}_{bots_count}@example.com')
+        tournament = Tournament.objects.create(
+            name='Coupe', creator=creator, max_participants=humans + bots_count, seats_taken=humans
+        )
+        players = User.objects.bulk_create([
+            User(username=f'p{humans}_{bots_count}_{i}', email=f'p{humans}_{bots_count}_{i}@example.com')
+            for i in range(humans)
+        ])
+        TournamentParticipant.objects.bulk_create([
+            TournamentParticipant(tournament=tournament, user=player, alias=player.username) for player in players
+        ])
+        bots.allocate(tournament)
+        return tournament
+
+    def matches(self, tournament, round_number):
+        return list(TournamentMatch.objects.filter(tournament=tournament, round=round_number).order_by('id'))
+
+    def test_completed_round_creates_next_round_in_bulk(self):
+        tournament = self.make_tournament(humans=8)
+        bracket.start(tournament)
+        for match in self.matches(tournament, 1):
+            bracket.record_result(match, 3, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(bracket.advance(tournament))
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "chat_tournamentmatch"')]
+        self.assertEqual(len(inserts), 1)
+
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.current_round, 2)
+        round1_winners = {match.winner_id for match in self.matches(tournament, 1)}
+        round2 = self.matches(tournament, 2)
+        self.assertEqual(len(round2), 2)
+        self.assertEqual({player for match in round2 for player in (match.player1_id, match.player2_id)}, round1_winners)
+
+    def test_bot_rounds_resolve_without_recursion(self):
+        counts = []
+        for size in (8, 64):
+            tournament = self.make_tournament(bots_count=size)
+            with mock.patch.object(bracket.Bracket, 'resolve', autospec=True, side_effect=bracket.Bracket.resolve) as resolve, \
+                    CaptureQueriesContext(connection) as queries:
+                bracket.start(tournament)
+            tournament.refresh_from_db()
+            self.assertTrue(tournament.is_completed)
+            self.assertEqual(resolve.call_count, 1)
+            self.assertEqual(TournamentMatch.objects.filter(tournament=tournament, is_completed=True).count(), size - 1)
+            counts.append(len(queries))
+        # Le nombre de requêtes ne dépend pas du nombre de tours ni de matchs
+        self.assertEqual(counts[0], counts[1])
+
+    def test_result_recorded_twice_is_refused(self):
+        tournament = self.make_tournament(humans=2)
+        bracket.start(tournament)
+        match = self.matches(tournament, 1)[0]
+        bracket.record_result(match, 3, 0)
+
+        stale = TournamentMatch.objects.get(pk=match.pk)
+        stale.is_completed = False
+        with self.assertRaises(bracket.BracketError):
+            bracket.record_result(stale, 0, 3)
+        match.refresh_from_db()
+        self.assertEqual((match.player1_score, match.player2_score), (3, 0))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class TournamentDiffTests(TestCase):
+    """Un résultat est poussé aux abonnés de tournament_<id> sous forme de différence versionnée"""
+
+    make_tournament = BracketEngineTests.make_tournament
+    matches = BracketEngineTests.matches
+
+    def test_result_is_pushed_as_a_diff(self):
+        tournament = self.make_tournament(humans=4)
+        bracket.start(tournament)
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(tournaments.group_name(tournament.id), channel)
+        before = tournaments.version(tournament.id)
+
+        match = self.matches(tournament, 1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            bracket.record_result(match, 3, 2)
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event['type'], 'tournament_update')
+        self.assertGreater(event['version'], before)
+        self.assertEqual([row['id'] for row in event['completed']], [match.id])
+        self.assertEqual(event['matches'], [])
+
+
+class TournamentSchedulerTests(TestCase):
+    """Démarrage, avancement et forfaits exécutés par le worker, hors des requêtes"""
+
+    def setUp(self):
+        self.human = User.objects.create(username='human', email='human@example.com')
+        self.tournament = Tournament.objects.create(name='Coupe', creator=self.human, max_participants=4, seats_taken=1)
+        TournamentParticipant.objects.create(tournament=self.tournament, user=self.human, alias='h')
+
+    def human_match(self):
+        return TournamentMatch.objects.get(tournament=self.tournament, is_completed=False)
+
+    def test_start_is_queued_once(self):
+        scheduler.enqueue(self.tournament.id, scheduler.START)
+        scheduler.enqueue(self.tournament.id, scheduler.START)
+        self.assertEqual(TournamentJob.objects.count(), 1)
+        self.assertFalse(TournamentMatch.objects.filter(tournament=self.tournament).exists())
+
+        self.assertEqual(scheduler.run_once(), 1)
+        self.assertFalse(TournamentJob.objects.exists())
+        self.assertIsNotNone(self.human_match().deadline)
+
+    def test_result_queues_the_next_round(self):
+        scheduler.enqueue(self.tournament.id, scheduler.START)
+        scheduler.run_once()
+        match = self.human_match()
+        bracket.record_result(match, 3, 0, self.human.id)
+        self.assertTrue(TournamentJob.objects.filter(tournament=self.tournament, kind=scheduler.ADVANCE).exists())
+
+        scheduler.run_once()
+        self.assertEqual(self.human_match().round, 2)
+
+    def test_no_show_forfeits_against_bot(self):
+        scheduler.enqueue(self.tournament.id, scheduler.START)
+        scheduler.run_once()
+        TournamentMatch.objects.filter(tournament=self.tournament).update(deadline=timezone.now() - timedelta(seconds=1))
+
+        scheduler.run_once()
+        self.tournament.refresh_from_db()
+        self.assertTrue(self.tournament.is_completed)
+        self.assertNotEqual(self.tournament.winner_id, self.human.id)
+        self.assertTrue(self.human.notifications.filter(message__contains='forfait').exists())
+
+    def test_online_no_show_still_loses_to_bot(self):
+        scheduler.enqueue(self.tournament.id, scheduler.START)
+        scheduler.run_once()
+        match = self.human_match()
+        TournamentMatch.objects.filter(pk=match.pk).update(deadline=timezone.now() - timedelta(seconds=1))
+
+        with mock.patch.object(presence, 'get_presence', side_effect=lambda user_ids: dict.fromkeys(user_ids, True)):
+            bracket.forfeit_expired(self.tournament.id)
+        match.refresh_from_db()
+        self.assertTrue(match.is_completed)
+        self.assertNotEqual(match.winner_id, self.human.id)
+
+
+class BotSimulationTests(SimpleTestCase):
+    """Matchs bot contre bot simulés avec les IA de pong.js"""
+
+    def test_every_match_has_one_winner(self):
+        rng = np.random.default_rng(0)
+        levels1 = rng.integers(simulation.EASY, simulation.HARD + 1, 200)
+        levels2 = rng.integers(simulation.EASY, simulation.HARD + 1, 200)
+        scores1, scores2 = simulation.simulate(levels1, levels2, rng)
+
+        self.assertTrue((np.maximum(scores1, scores2) == simulation.WINNING_SCORE).all())
+        self.assertTrue((np.minimum(scores1, scores2) < simulation.WINNING_SCORE).all())
+
+    def test_sides_are_symmetric(self):
+        # À niveau égal, jouer à gauche ne doit ni avantager ni pénaliser (premier service tiré au sort)
+        scores1, _ = simulation.simulate([simulation.EASY] * 4000, [simulation.EASY] * 4000, np.random.default_rng(0))
+        self.assertAlmostEqual((scores1 == simulation.WINNING_SCORE).mean(), 0.5, delta=0.03)
+
+    def test_hard_bot_beats_easy_bot(self):
+        scores1, scores2 = simulation.simulate([simulation.HARD] * 50, [simulation.EASY] * 50, np.random.default_rng(0))
+        self.assertTrue((scores1 == simulation.WINNING_SCORE).all())
@@ -0,0 +1,251 @@
+# chat/tournaments.py
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from chat import users, wire
+
+logger = logging.getLogger(__name__)
+
+# Instantané du tableau d'un tournoi pour tournament_detail.
+# La partie commune à tous les visiteurs (tournoi, participants, matchs) est sérialisée une fois
+# et mise en cache sous une version propre au tournoi ; la version est incrémentée à chaque
+# inscription, désinscription, démarrage ou résultat (voir bump), ce qui rend l'ancien instantané
+# inaccessible. Les champs propres au visiteur (am_i_participant, am_i_creator, can_play) sont
+# ajoutés à la lecture à partir des identifiants conservés à côté de l'instantané.
+# La version sert aussi d'ETag : un client à jour reçoit un 304 sans que rien ne soit relu.
+#
+# Les changements du tableau sont aussi poussés sur le groupe tournament_<id> du channel layer
+# (`tournament_subscribe` sur ws/chat/, ouvert aux spectateurs) sous forme de différences compactes :
+# matchs terminés, matchs créés, tour courant et vainqueur, avec la nouvelle version. Un client qui
+# constate un saut de version (inscription, événement manqué) relit simplement l'instantané.
+# Au-delà de MAX_DIFF_ROWS matchs (démarrage d'un grand tableau), seuls le tour et le vainqueur sont
+# envoyés : les abonnés relisent l'instantané plutôt que de recevoir le tableau entier par connexion.
+VERSION_KEY = 'chat:tournament:{}:version'
+SNAPSHOT_KEY = 'chat:tournament:{}:snapshot:{}'
+SNAPSHOT_TIMEOUT = 10 * 60
+MAX_DIFF_ROWS = 256
+
+
+def version(tournament_id):
+    """
+    Version courante du tableau. Une clé absente (jamais créée ou évincée) repart de l'horloge
+    en millisecondes, jamais d'une valeur déjà servie : un ETag périmé ne peut pas redevenir valide.
+    """
+    key = VERSION_KEY.format(tournament_id)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns() // 1_000_000, None)
+        current = cache.get(key)
+    return current
+
+
+def group_name(tournament_id):
+    return f"tournament_{tournament_id}"
+
+
+def _bump(tournament_id):
+    """Incrémente la version et la retourne"""
+    key = VERSION_KEY.format(tournament_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns() // 1_000_000, None)
+        return cache.get(key)
+
+
+def bump(tournament_id):
+    """Invalide l'instantané une fois la transaction validée (un lecteur ne recache pas l'état d'avant)"""
+    transaction.on_commit(lambda: _bump(tournament_id))
+
+
+def publish(tournament_id, changes):
+    """
+    Comme bump, puis diffuse `tournament_update` au groupe du tournoi.
+    `changes` vient du moteur (chat/bracket.py) avec des identifiants de joueurs, remplacés ici
+    par les noms (résumés en cache) une fois la transaction validée.
+    """
+    def send():
+        current = _bump(tournament_id)
+        rows = changes['completed'] + changes['matches']
+        truncated = len(rows) > MAX_DIFF_ROWS
+        if truncated:
+            rows = []
+        player_ids = {changes['winner']} if changes['winner'] else set()
+        for row in rows:
+            player_ids.update(user_id for user_id in (row.get('player1'), row.get('player2'), row['winner']) if user_id)
+        names = {user_id: summary['username'] for user_id, summary in users.get_many(player_ids).items()}
+
+        def named(row):
+            return {key: names.get(value) if key in ('player1', 'player2', 'winner') else value for key, value in row.items()}
+
+        event = {
+            'type': 'tournament_update',
+            'tournament_id': tournament_id,
+            'version': current,
+            'current_round': changes['current_round'],
+            'is_completed': changes['is_completed'],
+            'winner': names.get(changes['winner'])
+        }
+        if not truncated:
+            event['completed'] = [named(row) for row in changes['completed']]
+            event['matches'] = [named(row) for row in changes['matches']]
+        try:
+            async_to_sync(get_channel_layer().group_send)(group_name(tournament_id), wire.prepare(event))
+        except Exception:
+            # Le résultat est enregistré : les abonnés se resynchroniseront au prochain saut de version
+            logger.exception("Erreur lors de la diffusion du tournoi %s", tournament_id)
+
+    transaction.on_commit(send)
+
+
+def _player(participant, photo):
+    alias = participant.alias
+    username = participant.user.username
+    return {
+        'username': username,
+        'alias': alias,
+        'display_name': alias or username,
+        'profile_photo': photo(participant.user),
+        'is_bot': participant.is_bot
+    }
+
+
+def _former_player(summary):
+    """Joueur d'un match qui n'est plus inscrit au tournoi : résumé mis en cache (chat/users.py)"""
+    return {
+        'username': summary['username'],
+        'alias': None,
+        'display_name': summary['username'],
+        'profile_photo': summary['profile_photo'],
+        'is_bot': False
+    }
+
+
+def build(tournament_id):
+    """Sérialise le tournoi en trois requêtes (tournoi, participants, matchs)"""
+    from accounts.views import get_profile_photo_url
+    from chat.models import Tournament, TournamentMatch, TournamentParticipant
+
+    tournament = Tournament.objects.select_related('creator', 'winner').prefetch_related(
+        Prefetch('participants', queryset=TournamentParticipant.objects.select_related('user').order_by('joined_at', 'id')),
+        Prefetch('matches', queryset=TournamentMatch.objects.order_by('round', 'id'))
+    ).get(id=tournament_id)
+
+    # Une vérification de fichier par joueur, et non plus par apparition dans un match
+    photos = {}
+
+    def photo(user):
+        if user.id not in photos:
+            photos[user.id] = get_profile_photo_url(user)
+        return photos[user.id]
+
+    participants = {p.user_id: p for p in tournament.participants.all()}
+    matches = list(tournament.matches.all())
+    players = {user_id: _player(p, photo) for user_id, p in participants.items()}
+    missing = {user_id for match in matches for user_id in (match.player1_id, match.player2_id)} - set(players)
+    if missing:
+        players.update({user_id: _former_player(summary) for user_id, summary in users.get_many(missing).items()})
+
+    match_rows = []
+    match_players = []
+    for match in matches:
+        player1 = players[match.player1_id]
+        player2 = players[match.player2_id]
+        winner = players.get(match.winner_id) if match.winner_id else None
+        match_rows.append({
+            'id': match.id,
+            'round': match.round,
+            'player1': player1,
+            'player2': player2,
+            'is_completed': match.is_completed,
+            'player1_score': match.player1_score,
+            'player2_score': match.player2_score,
+            'winner': winner['username'] if winner else None,
+            'played_at': match.played_at.strftime('%Y-%m-%d %H:%M') if match.played_at else None,
+            'deadline': match.deadline.isoformat() if match.deadline else None
+        })
+        match_players.append((
+            match.player1_id,
+            match.player2_id,
+            match.is_completed or (player1['is_bot'] and player2['is_bot'])
+        ))
+
+    data = {
+        'tournament': {
+            'id': tournament.id,
+            'name': tournament.name,
+            'creator': {
+                'username': tournament.creator.username,
+                'profile_photo': photo(tournament.creator)
+            },
+            'start_date': tournament.start_date.strftime('%Y-%m-%d %H:%M'),
+            'max_participants': tournament.max_participants,
+            'is_active': tournament.is_active,
+            'is_completed': tournament.is_completed,
+            'winner': tournament.winner.username if tournament.winner else None,
+            'current_round': tournament.current_round,
+            'system': tournament.system,
+            'swiss_rounds': tournament.swiss_rounds,
+            'is_registration_open': (
+                tournament.is_active and not tournament.is_completed
+                and len(participants) < tournament.max_participants and not matches
+            )
+        },
+        'participants': [{
+            'username': p.user.username,
+            'alias': p.alias,
+            'display_name': p.alias or p.user.username,
+            'profile_photo': photo(p.user),
+            'joined_at': p.joined_at.strftime('%Y-%m-%d %H:%M'),
+            'is_bot': p.is_bot
+        } for p in participants.values()]
+    }
+    return {
+        'data': data,
+        'matches': match_rows,
+        'match_players': match_players,
+        'participant_ids': set(participants),
+        'creator_id': tournament.creator_id
+    }
+
+
+def snapshot(tournament_id, current=None):
+    """Instantané de la version courante, construit au premier accès. Lève Tournament.DoesNotExist."""
+    if current is None:
+        current = version(tournament_id)
+    key = SNAPSHOT_KEY.format(tournament_id, current)
+    cached = cache.get(key)
+    if cached is None:
+        cached = build(tournament_id)
+        cache.set(key, cached, SNAPSHOT_TIMEOUT)
+    return cached
+
+
+def exists(tournament_id, current):
+    """Vrai si le tournoi existe : instantané de cette version en cache, sinon une requête sur la clé primaire"""
+    from chat.models import Tournament
+
+    return cache.has_key(SNAPSHOT_KEY.format(tournament_id, current)) or Tournament.objects.filter(id=tournament_id).exists()
+
+
+def for_user(cached, user_id):
+    """Ajoute les champs propres au visiteur à une copie superficielle de l'instantané"""
+    data = cached['data']
+    tournament = dict(data['tournament'])
+    tournament['am_i_participant'] = user_id in cached['participant_ids']
+    tournament['am_i_creator'] = user_id == cached['creator_id']
+    matches = [
+        {**row, 'can_play': not closed and user_id in (player1_id, player2_id)}
+        for row, (player1_id, player2_id, closed) in zip(cached['matches'], cached['match_players'])
+    ]
+    return {'tournament': tournament, 'participants': data['participants'], 'matches': matches}
+
+
+def etag(tournament_id, current, user_id):
+    return f'W/"{tournament_id}.{current}.{user_id}"'
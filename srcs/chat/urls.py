@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.chat_view, name='chat'),
     path('send_message/', views.send_message, name='send_message'),
     path('messages/<int:user_id>/', views.get_user_messages, name='get_user_messages'),
+    path('messages/search/', views.search_messages, name='search_messages'),
     path('block_user/<int:user_id>/', views.block_user, name='block_user'),
     path('unblock_user/<int:user_id>/', views.unblock_user, name='unblock_user'),
     path('send_game_invite/<int:user_id>/', views.send_game_invite, name='send_game_invite'),
@@ -17,6 +18,12 @@ urlpatterns = [
 
     # Nouvel endpoint API pour les utilisateurs
     path('api/users/', views.api_get_users, name='api_get_users'),
+    path('api/conversations/', views.api_conversations, name='api_conversations'),
+    path('api/unread/', views.api_unread_counts, name='api_unread_counts'),
+    path('api/rooms/', views.api_rooms, name='api_rooms'),
+    path('api/rooms/<int:room_id>/messages/', views.room_messages, name='room_messages'),
+    path('api/rooms/<int:room_id>/members/', views.room_members, name='room_members'),
+    path('api/rooms/<int:room_id>/members/<int:user_id>/remove/', views.remove_room_member, name='remove_room_member'),
     # Utilisez votre propre function chat_ping
     path('api/chat/ping/', views.chat_ping, name='chat_ping'),
 ]
\ No newline at end of file
@@ -0,0 +1,98 @@
+# chat/users.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+# Résumés d'utilisateurs (id → nom, avatar, indicateurs) pour les chemins chauds du chat :
+# le consumer et les vues n'interrogent plus la table des utilisateurs pour un nom ou un destinataire.
+# Deux niveaux :
+# - un LRU borné en mémoire du processus (LOCAL_SIZE entrées, expirées après LOCAL_TTL) ;
+# - le cache partagé (CACHE_TIMEOUT), commun à tous les workers.
+# Invalidé par les signaux post_save / post_delete de User (voir chat/models.py), donc par
+# update_user et delete_user ; les autres processus voient la modification au plus LOCAL_TTL plus tard.
+CACHE_KEY = 'chat:user:{}'
+CACHE_TIMEOUT = 60 * 60
+LOCAL_SIZE = 1024
+LOCAL_TTL = 30  # secondes
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def summary(user):
+    from accounts.views import get_profile_photo_url
+
+    return {
+        'id': user.id,
+        'username': user.username,
+        'profile_photo': get_profile_photo_url(user),
+        'is_42_user': user.is_42_user,
+        'is_active': user.is_active
+    }
+
+
+def _local_get(user_id, now):
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return entry[1]
+
+
+def _local_set(user_id, value, now):
+    with _lock:
+        _local[user_id] = (now + LOCAL_TTL, value)
+        _local.move_to_end(user_id)
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+
+
+def get_many(user_ids):
+    """Résumés des utilisateurs existants parmi user_ids : mémoire, puis cache partagé, puis une requête"""
+    from accounts.models import User
+
+    now = time.monotonic()
+    found = {}
+    missing = []
+    for user_id in {int(user_id) for user_id in user_ids}:
+        value = _local_get(user_id, now)
+        if value is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = value
+
+    if missing:
+        shared = cache.get_many([CACHE_KEY.format(user_id) for user_id in missing])
+        loaded = {}
+        for user_id in missing:
+            value = shared.get(CACHE_KEY.format(user_id))
+            if value is not None:
+                found[user_id] = value
+        unknown = [user_id for user_id in missing if user_id not in found]
+        if unknown:
+            for user in User.objects.filter(id__in=unknown):
+                loaded[user.id] = found[user.id] = summary(user)
+            cache.set_many({CACHE_KEY.format(user_id): value for user_id, value in loaded.items()}, CACHE_TIMEOUT)
+        for user_id in missing:
+            if user_id in found:
+                _local_set(user_id, found[user_id], now)
+
+    return found
+
+
+def get(user_id):
+    """Résumé de user_id, ou None si l'utilisateur n'existe pas"""
+    return get_many([user_id]).get(int(user_id))
+
+
+def invalidate(*user_ids):
+    with _lock:
+        for user_id in user_ids:
+            _local.pop(user_id, None)
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids])
@@ -1,50 +1,95 @@
 # views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.contrib import messages
-from .models import Message, UserProfile, GameInvite, Tournament
-from django.db.models import Q
+from .models import Message, Conversation, UserProfile, Tournament, Room, RoomMembership, RoomMessage
+from .pagination import (
+    InvalidCursor, encode_cursor, encode_name_cursor, encode_rank_cursor, keyset_filter, name_filter,
+    parse_page_size, rank_filter
+)
+from . import blocking, invites, receipts, rooms, users, wire
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 import json
-from django.db import IntegrityError
+import logging
+from django.db import IntegrityError, transaction
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+def _conversation_summaries(user, excluded_ids=()):
+    """Résumés des conversations de l'utilisateur, hors utilisateurs bloqués"""
+    conversations = Conversation.for_user(user).select_related('last_message', 'user_a', 'user_b')
+    summaries = []
+    for conversation in conversations:
+        other_id = conversation.other_user_id(user.id)
+        if other_id in excluded_ids:
+            continue
+        other = conversation.user_b if other_id == conversation.user_b_id else conversation.user_a
+        last_message = conversation.last_message
+        summaries.append({
+            'user_id': other_id,
+            'username': other.username,
+            'last_message': last_message.content if last_message else None,
+            'last_message_at': conversation.last_message_at.isoformat() if conversation.last_message_at else None,
+            'unread': conversation.unread_for(user.id)
+        })
+    return summaries
 
 @login_required
 def chat_view(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-    except UserProfile.DoesNotExist:
-        # Créez un UserProfile si celui-ci n'existe pas
-        user_profile = UserProfile.objects.create(user=request.user)
+    # Créer le UserProfile s'il n'existe pas encore
+    UserProfile.objects.get_or_create(user=request.user)
 
-    blocked_users = user_profile.blocked_users.all()
+    blocked_users = User.objects.filter(id__in=blocking.blocking_ids(request.user.id))
     
     # Obtenir également les utilisateurs qui ont bloqué l'utilisateur actuel
-    blocked_by_users = User.objects.filter(userprofile__blocked_users=request.user)
+    blocked_by_users = User.objects.filter(id__in=blocking.blocked_by_ids(request.user.id))
     
+    excluded_ids = blocking.blocked_ids(request.user.id)
+
     # Exclure à la fois les utilisateurs bloqués et ceux qui ont bloqué l'utilisateur actuel
-    users = User.objects.exclude(id=request.user.id)\
-        .exclude(id__in=blocked_users)\
-        .exclude(id__in=blocked_by_users)
+    users = User.objects.exclude(id=request.user.id).exclude(id__in=excluded_ids)
     
-    messages = Message.objects.filter(
-        (Q(sender=request.user) | Q(recipient=request.user)) &
-        ~Q(sender__in=blocked_users) &
-        ~Q(recipient__in=blocked_users) &
-        ~Q(sender__in=blocked_by_users) &
-        ~Q(recipient__in=blocked_by_users)
-    ).order_by('timestamp')
+    # La barre latérale lit les résumés de conversation plutôt que la table des messages
+    conversations = _conversation_summaries(request.user, excluded_ids)
     
     return render(request, 'chat/chat.html', {
-        'messages': messages,
+        'conversations': conversations,
         'blocked_users': blocked_users,
         'users': users,
         'blocked_by_users': blocked_by_users 
     })
 
+@login_required
+def api_conversations(request):
+    """Endpoint API qui renvoie les résumés de conversation pour la barre latérale du chat SPA"""
+    excluded_ids = blocking.blocked_ids(request.user.id)
+    return JsonResponse({'conversations': _conversation_summaries(request.user, excluded_ids)})
+
+@login_required
+def api_unread_counts(request):
+    """
+    Non-lus de l'utilisateur par interlocuteur, lus dans les compteurs de Conversation
+    (une requête, sans parcourir les messages)
+    """
+    user_id = request.user.id
+    rows = Conversation.objects.filter(
+        Q(user_a_id=user_id, unread_a__gt=0) | Q(user_b_id=user_id, unread_b__gt=0)
+    ).values_list('user_a_id', 'user_b_id', 'unread_a', 'unread_b')
+
+    excluded_ids = blocking.blocked_ids(user_id)
+    unread = {}
+    for user_a_id, user_b_id, unread_a, unread_b in rows:
+        other_id, count = (user_b_id, unread_a) if user_a_id == user_id else (user_a_id, unread_b)
+        if other_id not in excluded_ids:
+            unread[other_id] = count
+    return JsonResponse({'unread': unread, 'total': sum(unread.values())})
+
 @login_required
 def send_message(request):
     if request.method == 'POST':
@@ -59,64 +104,172 @@ def send_message(request):
         if not content or not recipient_id:
             return JsonResponse({'status': 'error', 'message': 'Missing data'}, status=400)
 
+        # Résumé en cache : seul l'INSERT du message touche la base
+        recipient = users.get(recipient_id)
+        if recipient is None:
+            return JsonResponse({'status': 'error', 'message': 'User not found'}, status=404)
+
+        # Vérifier si l'utilisateur est bloqué par l'expéditeur
+        if recipient['id'] in blocking.blocking_ids(request.user.id):
+            return JsonResponse({
+                'status': 'error', 
+                'message': 'Impossible d\'envoyer un message à un utilisateur bloqué'
+            }, status=403)
+        
+        # Vérifier si l'expéditeur est bloqué par le destinataire
+        if recipient['id'] in blocking.blocked_by_ids(request.user.id):
+            return JsonResponse({
+                'status': 'error', 
+                'message': 'Cet utilisateur vous a bloqué'
+            }, status=403)
+
+        # Créer le message en base de données (et mettre à jour le résumé de conversation)
         try:
-            recipient = User.objects.get(id=recipient_id)
-
-            # Vérifier si l'utilisateur est bloqué par l'expéditeur
-            if recipient in request.user.userprofile.blocked_users.all():
-                return JsonResponse({
-                    'status': 'error', 
-                    'message': 'Impossible d\'envoyer un message à un utilisateur bloqué'
-                }, status=403)
-            
-            # Vérifier si l'expéditeur est bloqué par le destinataire
-            if request.user in recipient.userprofile.blocked_users.all():
-                return JsonResponse({
-                    'status': 'error', 
-                    'message': 'Cet utilisateur vous a bloqué'
-                }, status=403)
-
-            # Créer le message en base de données
-            Message.objects.create(
+            Conversation.create_message(
                 sender=request.user,
-                recipient=recipient,
+                recipient_id=recipient['id'],
                 content=content,
                 is_game_invite=False
             )
-            return JsonResponse({'status': 'success'})
-        
-        except User.DoesNotExist:
+        except IntegrityError:
+            # Destinataire supprimé depuis sa mise en cache (LRU d'un autre processus) : la clé étrangère échoue
+            users.invalidate(recipient['id'])
             return JsonResponse({'status': 'error', 'message': 'User not found'}, status=404)
+        return JsonResponse({'status': 'success'})
 
     return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=400)
 
 
 @login_required
 def get_user_messages(request, user_id):
-    other_user = get_object_or_404(User, id=user_id)
-    
+    """
+    Historique d'une conversation, paginé par curseur sur (timestamp, id).
+    ?before=<curseur> renvoie les messages plus anciens, ?after=<curseur> les plus récents.
+    Sans curseur, renvoie la page la plus récente.
+    """
+    other_user = users.get(user_id)
+    if other_user is None:
+        raise Http404("Utilisateur introuvable")
+    other_id = other_user['id']
+
+    before = request.GET.get('before')
+    after = request.GET.get('after')
+    limit = parse_page_size(request.GET.get('limit'))
+
     # Vérifier si l'un des utilisateurs a bloqué l'autre
-    is_blocked = (
-        other_user in request.user.userprofile.blocked_users.all() or
-        request.user in other_user.userprofile.blocked_users.all()
-    )
-    
-    if is_blocked:
-        messages = []  # Retourner une liste vide si l'un des utilisateurs est bloqué
-    else:
-        messages = Message.objects.filter(
-            (Q(sender=request.user, recipient_id=user_id) |
-             Q(sender_id=user_id, recipient=request.user))
-        ).order_by('timestamp')
-    
+    if blocking.is_blocked(request.user.id, other_id):
+        # Retourner une liste vide si l'un des utilisateurs est bloqué
+        return JsonResponse({'messages': [], 'next_cursor': None})
+
+    direction = 'after' if after else 'before'
+    ordering = ('timestamp', 'id') if direction == 'after' else ('-timestamp', '-id')
+    fields = ('id', 'content', 'timestamp', 'recipient_id', 'sender__username', 'is_read')
+
+    def one_side(sender_id, recipient_id):
+        # Chaque sens de la conversation est une plage de l'index (sender, recipient, timestamp, id)
+        qs = Message.objects.filter(sender_id=sender_id, recipient_id=recipient_id)
+        if before or after:
+            qs = qs.filter(keyset_filter(after or before, direction))
+        return qs.order_by(*ordering).values(*fields)[:limit + 1]
+
+    try:
+        rows = list(
+            one_side(request.user.id, other_id)
+            .union(one_side(other_id, request.user.id), all=True)
+            .order_by(*ordering)[:limit + 1]
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    # Ouvrir la conversation (page la plus récente) vaut lecture : mêmes événements que le
+    # `mark_read` du WebSocket (badge des autres onglets, accusé de lecture pour l'expéditeur)
+    if not before and not after:
+        count, unread = Conversation.mark_read(request.user, other_id)
+        transaction.on_commit(lambda: receipts.publish(request.user.id, other_id, count, unread))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['id']) if has_more else None
+
+    # Le client affiche toujours les messages dans l'ordre chronologique
+    if direction == 'before':
+        rows.reverse()
+
     messages_data = [{
-        'content': message.content,
-        'sender': message.sender.username,
-        'timestamp': message.timestamp.isoformat(),
-        'recipient_id': message.recipient.id
-    } for message in messages]
-    
-    return JsonResponse(messages_data, safe=False)
+        'id': row['id'],
+        'content': row['content'],
+        'sender': row['sender__username'],
+        'timestamp': row['timestamp'].isoformat(),
+        'recipient_id': row['recipient_id'],
+        'is_read': row['is_read']
+    } for row in rows]
+
+    return JsonResponse({'messages': messages_data, 'next_cursor': next_cursor})
+
+@login_required
+def search_messages(request):
+    """
+    Recherche plein texte dans les conversations de l'utilisateur (index GIN sur search_vector).
+    ?q=<requête> (syntaxe websearch : "expression exacte", or, -exclu), ?user_id=<id> pour
+    limiter à une conversation, ?cursor=<curseur> pour la page suivante.
+    Résultats triés par pertinence puis du plus récent au plus ancien.
+    """
+    terms = request.GET.get('q', '').strip()
+    if not terms:
+        return JsonResponse({'status': 'error', 'message': 'Le paramètre q est requis'}, status=400)
+    if len(terms) > 200:
+        return JsonResponse({'status': 'error', 'message': 'Requête de recherche trop longue'}, status=400)
+
+    cursor = request.GET.get('cursor')
+    limit = parse_page_size(request.GET.get('limit'), default=20)
+    excluded_ids = blocking.blocked_ids(request.user.id)
+
+    query = SearchQuery(terms, config='simple', search_type='websearch')
+    results = Message.objects.filter(
+        Q(sender=request.user) | Q(recipient=request.user),
+        search_vector=query
+    )
+    if excluded_ids:
+        results = results.exclude(sender_id__in=excluded_ids).exclude(recipient_id__in=excluded_ids)
+
+    other_id = request.GET.get('user_id')
+    if other_id:
+        try:
+            other_id = int(other_id)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'user_id invalide'}, status=400)
+        results = results.filter(
+            Q(sender=request.user, recipient_id=other_id) | Q(sender_id=other_id, recipient=request.user)
+        )
+
+    results = results.annotate(rank=SearchRank(F('search_vector'), query)).order_by('-rank', '-id')
+    try:
+        if cursor:
+            results = results.filter(rank_filter(cursor))
+        rows = list(results.values(
+            'id', 'content', 'timestamp', 'rank', 'sender_id', 'sender__username',
+            'recipient_id', 'recipient__username'
+        )[:limit + 1])
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_rank_cursor(rows[-1]['rank'], rows[-1]['id']) if has_more else None
+
+    return JsonResponse({
+        'results': [{
+            'id': row['id'],
+            'content': row['content'],
+            'sender': row['sender__username'],
+            'sender_id': row['sender_id'],
+            'recipient': row['recipient__username'],
+            'recipient_id': row['recipient_id'],
+            'timestamp': row['timestamp'].isoformat(),
+            'rank': row['rank']
+        } for row in rows],
+        'next_cursor': next_cursor
+    })
 
 @login_required
 def block_user(request, user_id):
@@ -136,79 +289,55 @@ def send_game_invite(request, user_id):
     from channels.layers import get_channel_layer
     from asgiref.sync import async_to_sync
     
-    recipient = get_object_or_404(User, id=user_id)
+    recipient = users.get(user_id)
+    if recipient is None:
+        raise Http404("Utilisateur introuvable")
 
     # Vérifier si l'utilisateur est bloqué
-    if recipient in request.user.userprofile.blocked_users.all():
+    if recipient['id'] in blocking.blocking_ids(request.user.id):
         return JsonResponse({
             'status': 'error',
             'message': 'Vous ne pouvez pas envoyer d\'invitation à un utilisateur bloqué'
         })
     
     # Vérifier si l'utilisateur nous a bloqué
-    if request.user in recipient.userprofile.blocked_users.all():
+    if recipient['id'] in blocking.blocked_by_ids(request.user.id):
         return JsonResponse({
             'status': 'error',
             'message': 'Vous ne pouvez pas envoyer d\'invitation à cet utilisateur'
         })
     
+    # Une seule opération atomique sur le cache : refusée si une invitation est déjà en attente
+    if not invites.create(request.user.id, recipient['id']):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Une invitation est déjà en attente'
+        })
+
+    # Envoyer la notification via WebSocket
+    channel_layer = get_channel_layer()
     try:
-        # Nettoyer les invitations expirées
-        GameInvite.clean_expired_invites()
-        
-        # Vérifier si une invitation en attente existe déjà
-        existing_invite = GameInvite.objects.filter(
-            sender=request.user,
-            recipient=recipient,
-            status='pending'
-        ).first()
-        
-        if existing_invite:
-            if existing_invite.is_expired:
-                existing_invite.delete()
-            else:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': 'Une invitation est déjà en attente'
-                })
-            
-        # Créer la nouvelle invitation
-        invite = GameInvite.objects.create(
-            sender=request.user,
-            recipient=recipient,
-            status='pending'
-        )
-        
-        # Envoyer la notification via WebSocket
-        channel_layer = get_channel_layer()
-        try:
-            async_to_sync(channel_layer.group_send)(
-                f"user_{recipient.id}",
-                {
-                    "type": "game_invite",
-                    "sender": request.user.username,
-                    "sender_id": request.user.id,
-                    "recipient_id": recipient.id,
-                    "message": f"{request.user.username} vous invite à jouer"
-                }
-            )
-            return JsonResponse({
-                'status': 'success',
-                'message': f'Invitation envoyée à {recipient.username}'
+        async_to_sync(channel_layer.group_send)(
+            f"user_{recipient['id']}",
+            wire.prepare({
+                "type": "game_invite",
+                "sender": request.user.username,
+                "sender_id": request.user.id,
+                "recipient_id": recipient['id'],
+                "message": f"{request.user.username} vous invite à jouer"
             })
-        except Exception as ws_error:
-            # Si l'envoi du message WebSocket échoue, on supprime l'invitation
-            invite.delete()
-            return JsonResponse({
-                'status': 'error',
-                'message': 'L\'utilisateur n\'est pas en ligne actuellement'
-            })
-    
-    except Exception as e:
-        print(f"Erreur lors de l'envoi de l'invitation: {str(e)}")
+        )
+        return JsonResponse({
+            'status': 'success',
+            'message': f"Invitation envoyée à {recipient['username']}"
+        })
+    except Exception as ws_error:
+        # Si l'envoi du message WebSocket échoue, on retire l'invitation
+        logger.warning(f"Erreur lors de l'envoi de l'invitation: {ws_error}")
+        invites.cancel(request.user.id, recipient['id'])
         return JsonResponse({
             'status': 'error',
-            'message': str(e)
+            'message': 'L\'utilisateur n\'est pas en ligne actuellement'
         })
 
 @login_required
@@ -232,113 +361,281 @@ def start_game(request, opponent_id):
 
 
 
-@login_required
-def accept_game_invite(request, sender_id):
-    try:
-        # Trouver l'invitation en attente
-        invite = get_object_or_404(GameInvite, 
-                                 sender_id=sender_id, 
-                                 recipient=request.user, 
-                                 status='pending')
-        
-        # Vérifier s'il existe déjà une invitation acceptée
-        existing_accepted = GameInvite.objects.filter(
-            sender_id=sender_id,
-            recipient=request.user,
-            status='accepted'
-        ).first()
-        
-        if existing_accepted:
-            # Si une invitation acceptée existe déjà, la supprimer
-            existing_accepted.delete()
-        
-        # Mettre à jour le statut de l'invitation actuelle
-        invite.status = 'accepted'
-        invite.save()
-        
-        return JsonResponse({
-            'status': 'success',
-            'message': 'Invitation acceptée'
-        })
-        
-    except Exception as e:
-        print(f"Erreur lors de l'acceptation de l'invitation: {str(e)}")
+def _resolve_game_invite(request, sender_id, accepted):
+    if invites.resolve(sender_id, request.user.id, accepted) is None:
         return JsonResponse({
             'status': 'error',
-            'message': str(e)
-        }, status=500)
+            'message': 'Invitation expirée ou déjà traitée'
+        }, status=404)
+
+    return JsonResponse({
+        'status': 'success',
+        'message': 'Invitation acceptée' if accepted else 'Invitation rejetée'
+    })
+
+@login_required
+def accept_game_invite(request, sender_id):
+    return _resolve_game_invite(request, sender_id, accepted=True)
 
 @login_required
 def reject_game_invite(request, sender_id):
-    try:
-        # Trouver l'invitation en attente
-        invite = get_object_or_404(GameInvite, 
-                                 sender_id=sender_id, 
-                                 recipient=request.user, 
-                                 status='pending')
-        
-        # Vérifier s'il existe déjà une invitation rejetée
-        existing_rejected = GameInvite.objects.filter(
-            sender_id=sender_id,
-            recipient=request.user,
-            status='rejected'
-        ).first()
-        
-        if existing_rejected:
-            # Si une invitation rejetée existe déjà, la supprimer
-            existing_rejected.delete()
-        
-        # Mettre à jour le statut de l'invitation actuelle
-        invite.status = 'rejected'
-        invite.save()
-        
-        return JsonResponse({
-            'status': 'success',
-            'message': 'Invitation rejetée'
-        })
-        
-    except Exception as e:
-        print(f"Erreur lors du rejet de l'invitation: {str(e)}")
-        return JsonResponse({
-            'status': 'error',
-            'message': str(e)
-        }, status=500)
+    return _resolve_game_invite(request, sender_id, accepted=False)
     
 @login_required
 def api_get_users(request):
     """
-    Endpoint API qui renvoie les données des utilisateurs pour le chat SPA.
+    Annuaire paginé des utilisateurs pour le chat SPA.
+    ?q=<nom> filtre par sous-chaîne ou similarité (index trigramme user_username_trgm),
+    les résultats étant triés par pertinence ; sans q, ordre alphabétique.
+    ?cursor=<curseur> pour la page suivante, ?limit=<n> (50 par défaut).
+    Les utilisateurs bloqués sont exclus par la requête elle-même ; `blocked_by` signale ceux
+    qui ont bloqué l'utilisateur. La liste des bloqués n'accompagne que la première page.
     """
-    user_profile = UserProfile.objects.get_or_create(user=request.user)[0]
-    
-    # Obtenir les utilisateurs bloqués
-    blocked_users = user_profile.blocked_users.all()
-    
-    # Obtenir les utilisateurs qui ont bloqué l'utilisateur actuel
-    blocked_by_users = User.objects.filter(userprofile__blocked_users=request.user)
-    
-    # Obtenir tous les utilisateurs (sauf l'utilisateur actuel)
-    all_users = User.objects.exclude(id=request.user.id)
-    
-    # Préparer les données JSON
+    UserProfile.objects.get_or_create(user=request.user)
+
+    terms = request.GET.get('q', '').strip()
+    if len(terms) > 150:
+        return JsonResponse({'status': 'error', 'message': 'Requête de recherche trop longue'}, status=400)
+    cursor = request.GET.get('cursor')
+    limit = parse_page_size(request.GET.get('limit'))
+
+    blocks = UserProfile.blocked_users.through.objects
+    directory = User.objects.exclude(id=request.user.id).exclude(
+        id__in=blocks.filter(userprofile__user=request.user).values('user_id')
+    ).annotate(
+        blocked_by=Exists(blocks.filter(userprofile__user=OuterRef('pk'), user=request.user))
+    )
+
+    try:
+        if terms:
+            # Même expression que l'index : UPPER(username)
+            needle = terms.upper()
+            directory = directory.annotate(
+                name=Upper('username'),
+                rank=TrigramSimilarity(Upper('username'), needle)
+            ).filter(
+                Q(name__contains=needle) | Q(name__trigram_similar=needle)
+            ).order_by('-rank', '-id')
+            if cursor:
+                directory = directory.filter(rank_filter(cursor))
+            rows = list(directory.values('id', 'username', 'blocked_by', 'rank')[:limit + 1])
+        else:
+            directory = directory.order_by('username', 'id')
+            if cursor:
+                directory = directory.filter(name_filter(cursor))
+            rows = list(directory.values('id', 'username', 'blocked_by')[:limit + 1])
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = (
+            encode_rank_cursor(last['rank'], last['id']) if terms else encode_name_cursor(last['username'], last['id'])
+        )
+
     data = {
-        'users': [
-            {
-                'id': user.id,
-                'username': user.username,
-                # Vous pouvez ajouter d'autres champs si nécessaire
-            } for user in all_users
-        ],
-        'blocked_users': [
-            {
-                'id': user.id,
-                'username': user.username,
-            } for user in blocked_users
-        ],
-        'blocked_by_users': [user.id for user in blocked_by_users]  # Seulement les IDs pour vérification côté client
+        'users': [{
+            'id': row['id'],
+            'username': row['username'],
+            'blocked_by': row['blocked_by']
+        } for row in rows],
+        'next_cursor': next_cursor
     }
-    
+    if not cursor and not terms:
+        data['blocked_users'] = list(
+            User.objects.filter(id__in=blocks.filter(userprofile__user=request.user).values('user_id'))
+            .order_by('username').values('id', 'username')
+        )
     return JsonResponse(data)
 
 def chat_ping(request):
-    return JsonResponse({'status': 'ok'})
\ No newline at end of file
+    return JsonResponse({'status': 'ok'})
+
+
+# ==============================
+# Salons de discussion
+# ==============================
+
+def _room_payload(membership):
+    return {
+        'id': membership.room_id,
+        'name': membership.room.name,
+        'role': membership.role
+    }
+
+@login_required
+def api_rooms(request):
+    """
+    GET : salons de l'utilisateur avec son rôle.
+    POST {"name": ..., "member_ids": [...]} : crée un salon dont l'utilisateur est propriétaire.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            name = (data.get('name') or '').strip()
+            member_ids = {int(member_id) for member_id in data.get('member_ids', [])} - {request.user.id}
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'status': 'error', 'message': 'Données invalides'}, status=400)
+        if not name or len(name) > 100:
+            return JsonResponse({'status': 'error', 'message': 'Nom de salon invalide'}, status=400)
+
+        # Utilisateurs existants avec qui aucun blocage n'empêche l'échange
+        excluded_ids = blocking.blocked_ids(request.user.id)
+        members = [
+            member for member_id, member in users.get_many(member_ids).items() if member_id not in excluded_ids
+        ]
+
+        with transaction.atomic():
+            room = Room.objects.create(name=name, creator=request.user)
+            RoomMembership.objects.bulk_create([
+                RoomMembership(room=room, user=request.user, role=RoomMembership.OWNER),
+                *[RoomMembership(room=room, user_id=member['id']) for member in members]
+            ])
+        for member in members:
+            rooms.notify_member(room.id, room.name, member['id'], member['username'], 'added')
+
+        return JsonResponse({
+            'status': 'success',
+            'room': {'id': room.id, 'name': room.name, 'role': RoomMembership.OWNER}
+        })
+
+    memberships = RoomMembership.objects.filter(user=request.user).select_related('room').order_by('room__name')
+    return JsonResponse({'rooms': [_room_payload(membership) for membership in memberships]})
+
+@login_required
+def room_messages(request, room_id):
+    """
+    Historique d'un salon, paginé par curseur sur (timestamp, id) comme get_user_messages :
+    ?before=<curseur> pour les messages plus anciens, ?after=<curseur> pour les plus récents.
+    """
+    if rooms.role(room_id, request.user.id) is None:
+        return JsonResponse({'status': 'error', 'message': 'Vous n\'êtes pas membre de ce salon'}, status=403)
+
+    before = request.GET.get('before')
+    after = request.GET.get('after')
+    limit = parse_page_size(request.GET.get('limit'))
+    direction = 'after' if after else 'before'
+    ordering = ('timestamp', 'id') if direction == 'after' else ('-timestamp', '-id')
+
+    history = RoomMessage.objects.filter(room_id=room_id)
+    try:
+        if before or after:
+            history = history.filter(keyset_filter(after or before, direction))
+        rows = list(history.order_by(*ordering).values(
+            'id', 'content', 'timestamp', 'sender_id', 'sender__username'
+        )[:limit + 1])
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['id']) if has_more else None
+    if direction == 'before':
+        rows.reverse()
+
+    return JsonResponse({
+        'messages': [{
+            'id': row['id'],
+            'content': row['content'],
+            'sender': row['sender__username'],
+            'sender_id': row['sender_id'],
+            'timestamp': row['timestamp'].isoformat()
+        } for row in rows],
+        'next_cursor': next_cursor
+    })
+
+@login_required
+def room_members(request, room_id):
+    """
+    GET : membres du salon et leur rôle.
+    POST {"user_id": ..., "role": "member"|"moderator"} : ajout par le propriétaire ou un modérateur
+    (seul le propriétaire nomme des modérateurs).
+    """
+    membership = RoomMembership.objects.filter(room_id=room_id, user=request.user).select_related('room').first()
+    if membership is None:
+        return JsonResponse({'status': 'error', 'message': 'Vous n\'êtes pas membre de ce salon'}, status=403)
+
+    if request.method == 'POST':
+        if not membership.can_manage:
+            return JsonResponse({'status': 'error', 'message': 'Action réservée aux modérateurs'}, status=403)
+        try:
+            data = json.loads(request.body)
+            user_id = int(data.get('user_id'))
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'status': 'error', 'message': 'user_id invalide'}, status=400)
+        role = data.get('role', RoomMembership.MEMBER)
+        if role not in (RoomMembership.MEMBER, RoomMembership.MODERATOR):
+            return JsonResponse({'status': 'error', 'message': 'Rôle invalide'}, status=400)
+        if role == RoomMembership.MODERATOR and membership.role != RoomMembership.OWNER:
+            return JsonResponse({'status': 'error', 'message': 'Seul le propriétaire nomme des modérateurs'}, status=403)
+
+        member = users.get(user_id)
+        if member is None:
+            raise Http404("Utilisateur introuvable")
+        if blocking.is_blocked(request.user.id, user_id):
+            return JsonResponse({'status': 'error', 'message': 'Impossible d\'ajouter cet utilisateur'}, status=403)
+
+        _, created = RoomMembership.objects.get_or_create(room_id=room_id, user_id=user_id, defaults={'role': role})
+        if not created:
+            return JsonResponse({'status': 'error', 'message': 'Cet utilisateur est déjà membre'}, status=400)
+        rooms.notify_member(room_id, membership.room.name, user_id, member['username'], 'added')
+        return JsonResponse({'status': 'success'})
+
+    members = RoomMembership.objects.filter(room_id=room_id).order_by('joined_at').values(
+        'user_id', 'user__username', 'role'
+    )
+    return JsonResponse({
+        'room': _room_payload(membership),
+        'members': [{
+            'user_id': member['user_id'],
+            'username': member['user__username'],
+            'role': member['role']
+        } for member in members]
+    })
+
+@login_required
+def remove_room_member(request, room_id, user_id):
+    """
+    Retire user_id du salon : départ volontaire, ou exclusion par le propriétaire / un modérateur
+    (un modérateur n'exclut que des membres). Si le propriétaire part, le membre le plus ancien
+    lui succède ; le dernier membre qui part supprime le salon.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=400)
+
+    with transaction.atomic():
+        # Verrou du salon : deux départs simultanés (propriétaire et dernier membre) ne peuvent pas
+        # désigner chacun un successeur déjà retiré, ni laisser un salon sans propriétaire
+        room = Room.objects.select_for_update().filter(id=room_id).first()
+        memberships = {
+            membership.user_id: membership
+            for membership in RoomMembership.objects.filter(room_id=room_id, user_id__in=[request.user.id, user_id])
+        }
+        actor = memberships.get(request.user.id)
+        target = memberships.get(user_id)
+        if room is None or actor is None:
+            return JsonResponse({'status': 'error', 'message': 'Vous n\'êtes pas membre de ce salon'}, status=403)
+        if target is None:
+            return JsonResponse({'status': 'error', 'message': 'Cet utilisateur n\'est pas membre'}, status=404)
+        if target is not actor and not (
+            actor.role == RoomMembership.OWNER
+            or (actor.role == RoomMembership.MODERATOR and target.role == RoomMembership.MEMBER)
+        ):
+            return JsonResponse({'status': 'error', 'message': 'Action réservée aux modérateurs'}, status=403)
+
+        room_name = room.name
+        target.delete()
+        if target.role == RoomMembership.OWNER:
+            successor = RoomMembership.objects.filter(room=room).order_by('joined_at', 'id').first()
+            if successor is None:
+                room.delete()
+            else:
+                successor.role = RoomMembership.OWNER
+                successor.save(update_fields=['role'])
+
+    summary = users.get(user_id)
+    rooms.notify_member(room_id, room_name, user_id, summary['username'] if summary else '', 'removed')
+    return JsonResponse({'status': 'success'})
@@ -0,0 +1,120 @@
+# chat/wire.py
+import json
+import uuid
+from collections import OrderedDict
+
+import msgpack
+
+# Encodage des trames du WebSocket ws/chat/.
+# JSON par défaut ; un client qui propose le sous-protocole SUBPROTOCOL reçoit des trames
+# binaires MessagePack dont les noms de champs sont remplacés par les codes courts ci-dessous
+# (table dupliquée dans static/js/chat-wire.js, à garder synchronisée).
+# Les événements diffusés à un groupe reçoivent un identifiant (prepare) et transitent tels quels
+# par le channel layer. Chaque format n'est encodé qu'au premier consumer du processus qui en a
+# besoin, puis la trame est reprise du cache ENCODED_CACHE_SIZE par les autres connexions du groupe.
+SUBPROTOCOL = 'chat.msgpack'
+EVENT_ID = '_id'
+ENCODED_CACHE_SIZE = 512
+
+_encoded = OrderedDict()
+
+FIELD_CODES = {
+    'type': 't',
+    'message': 'm',
+    'content': 'c',
+    'sender': 's',
+    'sender_id': 'si',
+    'recipient_id': 'ri',
+    'timestamp': 'ts',
+    'seq': 'q',
+    'status': 'st',
+    'user_id': 'u',
+    'username': 'un',
+    'events': 'ev',
+    'last_seq': 'lq',
+    'gap': 'gp',
+    'friends': 'fs',
+    'friend': 'f',
+    'online': 'on',
+    'profile_photo': 'pp',
+    'reason': 'rs',
+    'game_id': 'g',
+    'opponent': 'o',
+    'opponent_id': 'oi',
+    'is_host': 'h',
+    'host_name': 'hn',
+    'accepted': 'a',
+    'current_user': 'cu',
+    'current_user_id': 'ci',
+    'message_id': 'mi',
+    'unread': 'ur',
+    'room_id': 'rm',
+    'name': 'n',
+    'tournament_id': 'ti',
+    'version': 'v',
+    'current_round': 'cr',
+    'is_completed': 'ic',
+    'winner': 'w',
+    'completed': 'cm',
+    'matches': 'ms',
+    'round': 'r',
+    'player1': 'p1',
+    'player2': 'p2',
+    'player1_score': 's1',
+    'player2_score': 's2',
+    'deadline': 'dl',
+}
+
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        return {FIELD_CODES.get(key, key): _compact(item) for key, item in value.items() if key != EVENT_ID}
+    if isinstance(value, (list, tuple)):
+        return [_compact(item) for item in value]
+    return value
+
+
+def _expand(value):
+    if isinstance(value, dict):
+        return {FIELD_NAMES.get(key, key): _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    return value
+
+
+def decode(text_data=None, bytes_data=None):
+    """Trame reçue du client : JSON en texte, MessagePack à codes courts en binaire"""
+    if bytes_data is not None:
+        return _expand(msgpack.unpackb(bytes_data))
+    return json.loads(text_data)
+
+
+def encode_json(event):
+    if EVENT_ID in event:
+        event = {key: value for key, value in event.items() if key != EVENT_ID}
+    return json.dumps(event)
+
+
+def encode_msgpack(event):
+    return msgpack.packb(_compact(event), default=str)
+
+
+def prepare(event):
+    """Identifie un événement de groupe pour que ses trames soient partagées entre les connexions du processus"""
+    return {**event, EVENT_ID: uuid.uuid4().hex}
+
+
+def encode(event, binary):
+    """Trame de l'événement dans le format de la connexion, encodée au plus une fois par processus et par format"""
+    encoder = encode_msgpack if binary else encode_json
+    event_id = event.get(EVENT_ID)
+    if event_id is None:
+        return encoder(event)
+    frame = _encoded.get((event_id, binary))
+    if frame is None:
+        frame = _encoded[event_id, binary] = encoder(event)
+        if len(_encoded) > ENCODED_CACHE_SIZE:
+            _encoded.popitem(last=False)
+    return frame
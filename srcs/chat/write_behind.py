@@ -0,0 +1,150 @@
+# chat/write_behind.py
+import asyncio
+import atexit
+import logging
+import threading
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBehind:
+    """
+    Tampon d'écriture différée des messages de chat.
+
+    Le consumer diffuse le message puis l'ajoute ici ; le tampon est vidé vers Postgres
+    par bulk_create dès qu'il atteint batch_size messages ou après flush_interval secondes.
+    Les messages qui n'ont pas pu être enregistrés sont signalés à leur expéditeur
+    par un événement `message_persist_failed` sur son canal.
+    À l'arrêt du processus (atexit, après l'arrêt de daphne), close() enregistre le reste du tampon
+    et le lot dont l'écriture n'a pas abouti (tâche de flush interrompue avec la boucle).
+
+    Les événements de ce mode n'ont pas de `message_id` (le message n'existe pas encore en base) :
+    le client envoie alors `mark_read` sans identifiant, ce qui marque toute la conversation comme lue,
+    et l'accusé de lecture de l'expéditeur porte sur la conversation entière. Un message encore dans
+    le tampon au moment de cette lecture sera enregistré comme non lu.
+    """
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self._timer = None
+        self._lock = None
+        # Tâches de flush en cours (référencées pour ne pas être ramassées par le GC)
+        self._tasks = set()
+        # Lot retiré du tampon dont l'écriture n'est pas terminée ; _write_lock le partage avec close()
+        self._in_flight = []
+        self._write_lock = threading.Lock()
+
+    def add(self, sender_id, recipient_id, content, timestamp, reply_channel):
+        from chat.models import Message
+
+        message = Message(
+            sender_id=sender_id,
+            recipient_id=recipient_id,
+            content=content,
+            timestamp=timestamp or timezone.now()
+        )
+        self.pending.append((message, reply_channel))
+
+        if len(self.pending) >= self.batch_size:
+            self._schedule()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._schedule)
+
+    def _schedule(self):
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Vide le tampon ; appelé par le minuteur et au seuil de taille"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            self._in_flight = batch
+            failed = await database_sync_to_async(self._write)(batch)
+
+        if failed:
+            channel_layer = get_channel_layer()
+            for message, reply_channel in failed:
+                await channel_layer.send(reply_channel, {
+                    'type': 'message_persist_failed',
+                    'recipient_id': message.recipient_id,
+                    'message': message.content,
+                    'timestamp': str(message.timestamp)
+                })
+
+    def _write(self, batch):
+        with self._write_lock:
+            if self._in_flight is not batch:
+                # Déjà enregistré par close()
+                return []
+            failed = self._persist(batch)
+            self._in_flight = []
+        return failed
+
+    def close(self):
+        """
+        Enregistre de façon synchrone les messages encore en attente, la boucle asyncio étant arrêtée :
+        le tampon et le lot d'un flush interrompu. Une écriture en cours dans un thread est attendue.
+        Les expéditeurs ne peuvent plus être prévenus : les échecs sont seulement journalisés.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        with self._write_lock:
+            batch = self._in_flight + self.pending
+            self._in_flight, self.pending = [], []
+            if batch:
+                failed = self._persist(batch)
+                logger.info(f"Arrêt : {len(batch) - len(failed)} messages en attente enregistrés, {len(failed)} perdus")
+
+    @staticmethod
+    def _persist(batch):
+        """Enregistre le lot ; en cas d'échec, isole les messages fautifs ligne par ligne"""
+        from chat.models import Conversation, Message
+
+        messages = [message for message, _ in batch]
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create(messages)
+                Conversation.record_messages(messages)
+            return []
+        except Exception as e:
+            logger.warning(f"Échec de l'écriture groupée de {len(batch)} messages: {e}")
+
+        failed = []
+        for message, reply_channel in batch:
+            message.pk = None
+            try:
+                with transaction.atomic():
+                    message.save(force_insert=True)
+                    Conversation.record_message(message)
+            except Exception as e:
+                logger.warning(f"Message de {message.sender_id} vers {message.recipient_id} perdu: {e}")
+                failed.append((message, reply_channel))
+        return failed
+
+
+write_behind = MessageWriteBehind(
+    batch_size=settings.CHAT_WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL
+)
+
+if settings.CHAT_WRITE_BEHIND:
+    atexit.register(write_behind.close)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 
+import json
 import os
 
 import logging
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'accounts',
 ]
 
@@ -230,6 +232,56 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache partagé entre les workers (blocages du chat, ...)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://redis:6380/1",  # Base 0 utilisée par le channel layer
+    }
+}
+
+# Structures Redis du chat (présence, file de reprise, voir chat/redis_client.py) : base du cache par défaut.
+# Les ZADD GT de chat/presence.py demandent Redis 6.2 ou plus récent (image épinglée dans docker-compose.yml)
+CHAT_REDIS_URL = os.environ.get('CHAT_REDIS_URL', CACHES['default']['LOCATION'])
+
+# Écriture différée des messages de chat (voir chat/write_behind.py)
+# Le message est diffusé et acquitté avant d'être enregistré par lots dans Postgres
+CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND', 'False') == 'True'
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('CHAT_WRITE_BEHIND_BATCH_SIZE', 100))
+CHAT_WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get('CHAT_WRITE_BEHIND_FLUSH_INTERVAL', 0.5))  # secondes
+
+# Limitation du débit des trames reçues sur ws/chat/ (voir chat/ratelimit.py), par type de trame :
+# `rate` jetons par seconde et `burst` trames d'affilée par connexion, `per_minute` par utilisateur
+# tous onglets confondus. 'default' couvre les types absents de la table.
+# CHAT_RATE_LIMITS (JSON) dans l'environnement remplace les entrées correspondantes.
+CHAT_RATE_LIMITS = {
+    'chat_message': {'rate': 5, 'burst': 20, 'per_minute': 300},
+    'game_invite': {'rate': 0.2, 'burst': 3, 'per_minute': 20},
+    'game_invite_response': {'rate': 1, 'burst': 5, 'per_minute': 60},
+    'subscribe_friends': {'rate': 0.2, 'burst': 3, 'per_minute': 30},
+    'heartbeat': {'rate': 1, 'burst': 5, 'per_minute': 120},
+    'mark_read': {'rate': 2, 'burst': 10, 'per_minute': 240},
+    'room_message': {'rate': 5, 'burst': 20, 'per_minute': 300},
+    'room_subscribe': {'rate': 2, 'burst': 20, 'per_minute': 120},
+    'tournament_subscribe': {'rate': 1, 'burst': 5, 'per_minute': 60},
+    'default': {'rate': 2, 'burst': 10, 'per_minute': 240},
+}
+CHAT_RATE_LIMITS.update(json.loads(os.environ.get('CHAT_RATE_LIMITS', '{}')))
+# Au-delà de ce nombre de trames refusées, la connexion est fermée (code 4008)
+CHAT_RATE_LIMIT_CLOSE_AFTER = int(os.environ.get('CHAT_RATE_LIMIT_CLOSE_AFTER', 500))
+# Taille maximale d'une trame reçue, vérifiée avant le décodage
+CHAT_MAX_FRAME_BYTES = int(os.environ.get('CHAT_MAX_FRAME_BYTES', 16 * 1024))
+
+# Archives compressées des partitions mensuelles de messages (manage.py message_partitions)
+CHAT_ARCHIVE_DIR = os.environ.get('CHAT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives'))
+
+# Taille maximale d'un tournoi (les places libres sont complétées par des bots au démarrage)
+TOURNAMENT_MAX_PARTICIPANTS = int(os.environ.get('TOURNAMENT_MAX_PARTICIPANTS', 1024))
+# Délai en secondes pour jouer un match avec un humain, après quoi le worker déclare le forfait
+TOURNAMENT_MATCH_TIMEOUT = int(os.environ.get('TOURNAMENT_MATCH_TIMEOUT', 30 * 60))
+# Attente du worker des tournois (manage.py tournament_worker) quand sa file est vide
+TOURNAMENT_WORKER_INTERVAL = float(os.environ.get('TOURNAMENT_WORKER_INTERVAL', 1))
+
 # Ajoutez ces paramètres pour la sécurité
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 USE_X_FORWARDED_HOST = True
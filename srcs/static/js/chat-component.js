@@ -15,13 +15,19 @@ window.loadChatPage = async function() {
         // Afficher un indicateur de chargement
         document.querySelector('#app').innerHTML = '<div class="loading">Chargement du chat...</div>';
         
-        // Charger les données des utilisateurs (avec cache-busting)
-        const timestamp = new Date().getTime(); // Ajouter un timestamp pour éviter la mise en cache
-        const response = await fetch(`/chat/api/users/?t=${timestamp}`);
+        // Première page de l'annuaire et résumés de conversation
+        const [response, conversationsResponse] = await Promise.all([
+            fetch('/chat/api/users/'),
+            fetch('/chat/api/conversations/')
+        ]);
         const data = await response.json();
+        const conversationsData = conversationsResponse.ok ? await conversationsResponse.json() : { conversations: [] };
+        chatDirectory.cursor = data.next_cursor;
+        chatDirectory.query = '';
+        chatDirectory.conversations = conversationsData.conversations;
         
         // Générer le HTML de l'interface de chat
-        document.querySelector('#app').innerHTML = generateChatInterface(data);
+        document.querySelector('#app').innerHTML = generateChatInterface(data, conversationsData.conversations);
         
         // Initialiser le chat
         initChatFunctionality();
@@ -32,35 +38,126 @@ window.loadChatPage = async function() {
     }
 };
 
+// Annuaire paginé (/chat/api/users/) : curseur de la page suivante et recherche en cours
+const chatDirectory = {
+    cursor: null,
+    query: '',
+    conversations: [],
+    searchTimer: null
+};
+
+// Conversations récentes en tête de liste, puis les utilisateurs de l'annuaire qui n'y figurent pas
+function mergeDirectoryUsers(conversations, users) {
+    const recent = conversations.map(conversation => ({
+        id: conversation.user_id,
+        username: conversation.username,
+        blocked_by: false
+    }));
+    const recentIds = new Set(recent.map(user => user.id));
+    return [...recent, ...users.filter(user => !recentIds.has(user.id))];
+}
+
+function renderUserItem(user, unread = 0) {
+    const active = window.chatState?.currentRecipient?.id === user.id;
+    return `
+    <div class="user-item ${unread ? 'has-new-message' : ''} ${active ? 'active' : ''}" data-user-id="${user.id}" 
+        data-blocked-by="${user.blocked_by ? 'true' : 'false'}">
+        <div class="user-info" onclick="startChat(${user.id}, '${user.username}')">
+            <span class="username">${user.username}</span>
+            ${unread ? `<span class="unread-count">${unread}</span>` : ''}
+        </div>
+        <div class="user-actions">
+            ${!user.blocked_by ? `
+                <button type="button" class="btn btn-primary btn-sm btn-invite" 
+                        onclick="sendGameInvite(${user.id}, event)">Inviter</button>
+                <button type="button" class="btn btn-danger btn-sm btn-block" 
+                        onclick="blockUser(${user.id}, event)">Bloquer</button>
+            ` : `
+                <span class="blocked-status">Vous êtes bloqué</span>
+            `}
+        </div>
+    </div>
+    `;
+}
+
+// Recherche dans l'annuaire, déclenchée après une pause dans la saisie
+function searchDirectory(value) {
+    clearTimeout(chatDirectory.searchTimer);
+    chatDirectory.searchTimer = setTimeout(() => loadDirectoryPage(value.trim(), null), 250);
+}
+
+function loadMoreUsers() {
+    loadDirectoryPage(chatDirectory.query, chatDirectory.cursor);
+}
+
+// Charge une page de l'annuaire : remplace la liste (nouvelle recherche) ou la complète (page suivante)
+async function loadDirectoryPage(query, cursor) {
+    chatDirectory.query = query;
+    const params = new URLSearchParams();
+    if (query) params.set('q', query);
+    if (cursor) params.set('cursor', cursor);
+
+    try {
+        const response = await fetch(`/chat/api/users/?${params}`);
+        if (!response.ok) {
+            throw new Error(`Erreur ${response.status}`);
+        }
+        const data = await response.json();
+
+        // Réponse d'une recherche déjà remplacée par une saisie plus récente
+        const list = document.querySelector('.users-list');
+        if (!list || query !== chatDirectory.query) return;
+
+        // Conserver les compteurs de non-lus déjà affichés
+        const unreadByUser = {};
+        list.querySelectorAll('.user-item').forEach(item => {
+            const counter = item.querySelector('.unread-count');
+            if (counter) unreadByUser[item.dataset.userId] = parseInt(counter.textContent);
+        });
+
+        let users = data.users;
+        if (!cursor) {
+            users = query ? users : mergeDirectoryUsers(chatDirectory.conversations, users);
+            list.innerHTML = '';
+        }
+        const displayed = new Set([...list.querySelectorAll('.user-item')].map(item => item.dataset.userId));
+        list.insertAdjacentHTML('beforeend', users
+            .filter(user => !displayed.has(String(user.id)))
+            .map(user => renderUserItem(user, unreadByUser[user.id]))
+            .join(''));
+
+        chatDirectory.cursor = data.next_cursor;
+        const loadMore = document.getElementById('users-load-more');
+        if (loadMore) loadMore.style.display = data.next_cursor ? 'block' : 'none';
+    } catch (error) {
+        console.error('Erreur lors du chargement des utilisateurs:', error);
+        showSystemMessage('Erreur lors du chargement des utilisateurs');
+    }
+}
+
 // Générer l'interface HTML du chat
-function generateChatInterface(data) {
-    const { users, blocked_users, blocked_by_users } = data;
+function generateChatInterface(data, conversations = []) {
+    const { blocked_users } = data;
+    
+    // Résumés de conversation : non-lus par utilisateur, conversations récentes en premier
+    const unreadByUser = {};
+    conversations.forEach(conversation => {
+        unreadByUser[conversation.user_id] = conversation.unread;
+    });
+    const users = mergeDirectoryUsers(conversations, data.users);
     
     return `
     <div class="chat-interface">
         <!-- Liste des utilisateurs à gauche -->
         <div class="users-sidebar">
             <h3>Utilisateurs</h3>
+            <input type="search" id="users-search" class="form-control users-search" 
+                   placeholder="Rechercher un utilisateur..." oninput="searchDirectory(this.value)">
             <div class="users-list">
-                ${users.map(user => `
-                <div class="user-item" data-user-id="${user.id}" 
-                    data-blocked-by="${blocked_by_users.includes(user.id) ? 'true' : 'false'}">
-                    <div class="user-info" onclick="startChat(${user.id}, '${user.username}')">
-                        <span class="username">${user.username}</span>
-                    </div>
-                    <div class="user-actions">
-                        ${!blocked_by_users.includes(user.id) ? `
-                            <button type="button" class="btn btn-primary btn-sm btn-invite" 
-                                    onclick="sendGameInvite(${user.id}, event)">Inviter</button>
-                            <button type="button" class="btn btn-danger btn-sm btn-block" 
-                                    onclick="blockUser(${user.id}, event)">Bloquer</button>
-                        ` : `
-                            <span class="blocked-status">Vous êtes bloqué</span>
-                        `}
-                    </div>
-                </div>
-                `).join('')}
+                ${users.map(user => renderUserItem(user, unreadByUser[user.id])).join('')}
             </div>
+            <button type="button" id="users-load-more" class="btn btn-link btn-sm users-load-more" 
+                    style="display: ${data.next_cursor ? 'block' : 'none'}" onclick="loadMoreUsers()">Voir plus</button>
             
             <div class="blocked-section">
                 <h3>Utilisateurs bloqués</h3>
@@ -163,6 +260,13 @@ function initChatFunctionality() {
     // Ajouter gestionnaire d'événements pour le formulaire de message
     document.getElementById('message-form').addEventListener('submit', handleMessageSubmit);
     
+    // Charger l'historique plus ancien quand on remonte en haut de la conversation
+    document.querySelector('.messages-container').addEventListener('scroll', function() {
+        if (this.scrollTop === 0) {
+            loadOlderMessages();
+        }
+    });
+    
     // Exposer les fonctions au niveau global pour être accessibles depuis le HTML
     window.startChat = startChat;
     window.blockUser = blockUser;
@@ -219,10 +323,15 @@ function initWebSocket() {
     // Construction de l'URL WebSocket dynamique selon le protocole courant
     const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const wsHost = window.location.host;
-    const wsUrl = `${wsProtocol}//${wsHost}/ws/chat/`;
+    // Reprise à partir du dernier événement numéroté reçu (voir chat/delivery.py)
+    const delivery = readDeliveryState();
+    const resumeQuery = delivery ? `?user_id=${delivery.user_id}&last_seq=${delivery.seq}` : '';
+    const wsUrl = `${wsProtocol}//${wsHost}/ws/chat/${resumeQuery}`;
     
     console.log('Tentative de connexion WebSocket à:', wsUrl);
-    chatState.socket = new WebSocket(wsUrl);
+    // Trames binaires compactes si le décodeur est chargé (chat-wire.js), JSON sinon
+    chatState.socket = window.ChatWire ? new WebSocket(wsUrl, window.ChatWire.SUBPROTOCOL) : new WebSocket(wsUrl);
+    chatState.socket.binaryType = 'arraybuffer';
     
     // Gestion de l'ouverture de connexion
     chatState.socket.onopen = function() {
@@ -231,12 +340,39 @@ function initWebSocket() {
         chatState.reconnectAttempts = 0; 
         chatState.serverOffline = false;
         showSystemMessage('Connecté au chat');
+        
+        // Heartbeat de présence : le serveur considère la connexion expirée après 3 intervalles manqués
+        clearInterval(chatState.heartbeatInterval);
+        chatState.heartbeatInterval = setInterval(() => {
+            if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+                chatState.socket.send(JSON.stringify({ type: 'heartbeat' }));
+            }
+        }, 30000);
+        
+        // Réabonnement après reconnexion : un nouveau snapshot remplace les différences manquées
+        if (chatState.friendsSubscribed) {
+            chatState.socket.send(JSON.stringify({ type: 'subscribe_friends' }));
+        }
+        
+        // Salons : mêmes abonnements qu'avant la coupure
+        (chatState.rooms || new Set()).forEach(roomId => {
+            chatState.socket.send(JSON.stringify({ type: 'room_subscribe', room_id: roomId }));
+        });
+        
+        // Tournois suivis : la réponse porte la version, qui révèle les différences manquées
+        (chatState.tournaments || new Set()).forEach(tournamentId => {
+            chatState.socket.send(JSON.stringify({ type: 'tournament_subscribe', tournament_id: tournamentId }));
+        });
+        
+        // Compteurs de non-lus éventuellement modifiés pendant la déconnexion
+        refreshUnreadCounts();
     };
 
     // Gestion de la fermeture de connexion et des reconnexions
     chatState.socket.onclose = function(e) {
         console.log('WebSocket déconnecté, code:', e.code);
         chatState.isConnecting = false;
+        clearInterval(chatState.heartbeatInterval);
         
         // Gestion des tentatives de reconnexion
         chatState.reconnectAttempts++;
@@ -257,7 +393,7 @@ function initWebSocket() {
     chatState.socket.onmessage = function(e) {
         try {
             console.log('Message WebSocket reçu (brut):', e.data);
-            const data = JSON.parse(e.data);
+            const data = typeof e.data === 'string' ? JSON.parse(e.data) : window.ChatWire.decode(e.data);
             console.log('Message WebSocket parsé:', data);
             
             // Gestion des différents types de messages
@@ -266,6 +402,29 @@ function initWebSocket() {
                     console.log('Connexion WebSocket établie', data);
                     window.chatState.currentUser = data.username;
                     window.chatState.currentUserId = data.user_id;
+                    // Premier branchement ou autre compte : repartir de la séquence courante
+                    const delivery = readDeliveryState();
+                    if (!delivery || delivery.user_id !== data.user_id) {
+                        saveDeliveryState(data.user_id, data.seq);
+                        window.chatState.seenSeqs = new Set();
+                    }
+                    break;
+
+                case 'missed_events':
+                    console.log(`${data.events.length} événement(s) manqué(s) pendant la déconnexion`);
+                    data.events.forEach(event => {
+                        if (acceptSequencedEvent(event)) {
+                            handleChatMessageEvent(event);
+                        }
+                    });
+                    saveDeliveryState(window.chatState.currentUserId, Math.max(data.last_seq, readDeliveryState()?.seq || 0));
+                    if (data.gap) {
+                        // La file ne couvre plus toute la déconnexion : recharger la conversation ouverte
+                        showSystemMessage('Certains messages reçus hors ligne ont été rechargés');
+                        if (chatState.currentRecipient) {
+                            loadUserMessages(chatState.currentRecipient.id);
+                        }
+                    }
                     break;
                 
                 case 'game_invite':
@@ -298,24 +457,8 @@ function initWebSocket() {
                 
                 case 'chat_message':
                     console.log('Message de chat reçu:', data);
-                    
-                    // Vérification si le message appartient à la conversation actuelle
-                    const isCurrentConversation = (
-                        chatState.currentRecipient && 
-                        parseInt(data.sender_id) === parseInt(chatState.currentRecipient.id)
-                    );
-                    
-                    if (isCurrentConversation) {
-                        // Ajout du message à la conversation actuelle
-                        addMessageToChat({
-                            content: data.message,
-                            sender: data.sender,
-                            timestamp: data.timestamp,
-                            is_sent: false
-                        });
-                    } else {
-                        // Notification pour un nouveau message d'une autre conversation
-                        notifyNewMessage(data);
+                    if (acceptSequencedEvent(data)) {
+                        handleChatMessageEvent(data);
                     }
                     break;
                 
@@ -324,6 +467,30 @@ function initWebSocket() {
                     // Confirmation que le message a été envoyé avec succès
                     break;
                 
+                case 'rate_limited':
+                    // Trames ignorées par le serveur : un seul avis par type et par seconde
+                    console.warn(`Limite de débit atteinte (${data.message_type}): ${data.dropped} trame(s) ignorée(s)`);
+                    if (data.message_type === 'chat_message') {
+                        showSystemMessage(`Vous envoyez trop de messages, réessayez dans ${Math.ceil(data.retry_after)} s`);
+                    } else if (data.message_type === 'game_invite') {
+                        showSystemMessage('Trop d\'invitations envoyées, patientez avant de réessayer');
+                    }
+                    break;
+                
+                case 'read_receipt':
+                    // L'interlocuteur a lu nos messages
+                    if (chatState.currentRecipient && parseInt(chatState.currentRecipient.id) === parseInt(data.user_id)) {
+                        document.querySelectorAll('.messages-container .message.sent').forEach(item => {
+                            item.classList.add('read');
+                        });
+                    }
+                    break;
+                
+                case 'unread_update':
+                    // Conversation lue dans un autre onglet
+                    setUnreadBadge(data.user_id, data.unread);
+                    break;
+                
                 case 'error':
                     console.error('Erreur WebSocket:', data.message);
                     showSystemMessage(`Erreur: ${data.message}`);
@@ -334,6 +501,35 @@ function initWebSocket() {
                     showSystemMessage('Connexion au serveur de chat établie');
                     break;
 
+                case 'friends_snapshot':
+                case 'friend_presence':
+                case 'friend_added':
+                case 'friend_removed':
+                    // Liste d'amis poussée par le serveur, affichée par la page de profil (spa.js)
+                    window.dispatchEvent(new CustomEvent('friends-update', { detail: data }));
+                    break;
+
+                case 'room_membership':
+                    // Retiré d'un salon : plus d'abonnement à rétablir à la reconnexion
+                    if (data.status === 'removed' && chatState.rooms) {
+                        chatState.rooms.delete(data.room_id);
+                    }
+                    window.dispatchEvent(new CustomEvent('room-update', { detail: data }));
+                    break;
+
+                case 'room_subscribed':
+                case 'room_message':
+                case 'room_member':
+                    // Salons à plusieurs, affichés par la page qui s'y abonne
+                    window.dispatchEvent(new CustomEvent('room-update', { detail: data }));
+                    break;
+
+                case 'tournament_subscribed':
+                case 'tournament_update':
+                    // Différences du tableau, appliquées par la page du tournoi (spa.js)
+                    window.dispatchEvent(new CustomEvent('tournament-update', { detail: data }));
+                    break;
+
                 case 'user_status_change':
                     console.log('Changement de statut utilisateur:', data);
                     updateUserStatus(data.user_id, data.status);
@@ -401,6 +597,119 @@ function initWebSocket() {
     };
 }
 
+function handleChatMessageEvent(data) {
+    const chatState = ensureChatState();
+    
+    // Vérification si le message appartient à la conversation actuelle
+    const isCurrentConversation = (
+        chatState.currentRecipient && 
+        parseInt(data.sender_id) === parseInt(chatState.currentRecipient.id)
+    );
+    
+    if (isCurrentConversation) {
+        // Ajout du message à la conversation actuelle
+        addMessageToChat({
+            content: data.message,
+            sender: data.sender,
+            timestamp: data.timestamp,
+            is_sent: false
+        });
+        
+        // Conversation affichée : le message est lu (accusé différé si l'onglet est en arrière-plan)
+        if (document.hidden) {
+            chatState.pendingReadReceipt = parseInt(data.sender_id);
+        } else {
+            sendReadReceipt(data.sender_id, data.message_id);
+        }
+    } else {
+        // Notification pour un nouveau message d'une autre conversation
+        notifyNewMessage(data);
+    }
+}
+
+// Accusé de lecture : conversation avec userId lue jusqu'à messageId (entièrement sans messageId)
+function sendReadReceipt(userId, messageId = null) {
+    const chatState = ensureChatState();
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({
+            type: 'mark_read',
+            user_id: userId,
+            message_id: messageId
+        }));
+    }
+}
+
+// Badge de non-lus d'un utilisateur dans la barre latérale
+function setUnreadBadge(userId, count) {
+    const item = document.querySelector(`.users-list .user-item[data-user-id="${userId}"]`);
+    if (!item) return;
+    
+    let counter = item.querySelector('.unread-count');
+    if (!count) {
+        item.classList.remove('has-new-message');
+        if (counter) counter.remove();
+        return;
+    }
+    item.classList.add('has-new-message');
+    if (!counter) {
+        counter = document.createElement('span');
+        counter.className = 'unread-count';
+        item.querySelector('.user-info').appendChild(counter);
+    }
+    counter.textContent = count;
+}
+
+// Tous les compteurs de non-lus en une requête
+async function refreshUnreadCounts() {
+    if (!document.querySelector('.users-list')) return;
+    try {
+        const response = await fetch('/chat/api/unread/');
+        if (!response.ok) return;
+        const data = await response.json();
+        const currentId = window.chatState?.currentRecipient?.id;
+        document.querySelectorAll('.users-list .user-item').forEach(item => {
+            const userId = item.dataset.userId;
+            if (parseInt(userId) !== parseInt(currentId)) {
+                setUnreadBadge(userId, data.unread[userId] || 0);
+            }
+        });
+    } catch (error) {
+        console.error('Erreur lors de la mise à jour des non-lus:', error);
+    }
+}
+
+// Dernière séquence de livraison reçue par cet onglet (chaque onglet reçoit tous les événements).
+// Un rechargement de page relit les historiques par HTTP : la reprise ne sert qu'aux reconnexions.
+function readDeliveryState() {
+    return ensureChatState().delivery || null;
+}
+
+function saveDeliveryState(userId, seq) {
+    ensureChatState().delivery = { user_id: userId, seq: seq };
+}
+
+// Faux si l'événement a déjà été traité (rejoué à la reprise). Deux expéditeurs simultanés
+// peuvent livrer leurs numéros dans le désordre : on mémorise les derniers numéros vus
+// plutôt que de rejeter tout numéro inférieur au maximum.
+function acceptSequencedEvent(data) {
+    if (typeof data.seq !== 'number') return true;
+    
+    const chatState = ensureChatState();
+    if (!chatState.seenSeqs) chatState.seenSeqs = new Set();
+    if (chatState.seenSeqs.has(data.seq)) return false;
+    
+    chatState.seenSeqs.add(data.seq);
+    if (chatState.seenSeqs.size > 500) {
+        chatState.seenSeqs.delete(chatState.seenSeqs.values().next().value);
+    }
+    
+    const delivery = readDeliveryState();
+    if (!delivery || delivery.user_id !== chatState.currentUserId || data.seq > delivery.seq) {
+        saveDeliveryState(chatState.currentUserId, data.seq);
+    }
+    return true;
+}
+
 function showGameStartModal(opponent, gameId) {
     // Supprimer toute modal existante
     const existingModal = document.getElementById('gameStartModal');
@@ -597,6 +906,81 @@ function sendGameResponse(senderId, senderName, accepted) {
     }
 }
 
+// Ouvrir le WebSocket dès le chargement de l'application pour que la présence
+// de l'utilisateur ne dépende pas de la page affichée
+window.connectChatSocket = function() {
+    ensureChatState();
+    checkServerAndConnect();
+};
+
+// Abonnement à la liste d'amis sur le WebSocket du chat.
+// Retourne false si la connexion n'est pas encore ouverte (le snapshot arrivera à l'ouverture).
+window.subscribeFriends = function() {
+    const chatState = ensureChatState();
+    chatState.friendsSubscribed = true;
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'subscribe_friends' }));
+        return true;
+    }
+    return false;
+};
+
+window.unsubscribeFriends = function() {
+    const chatState = ensureChatState();
+    if (!chatState.friendsSubscribed) return;
+    chatState.friendsSubscribed = false;
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'unsubscribe_friends' }));
+    }
+};
+
+// Salons à plusieurs : les événements arrivent en CustomEvent 'room-update' sur window
+window.subscribeRoom = function(roomId) {
+    const chatState = ensureChatState();
+    if (!chatState.rooms) chatState.rooms = new Set();
+    chatState.rooms.add(roomId);
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'room_subscribe', room_id: roomId }));
+        return true;
+    }
+    return false;
+};
+
+window.unsubscribeRoom = function(roomId) {
+    const chatState = ensureChatState();
+    if (!chatState.rooms || !chatState.rooms.delete(roomId)) return;
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'room_unsubscribe', room_id: roomId }));
+    }
+};
+
+// Tableaux de tournois : les événements arrivent en CustomEvent 'tournament-update' sur window
+window.subscribeTournament = function(tournamentId) {
+    const chatState = ensureChatState();
+    if (!chatState.tournaments) chatState.tournaments = new Set();
+    chatState.tournaments.add(tournamentId);
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'tournament_subscribe', tournament_id: tournamentId }));
+        return true;
+    }
+    return false;
+};
+
+window.unsubscribeTournament = function(tournamentId) {
+    const chatState = ensureChatState();
+    if (!chatState.tournaments || !chatState.tournaments.delete(tournamentId)) return;
+    if (chatState.socket && chatState.socket.readyState === WebSocket.OPEN) {
+        chatState.socket.send(JSON.stringify({ type: 'tournament_unsubscribe', tournament_id: tournamentId }));
+    }
+};
+
+window.sendRoomMessage = function(roomId, content) {
+    const chatState = ensureChatState();
+    if (!chatState.socket || chatState.socket.readyState !== WebSocket.OPEN) return false;
+    chatState.socket.send(JSON.stringify({ type: 'room_message', room_id: roomId, message: content }));
+    return true;
+};
+
 async function checkServerAndConnect() {
     if (!window.chatState) {
         console.error('chatState n\'est pas défini');
@@ -671,16 +1055,21 @@ async function loadUserMessages(userId) {
         // Essayer de charger les messages depuis le serveur
         const response = await fetch(`/chat/messages/${userId}/`);
         if (response.ok) {
-            const messages = await response.json();
+            const data = await response.json();
+            const messages = data.messages;
+            
+            // Curseur pour charger les messages plus anciens au défilement
+            window.chatState.historyCursor = data.next_cursor;
             
             // Si nous avons des messages du serveur, les afficher
             if (messages && messages.length > 0) {
                 messages.forEach(msg => {
                     addMessageToChat({
                         content: msg.content,
-                        sender: msg.sender_username,
+                        sender: msg.sender,
                         timestamp: msg.timestamp,
-                        is_sent: msg.sender === window.chatState.currentUser
+                        is_sent: msg.sender === window.chatState.currentUser,
+                        is_read: msg.is_read
                     });
                 });
                 
@@ -717,6 +1106,51 @@ async function loadUserMessages(userId) {
     }
 }
 
+// Charger la page précédente de l'historique (pagination par curseur)
+async function loadOlderMessages() {
+    const chatState = ensureChatState();
+    const messagesContainer = document.querySelector('.messages-container');
+    if (!messagesContainer || !chatState.currentRecipient || !chatState.historyCursor || chatState.loadingHistory) {
+        return;
+    }
+
+    chatState.loadingHistory = true;
+    const userId = chatState.currentRecipient.id;
+    try {
+        const response = await fetch(`/chat/messages/${userId}/?before=${encodeURIComponent(chatState.historyCursor)}`);
+        if (!response.ok) {
+            console.error('Erreur lors du chargement de l\'historique');
+            return;
+        }
+        const data = await response.json();
+
+        // Ignorer la réponse si l'utilisateur a changé de conversation entre-temps
+        if (!chatState.currentRecipient || chatState.currentRecipient.id !== userId) {
+            return;
+        }
+        chatState.historyCursor = data.next_cursor;
+
+        // Insérer les anciens messages en haut en conservant la position de lecture
+        const previousHeight = messagesContainer.scrollHeight;
+        const fragment = document.createDocumentFragment();
+        data.messages.forEach(msg => {
+            fragment.appendChild(createMessageElement({
+                content: msg.content,
+                sender: msg.sender,
+                timestamp: msg.timestamp,
+                is_sent: msg.sender === chatState.currentUser,
+                is_read: msg.is_read
+            }));
+        });
+        messagesContainer.insertBefore(fragment, messagesContainer.firstChild);
+        messagesContainer.scrollTop = messagesContainer.scrollHeight - previousHeight;
+    } catch (error) {
+        console.error('Erreur:', error);
+    } finally {
+        chatState.loadingHistory = false;
+    }
+}
+
 // Démarrer une conversation avec un utilisateur
 async function startChat(userId, username) {
     console.log(`Démarrage d'une conversation avec ${username} (ID: ${userId})`);
@@ -724,6 +1158,7 @@ async function startChat(userId, username) {
     // Mettre à jour l'utilisateur actuel
     const chatState = ensureChatState();
     chatState.currentRecipient = { id: userId, name: username };
+    chatState.historyCursor = null;
     
     // Sauvegarder la conversation active
     saveActiveConversation(userId, username);
@@ -779,14 +1214,8 @@ async function startChat(userId, username) {
     });
 }
 
-// Ajouter un message au chat
-function addMessageToChat(messageData) {
-    const messagesContainer = document.querySelector('.messages-container');
-    if (!messagesContainer) {
-        console.error('Container de messages non trouvé');
-        return;
-    }
-    
+// Construire l'élément DOM d'un message
+function createMessageElement(messageData) {
     const messageDiv = document.createElement('div');
     
     // Identifier si c'est un message envoyé par nous (is_sent=true) ou reçu
@@ -808,7 +1237,8 @@ function addMessageToChat(messageData) {
         timestamp = new Date();
     }
 
-    messageDiv.className = `message ${isSent ? 'sent' : 'received'}`;
+    messageDiv.className = `message ${isSent ? 'sent' : 'received'}${isSent && messageData.is_read ? ' read' : ''}`;
+    messageDiv.dataset.timestamp = timestamp.toISOString();
     
     // Le contenu peut être soit dans message soit dans content selon la source
     const messageContent = messageData.message || messageData.content;
@@ -827,6 +1257,22 @@ function addMessageToChat(messageData) {
     messageDiv.appendChild(contentDiv);
     messageDiv.appendChild(timestampSpan);
     
+    return messageDiv;
+}
+
+// Ajouter un message au chat
+function addMessageToChat(messageData) {
+    const messagesContainer = document.querySelector('.messages-container');
+    if (!messagesContainer) {
+        console.error('Container de messages non trouvé');
+        return;
+    }
+    
+    const messageDiv = createMessageElement(messageData);
+    const isSent = messageDiv.classList.contains('sent');
+    const messageContent = messageData.message || messageData.content;
+    const timestamp = new Date(messageDiv.dataset.timestamp);
+    
     messagesContainer.appendChild(messageDiv);
     
     // Faire défiler vers le bas
@@ -1448,6 +1894,15 @@ function getCookie(name) {
 }
 
 document.addEventListener('visibilitychange', function() {
+    // Accusé de lecture différé : la conversation ouverte redevient visible
+    const chatState = window.chatState;
+    if (!document.hidden && chatState && chatState.pendingReadReceipt) {
+        if (chatState.currentRecipient && parseInt(chatState.currentRecipient.id) === chatState.pendingReadReceipt) {
+            sendReadReceipt(chatState.pendingReadReceipt);
+        }
+        chatState.pendingReadReceipt = null;
+    }
+    
     // Si l'utilisateur revient sur l'onglet et que le serveur était considéré comme hors ligne
     if (!document.hidden && window.chatState && window.chatState.serverOffline) {
         // Tester si le serveur est de nouveau disponible
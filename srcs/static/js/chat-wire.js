@@ -0,0 +1,150 @@
+// chat-wire.js
+// Décodage des trames binaires du WebSocket ws/chat/ (sous-protocole chat.msgpack).
+// Le serveur envoie du MessagePack dont les noms de champs sont remplacés par des codes courts :
+// la table FIELD_NAMES doit rester synchronisée avec FIELD_CODES dans chat/wire.py.
+// Le client continue d'envoyer du JSON, que le serveur accepte toujours.
+
+(function() {
+    const FIELD_NAMES = {
+        t: 'type',
+        m: 'message',
+        c: 'content',
+        s: 'sender',
+        si: 'sender_id',
+        ri: 'recipient_id',
+        ts: 'timestamp',
+        q: 'seq',
+        st: 'status',
+        u: 'user_id',
+        un: 'username',
+        ev: 'events',
+        lq: 'last_seq',
+        gp: 'gap',
+        fs: 'friends',
+        f: 'friend',
+        on: 'online',
+        pp: 'profile_photo',
+        rs: 'reason',
+        g: 'game_id',
+        o: 'opponent',
+        oi: 'opponent_id',
+        h: 'is_host',
+        hn: 'host_name',
+        a: 'accepted',
+        cu: 'current_user',
+        ci: 'current_user_id',
+        mi: 'message_id',
+        ur: 'unread',
+        rm: 'room_id',
+        n: 'name',
+        ti: 'tournament_id',
+        v: 'version',
+        cr: 'current_round',
+        ic: 'is_completed',
+        w: 'winner',
+        cm: 'completed',
+        ms: 'matches',
+        r: 'round',
+        p1: 'player1',
+        p2: 'player2',
+        s1: 'player1_score',
+        s2: 'player2_score',
+        dl: 'deadline'
+    };
+
+    const textDecoder = new TextDecoder();
+
+    // Décodeur MessagePack limité aux types produits par msgpack.packb côté serveur
+    function unpack(buffer) {
+        const view = new DataView(buffer);
+        const bytes = new Uint8Array(buffer);
+        let offset = 0;
+
+        function str(length) {
+            const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+            offset += length;
+            return value;
+        }
+
+        function bin(length) {
+            const value = bytes.slice(offset, offset + length);
+            offset += length;
+            return value;
+        }
+
+        function array(length) {
+            const value = new Array(length);
+            for (let i = 0; i < length; i++) value[i] = read();
+            return value;
+        }
+
+        function map(length) {
+            const value = {};
+            for (let i = 0; i < length; i++) {
+                const key = read();
+                value[key] = read();
+            }
+            return value;
+        }
+
+        function read() {
+            const byte = bytes[offset++];
+
+            if (byte <= 0x7f) return byte;
+            if (byte >= 0xe0) return byte - 0x100;
+            if ((byte & 0xf0) === 0x80) return map(byte & 0x0f);
+            if ((byte & 0xf0) === 0x90) return array(byte & 0x0f);
+            if ((byte & 0xe0) === 0xa0) return str(byte & 0x1f);
+
+            let value;
+            switch (byte) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: value = bytes[offset]; offset += 1; return bin(value);
+                case 0xc5: value = view.getUint16(offset); offset += 2; return bin(value);
+                case 0xc6: value = view.getUint32(offset); offset += 4; return bin(value);
+                case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+                case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+                case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+                case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+                case 0xce: value = view.getUint32(offset); offset += 4; return value;
+                case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+                case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+                case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+                case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+                case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+                case 0xd9: value = bytes[offset]; offset += 1; return str(value);
+                case 0xda: value = view.getUint16(offset); offset += 2; return str(value);
+                case 0xdb: value = view.getUint32(offset); offset += 4; return str(value);
+                case 0xdc: value = view.getUint16(offset); offset += 2; return array(value);
+                case 0xdd: value = view.getUint32(offset); offset += 4; return array(value);
+                case 0xde: value = view.getUint16(offset); offset += 2; return map(value);
+                case 0xdf: value = view.getUint32(offset); offset += 4; return map(value);
+                default:
+                    throw new Error(`Type MessagePack non pris en charge: 0x${byte.toString(16)}`);
+            }
+        }
+
+        return read();
+    }
+
+    function expand(value) {
+        if (Array.isArray(value)) return value.map(expand);
+        if (value && typeof value === 'object' && !(value instanceof Uint8Array)) {
+            const expanded = {};
+            for (const [key, item] of Object.entries(value)) {
+                expanded[FIELD_NAMES[key] || key] = expand(item);
+            }
+            return expanded;
+        }
+        return value;
+    }
+
+    window.ChatWire = {
+        SUBPROTOCOL: 'chat.msgpack',
+        decode(buffer) {
+            return expand(unpack(buffer));
+        }
+    };
+})();
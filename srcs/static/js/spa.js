@@ -357,6 +357,11 @@ async function updateNavbar() {
                     </li>
                 `;
                 document.getElementById('logout-link').addEventListener('click', handleLogout);
+                
+                // Présence en ligne : connexion WebSocket pour tout utilisateur authentifié
+                if (window.connectChatSocket) {
+                    window.connectChatSocket();
+                }
             } else {
                 navbar.innerHTML = `
                     <li class="nav-item">
@@ -745,23 +750,120 @@ function generateFriendProfileContent(data) {
 }
 
 function initFriendsStatusRefresh() {
-    console.log("Initialisation du polling des amis");
+    console.log("Abonnement à la liste d'amis");
     
     if (window.friendsStatusInterval) {
         clearInterval(window.friendsStatusInterval);
         window.friendsStatusInterval = null;
     }
     
-    // Vérifier immédiatement au chargement de la page
+    // Le WebSocket du chat pousse un snapshot puis les changements (voir handleFriendsUpdate)
+    if (typeof window.subscribeFriends === 'function' && window.subscribeFriends()) {
+        return;
+    }
+    
+    // WebSocket pas encore ouvert : repli sur le polling HTTP jusqu'à ce que l'abonnement passe
     fetchFriendsStatus();
+    window.friendsStatusInterval = setInterval(() => {
+        if (typeof window.subscribeFriends === 'function' && window.subscribeFriends()) {
+            clearInterval(window.friendsStatusInterval);
+            window.friendsStatusInterval = null;
+            return;
+        }
+        fetchFriendsStatus();
+    }, 3000);
+}
+
+// Événements de la liste d'amis reçus sur le WebSocket du chat (chat-component.js)
+window.addEventListener('friends-update', (event) => {
+    if (window.location.pathname !== '/profile') return;
+    handleFriendsUpdate(event.detail);
+});
+
+function handleFriendsUpdate(data) {
+    switch (data.type) {
+        case 'friends_snapshot': {
+            updateFriendsStatusUI(data.friends);
+            const displayed = getDisplayedFriendUsernames();
+            const newFriends = data.friends.filter(friend => !displayed.includes(friend.username));
+            if (newFriends.length > 0) {
+                addNewFriendsToUI(newFriends);
+            }
+            break;
+        }
+        case 'friend_presence':
+            setFriendCardStatus(findFriendCard(data.username), data.online);
+            break;
+        case 'friend_added':
+            addNewFriendsToUI([data.friend]);
+            break;
+        case 'friend_removed': {
+            const card = findFriendCard(data.username);
+            if (card) {
+                removeFriendCard(card, data.username, data.reason === 'deleted');
+            }
+            break;
+        }
+    }
+}
+
+function getDisplayedFriendUsernames() {
+    return Array.from(document.querySelectorAll('.friend-card')).map(card => 
+        card.querySelector('.friend-name')?.textContent
+    ).filter(Boolean);
+}
+
+function findFriendCard(username) {
+    return Array.from(document.querySelectorAll('.friend-card')).find(card => 
+        card.querySelector('.friend-name')?.textContent === username &&
+        !card.classList.contains('fade-out')
+    );
+}
+
+function setFriendCardStatus(card, online) {
+    const statusElement = card?.querySelector('.friend-status');
+    if (!statusElement) return;
     
-    // Puis vérifier périodiquement
-    window.friendsStatusInterval = setInterval(fetchFriendsStatus, 3000); // Réduit à 3 secondes pour une meilleure réactivité
+    if (statusElement.classList.contains('online') !== online) {
+        // Le statut a changé, ajouter l'animation
+        statusElement.classList.add('status-changed');
+        
+        setTimeout(() => {
+            statusElement.classList.remove('status-changed');
+        }, 500);
+    }
+    
+    statusElement.className = `friend-status ${online ? 'online' : 'offline'}`;
+    statusElement.textContent = online ? 'Online' : 'Offline';
+}
+
+function removeFriendCard(cardToRemove, username, accountDeleted) {
+    cardToRemove.style.opacity = "0";
+    cardToRemove.style.transform = "translateX(-20px)";
+    cardToRemove.classList.add('fade-out');
+    setTimeout(() => {
+        cardToRemove.remove();
+        
+        const countEl = document.querySelector('.friends-section h3 .stat-value');
+        if (countEl) {
+            const currentCount = parseInt(countEl.textContent);
+            countEl.textContent = currentCount - 1;
+        }
+
+        if (accountDeleted) {
+            showDeletedFriendNotification(username);
+        }
+    }, 500);
 }
 
 function addNewFriendsToUI(newFriends) {
     console.log("Ajout de nouveaux amis:", newFriends);
     
+    // La réponse du formulaire et l'événement WebSocket peuvent annoncer le même ami
+    const displayed = getDisplayedFriendUsernames();
+    newFriends = newFriends.filter(friend => !displayed.includes(friend.username));
+    if (newFriends.length === 0) return;
+    
     const friendsGrid = document.querySelector('.friends-grid');
     if (!friendsGrid) {
         console.error("Impossible de trouver la grille d'amis");
@@ -1040,21 +1142,7 @@ function updateFriendsStatusUI(friends) {
             );
             
             if (cardToRemove) {
-                // Corriger la duplication et appliquer l'animation une seule fois
-                cardToRemove.style.opacity = "0";
-                cardToRemove.style.transform = "translateX(-20px)";
-                cardToRemove.classList.add('fade-out'); // Une seule fois ici
-                setTimeout(() => {
-                    cardToRemove.remove();
-                    
-                    const countEl = document.querySelector('.friends-section h3 .stat-value');
-                    if (countEl) {
-                        const currentCount = parseInt(countEl.textContent);
-                        countEl.textContent = currentCount - 1;
-                    }
-
-                    showDeletedFriendNotification(username);
-                }, 500);
+                removeFriendCard(cardToRemove, username, true);
             } else {
                 console.log(`Carte non trouvée pour ${username}`);
             }
@@ -1071,19 +1159,7 @@ function updateFriendsStatusUI(friends) {
             const friend = friends.find(f => f.username === username);
             
             if (friend) {
-                const currentStatus = statusElement.classList.contains('online');
-                
-                if (currentStatus !== friend.online) {
-                    // Le statut a changé, ajouter l'animation
-                    statusElement.classList.add('status-changed');
-                    
-                    setTimeout(() => {
-                        statusElement.classList.remove('status-changed');
-                    }, 500);
-                }
-                
-                statusElement.className = `friend-status ${friend.online ? 'online' : 'offline'}`;
-                statusElement.textContent = friend.online ? 'Online' : 'Offline';
+                setFriendCardStatus(card, friend.online);
             }
         }
     });
@@ -1125,6 +1201,9 @@ function cleanupProfilePage() {
         window.friendsStatusInterval = null;
         console.log('Polling des amis arrêté');
     }
+    if (typeof window.unsubscribeFriends === 'function') {
+        window.unsubscribeFriends();
+    }
 }
 
 function generateProfileContent(data) {
@@ -1779,26 +1858,48 @@ function generateHomePageContent(data) {
     }
 }
 
-// Fonction pour charger les tournois
+// Sections du lobby : conteneur → paramètre `section` de /api/tournaments/
+const tournamentSections = {
+    'active-tournaments': 'active',
+    'my-tournaments': 'mine',
+    'completed-tournaments': 'completed'
+};
+
+// Fonction pour charger les tournois (première page de chaque section)
 async function loadTournaments() {
     try {
         const response = await fetch('/api/tournaments/');
         const data = await response.json();
+        const cursors = data.next_cursors || {};
+        
+        renderTournamentList('active-tournaments', data.active_tournaments, cursors.active);
+        renderTournamentList('my-tournaments', data.my_tournaments, cursors.mine);
+        renderTournamentList('completed-tournaments', data.completed_tournaments, cursors.completed);
+    } catch (error) {
+        console.error("Erreur lors du chargement des tournois:", error);
+    }
+}
+
+// Page suivante d'une section, ajoutée à la suite de la liste
+async function loadMoreTournaments(containerId, cursor) {
+    try {
+        const section = tournamentSections[containerId];
+        const response = await fetch(`/api/tournaments/?section=${section}&cursor=${encodeURIComponent(cursor)}`);
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.message);
         
-        renderTournamentList('active-tournaments', data.active_tournaments);
-        renderTournamentList('my-tournaments', data.my_tournaments);
-        renderTournamentList('completed-tournaments', data.completed_tournaments);
+        renderTournamentList(containerId, data.tournaments, data.next_cursor, true);
     } catch (error) {
         console.error("Erreur lors du chargement des tournois:", error);
     }
 }
 
 // Fonction pour afficher la liste des tournois
-function renderTournamentList(containerId, tournaments) {
+function renderTournamentList(containerId, tournaments, nextCursor = null, append = false) {
     const container = document.getElementById(containerId);
     
-
-    if (!tournaments || tournaments.length === 0) {
+    container.querySelector('.tournaments-load-more')?.remove();
+    if (!append && (!tournaments || tournaments.length === 0)) {
         container.innerHTML = `
             <div class="empty-state">
                 <i class="fas fa-trophy-alt"></i>
@@ -1807,7 +1908,7 @@ function renderTournamentList(containerId, tournaments) {
         return;
     }
     
-    container.innerHTML = tournaments.map(t => `
+    const cards = tournaments.map(t => `
         <div class="tournament-card ${t.is_completed ? 'completed' : ''} ${t.am_i_participant ? 'participating' : ''}">
             <div class="tournament-header">
                 <h3 class="tournament-title">${t.name}</h3>
@@ -1837,6 +1938,20 @@ function renderTournamentList(containerId, tournaments) {
             </a>
         </div>
     `).join('');
+    if (append) {
+        container.insertAdjacentHTML('beforeend', cards);
+    } else {
+        container.innerHTML = cards;
+    }
+    
+    if (nextCursor) {
+        const loadMore = document.createElement('button');
+        loadMore.type = 'button';
+        loadMore.className = 'btn btn-link tournaments-load-more';
+        loadMore.textContent = 'Voir plus';
+        loadMore.addEventListener('click', () => loadMoreTournaments(containerId, nextCursor));
+        container.appendChild(loadMore);
+    }
 }
 
 function renderTournamentMatches(matches, currentRound) {
@@ -1854,7 +1969,7 @@ function renderTournamentMatches(matches, currentRound) {
     });
 
     let html = '';
-    Object.keys(matchesByRound).sort().forEach(round => {
+    Object.keys(matchesByRound).sort((a, b) => a - b).forEach(round => {
         html += `
             <div class="round-section">
                 <h3>Tour ${round}</h3>
@@ -1963,6 +2078,11 @@ function renderTournamentMatches(matches, currentRound) {
                                 <i class="fas fa-hourglass-half"></i> En attente
                             </div>
                         `}
+                        ${!match.is_completed && match.deadline ? `
+                            <div class="match-deadline">
+                                <i class="fas fa-clock"></i> À jouer avant ${new Date(match.deadline).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+                            </div>
+                        ` : ''}
                     </div>
                 </div>
             </div>`;
@@ -2001,9 +2121,20 @@ function showCreateTournamentModal() {
                     <label for="max-participants" style="display: block; margin-bottom: 5px;">Nombre maximum de participants</label>
                     <select id="max-participants" style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid var(--border-color);">
                         <option value="4">4</option>
+                        <option value="6">6</option>
                         <option value="8" selected>8</option>
+                        <option value="12">12</option>
                         <option value="16">16</option>
+                        <option value="24">24</option>
                         <option value="32">32</option>
+                        <option value="64">64</option>
+                    </select>
+                </div>
+                <div class="form-group" style="margin-bottom: 15px;">
+                    <label for="tournament-system" style="display: block; margin-bottom: 5px;">Format</label>
+                    <select id="tournament-system" style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid var(--border-color);">
+                        <option value="elimination" selected>Élimination directe</option>
+                        <option value="swiss">Système suisse</option>
                     </select>
                 </div>
                 <div class="form-group" style="margin-bottom: 15px;">
@@ -2032,6 +2163,7 @@ function showCreateTournamentModal() {
         
         const name = document.getElementById('tournament-name').value;
         const maxParticipants = document.getElementById('max-participants').value;
+        const system = document.getElementById('tournament-system').value;
         const creatorAlias = document.getElementById('creator-alias').value.trim();
         
         try {
@@ -2044,6 +2176,7 @@ function showCreateTournamentModal() {
                 body: JSON.stringify({
                     name: name,
                     max_participants: maxParticipants,
+                    system: system,
                     creator_alias: creatorAlias
                 })
             });
@@ -2321,6 +2454,206 @@ router.on('/tournaments', async () => {
         console.error("Erreur lors du chargement de la page des tournois:", error);
     }
 });
+
+// Page du tournoi affichée : dernier instantané, tenu à jour par les différences poussées
+let tournamentView = null;
+
+function renderTournamentDetail(tournamentId, data) {
+    const tournament = data.tournament;
+    const participants = data.participants;
+    const matches = data.matches;
+    
+    const html = `
+        <div class="container mt-5">
+            <div class="back-button">
+                <a href="/tournaments" class="btn btn-back" data-link>
+                    <i class="fas fa-arrow-left"></i> Retour aux tournois
+                </a>
+            </div>
+            
+            <div class="tournament-detail-page">
+                <div class="tournament-header" style="background: linear-gradient(to right, #1b2838, #2a475e)">
+                    <h1 class="tournament-title">${tournament.name}</h1>
+                    
+                    <div class="tournament-meta">
+                        <div class="meta-item">
+                            <i class="fas fa-user-circle"></i>
+                            <span>Créé par: ${tournament.creator.username}</span>
+                        </div>
+                        <div class="meta-item">
+                            <i class="fas fa-calendar"></i>
+                            <span>Date: ${new Date(tournament.start_date).toLocaleDateString()}</span>
+                        </div>
+                        <div class="meta-item">
+                            <i class="fas fa-users"></i>
+                            <span>Participants: ${participants.length}/${tournament.max_participants}</span>
+                        </div>
+                        <div class="meta-item">
+                            <i class="fas fa-sitemap"></i>
+                            <span>Format: ${tournament.system === 'swiss' ?
+                                `Système suisse${tournament.swiss_rounds ? ` (${tournament.swiss_rounds} rondes)` : ''}` :
+                                'Élimination directe'}</span>
+                        </div>
+                        <div class="meta-item">
+                            <i class="fas fa-gamepad"></i>
+                            <span>État: ${tournament.is_completed ? 
+                                `<span class="status completed">Terminé</span>` : 
+                                `<span class="status active">Tour ${tournament.current_round}</span>`}
+                            </span>
+                        </div>
+                        ${tournament.is_completed && tournament.winner ? 
+                            `<div class="meta-item winner">
+                                <i class="fas fa-crown"></i>
+                                <span>Vainqueur: ${tournament.winner}</span>
+                            </div>` : ''
+                        }
+                    </div>
+                </div>
+                
+                <div class="tournament-actions">
+                    ${tournament.is_registration_open && !tournament.am_i_participant ? 
+                        `<button id="join-tournament-btn" class="btn btn-join">
+                            <i class="fas fa-sign-in-alt"></i> Rejoindre le tournoi
+                        </button>` : ''
+                    }
+                    ${tournament.is_registration_open && tournament.am_i_participant ? 
+                        `<button id="leave-tournament-btn" class="btn btn-leave">
+                            <i class="fas fa-sign-out-alt"></i> Quitter le tournoi
+                        </button>` : ''
+                    }
+                    ${tournament.am_i_creator && tournament.is_registration_open && participants.length >= 2 ? 
+                        `<button id="start-tournament-btn" class="btn btn-start">
+                            <i class="fas fa-play"></i> Démarrer le tournoi
+                        </button>` : ''
+                    }
+                </div>
+                
+                <div class="tournament-content">
+                    <div class="participants-section">
+                        <h2 class="section-title">
+                            Participants <span class="count-badge">${participants.length}/${tournament.max_participants}</span>
+                        </h2>
+                        <div class="participants-list">
+                            ${participants.map(p => `
+                                <div class="participant ${p.is_bot ? 'bot' : ''}">
+                                    <div class="participant-avatar">
+                                        <img src="${p.profile_photo}" alt="${p.alias}" 
+                                            onerror="this.src='/static/images/default_avatar.jpg'">
+                                        ${p.is_bot ? '<div class="bot-badge"><i class="fas fa-robot"></i></div>' : ''}
+                                    </div>
+                                    <span class="participant-name">${p.alias}</span>
+                                </div>
+                            `).join('')}
+                        </div>
+                    </div>
+                    
+                    <div class="matches-section">
+                        <h2 class="section-title">Matchs du tournoi</h2>
+                        <div class="tournament-matches">
+                            ${renderTournamentMatches(matches, tournament.current_round)}
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+    
+    document.querySelector('#app').innerHTML = html;
+    
+    // Ajouter les gestionnaires d'événements
+    setupTournamentDetailEvents(tournamentId);
+}
+
+// Relit l'instantané (304 via l'ETag si rien n'a changé) après une différence manquée
+async function refreshTournamentDetail() {
+    const view = tournamentView;
+    try {
+        const response = await fetch(`/api/tournaments/${view.id}/`);
+        if (!response.ok || tournamentView !== view) return;
+        view.data = await response.json();
+        renderTournamentDetail(view.id, view.data);
+    } catch (error) {
+        console.error("Erreur lors du rafraîchissement du tournoi:", error);
+    }
+}
+
+// Applique une différence `tournament_update` ; false si elle ne suit pas la version affichée
+// ou mentionne un joueur inconnu (l'instantané doit alors être relu)
+function applyTournamentUpdate(data, update) {
+    // Sans détail des matchs (tableau trop grand pour une différence), on relit l'instantané
+    if (update.version !== data.version + 1 || !update.completed || !update.matches) return false;
+    
+    const participants = new Map(data.participants.map(p => [p.username, p]));
+    const matches = new Map(data.matches.map(m => [m.id, m]));
+    if (update.completed.some(row => !matches.has(row.id)) ||
+        update.matches.some(row => !participants.has(row.player1) || !participants.has(row.player2))) {
+        return false;
+    }
+    
+    update.completed.forEach(row => {
+        Object.assign(matches.get(row.id), {
+            is_completed: true,
+            player1_score: row.player1_score,
+            player2_score: row.player2_score,
+            winner: row.winner,
+            can_play: false
+        });
+    });
+    
+    const me = window.chatState && window.chatState.currentUser;
+    const player = username => {
+        const { username: name, alias, display_name, profile_photo, is_bot } = participants.get(username);
+        return { username: name, alias, display_name, profile_photo, is_bot };
+    };
+    update.matches.forEach(row => {
+        const player1 = player(row.player1);
+        const player2 = player(row.player2);
+        data.matches.push({
+            id: row.id,
+            round: row.round,
+            player1,
+            player2,
+            is_completed: row.is_completed,
+            player1_score: row.player1_score,
+            player2_score: row.player2_score,
+            winner: row.winner,
+            deadline: row.deadline,
+            can_play: !row.is_completed && [player1.username, player2.username].includes(me) &&
+                      !(player1.is_bot && player2.is_bot)
+        });
+    });
+    
+    Object.assign(data.tournament, {
+        current_round: update.current_round,
+        is_completed: update.is_completed,
+        winner: update.winner,
+        is_registration_open: false
+    });
+    data.version = update.version;
+    return true;
+}
+
+window.addEventListener('tournament-update', (event) => {
+    const update = event.detail;
+    const view = tournamentView;
+    if (!view || update.tournament_id !== view.id) return;
+    
+    // Page quittée : plus besoin des différences de ce tournoi
+    if (window.location.pathname !== `/tournament/${view.id}`) {
+        window.unsubscribeTournament(view.id);
+        tournamentView = null;
+        return;
+    }
+    
+    if (update.type === 'tournament_subscribed') {
+        if (update.version !== view.data.version) refreshTournamentDetail();
+    } else if (applyTournamentUpdate(view.data, update)) {
+        renderTournamentDetail(view.id, view.data);
+    } else {
+        refreshTournamentDetail();
+    }
+});
+
 router.on('/tournament/:id', async (params) => {
     try {
 
@@ -2373,104 +2706,14 @@ router.on('/tournament/:id', async (params) => {
         }
         const data = await response.json();
         
-        const tournament = data.tournament;
-        const participants = data.participants;
-        const matches = data.matches;
-
+        renderTournamentDetail(tournamentId, data);
         
-        const html = `
-            <div class="container mt-5">
-                <div class="back-button">
-                    <a href="/tournaments" class="btn btn-back" data-link>
-                        <i class="fas fa-arrow-left"></i> Retour aux tournois
-                    </a>
-                </div>
-                
-                <div class="tournament-detail-page">
-                    <div class="tournament-header" style="background: linear-gradient(to right, #1b2838, #2a475e)">
-                        <h1 class="tournament-title">${tournament.name}</h1>
-                        
-                        <div class="tournament-meta">
-                            <div class="meta-item">
-                                <i class="fas fa-user-circle"></i>
-                                <span>Créé par: ${tournament.creator.username}</span>
-                            </div>
-                            <div class="meta-item">
-                                <i class="fas fa-calendar"></i>
-                                <span>Date: ${new Date(tournament.start_date).toLocaleDateString()}</span>
-                            </div>
-                            <div class="meta-item">
-                                <i class="fas fa-users"></i>
-                                <span>Participants: ${participants.length}/${tournament.max_participants}</span>
-                            </div>
-                            <div class="meta-item">
-                                <i class="fas fa-gamepad"></i>
-                                <span>État: ${tournament.is_completed ? 
-                                    `<span class="status completed">Terminé</span>` : 
-                                    `<span class="status active">Tour ${tournament.current_round}</span>`}
-                                </span>
-                            </div>
-                            ${tournament.is_completed && tournament.winner ? 
-                                `<div class="meta-item winner">
-                                    <i class="fas fa-crown"></i>
-                                    <span>Vainqueur: ${tournament.winner}</span>
-                                </div>` : ''
-                            }
-                        </div>
-                    </div>
-                    
-                    <div class="tournament-actions">
-                        ${tournament.is_registration_open && !tournament.am_i_participant ? 
-                            `<button id="join-tournament-btn" class="btn btn-join">
-                                <i class="fas fa-sign-in-alt"></i> Rejoindre le tournoi
-                            </button>` : ''
-                        }
-                        ${tournament.is_registration_open && tournament.am_i_participant ? 
-                            `<button id="leave-tournament-btn" class="btn btn-leave">
-                                <i class="fas fa-sign-out-alt"></i> Quitter le tournoi
-                            </button>` : ''
-                        }
-                        ${tournament.am_i_creator && tournament.is_registration_open && participants.length >= 2 ? 
-                            `<button id="start-tournament-btn" class="btn btn-start">
-                                <i class="fas fa-play"></i> Démarrer le tournoi
-                            </button>` : ''
-                        }
-                    </div>
-                    
-                    <div class="tournament-content">
-                        <div class="participants-section">
-                            <h2 class="section-title">
-                                Participants <span class="count-badge">${participants.length}/${tournament.max_participants}</span>
-                            </h2>
-                            <div class="participants-list">
-                                ${participants.map(p => `
-                                    <div class="participant ${p.is_bot ? 'bot' : ''}">
-                                        <div class="participant-avatar">
-                                            <img src="${p.profile_photo}" alt="${p.alias}" 
-                                                onerror="this.src='/static/images/default_avatar.jpg'">
-                                            ${p.is_bot ? '<div class="bot-badge"><i class="fas fa-robot"></i></div>' : ''}
-                                        </div>
-                                        <span class="participant-name">${p.alias}</span>
-                                    </div>
-                                `).join('')}
-                            </div>
-                        </div>
-                        
-                        <div class="matches-section">
-                            <h2 class="section-title">Matchs du tournoi</h2>
-                            <div class="tournament-matches">
-                                ${renderTournamentMatches(matches, tournament.current_round)}
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        `;
-        
-        document.querySelector('#app').innerHTML = html;
-        
-        // Ajouter les gestionnaires d'événements
-        setupTournamentDetailEvents(tournamentId);
+        // Suivre le tableau en direct (groupe tournament_<id> sur ws/chat/)
+        if (tournamentView && tournamentView.id !== Number(tournamentId)) {
+            window.unsubscribeTournament(tournamentView.id);
+        }
+        tournamentView = { id: Number(tournamentId), data };
+        window.subscribeTournament(tournamentView.id);
     } catch (error) {
         console.error("Erreur lors du chargement du détail du tournoi:", error);
     }